@@ -1,8 +1,11 @@
 import os
 import logging
 
+from dotenv import load_dotenv
 from fastapi import FastAPI
 
+from api.services.log_pipeline import configure_logging
+
 # Configure model/cache directories to use the ephemeral but writable /tmp
 # filesystem provided by Vercel serverless. This allows heavy model files
 # (e.g. Hugging Face / sentence-transformers) to be cached across warm
@@ -17,8 +20,13 @@ os.environ.setdefault(
     os.path.join(TMP_DIR, "sentence_transformers"),
 )
 
+# Serverless instances are cold-started on scale-out: keep SDK imports out of
+# the startup path and load them on first use instead (see api.main).
+os.environ.setdefault("LAZY_IMPORTS", "true")
+
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+load_dotenv()  # LOG_* settings may come from .env
+configure_logging()
 logger.info(
     "Initialized /tmp-based model cache dirs: HF_HOME=%s, TRANSFORMERS_CACHE=%s, SENTENCE_TRANSFORMERS_HOME=%s",  # noqa: E501
     os.environ.get("HF_HOME"),
@@ -1,28 +1,40 @@
 # api/main.py
-from fastapi import FastAPI, HTTPException, Depends, Request, Query
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Request, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from fastapi import Form
 from dotenv import load_dotenv
 import os
 import json
 import logging
+import asyncio
+import importlib.util
+import re
 from api.models import ChatRequest, User
-from api.services.embeddings import get_embedding
-from api.services.vector_store import search_vectors
-from api.services.llm import stream_llm_response, get_llm_response
-from api.middleware.auth import get_current_user
+from api.services.embeddings import get_embedding, warm_embedding_model
+from api.services.vector_store import search_vectors, search_vectors_batch, warm_local_index, warm_route
+from api.services.tenants import UnknownTenant, get_route, tenant_routes, tenant_scoped
+from api.services.llm import stream_llm_response, stream_llm_tokens, get_llm_response
+from api.services.context import pack_context
+from api.services.faq import lookup_faq
+from api.services.prefetch import PrefetchEntry, get_prefetch_cache, get_prefetch_limiter
+from api.services.session_cache import get_session_cache, session_reuse_enabled
+from api.services.engagement_rollups import EngagementRollups, get_engagement_rollups, recency_points
+from api.services.log_pipeline import configure_logging
+from api.services.warmup import get_cache_warmer, get_warm_retrieval_cache
+from api.services.loop_monitor import get_loop_monitor, start_loop_monitor, stop_loop_monitor
+from api.middleware.auth import get_current_user, get_current_user_ws, start_jwks_refresh, stop_jwks_refresh
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from urllib.parse import unquote, parse_qs
 import logging
 import time
 
-logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
-
-# Load environment variables from .env file
+# Load environment variables from .env file (before LOG_* settings are read)
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+configure_logging()
+
 app = FastAPI()
 
 
@@ -30,14 +42,27 @@ def dev_mode_enabled() -> bool:
     return os.getenv("DEV_MODE", "true").lower() in ("1", "true", "yes")
 
 
+def lazy_imports_enabled() -> bool:
+    """Defer SDK imports to first use (set by ``api/index.py`` for serverless)."""
+    return os.getenv("LAZY_IMPORTS", "false").lower() in ("1", "true", "yes")
+
+
 @app.get("/api/health")
 async def health_check():
-    """Simple health endpoint that attempts to detect whether optional services are available."""
+    """Simple health endpoint that attempts to detect whether optional services are available.
+
+    Answers 503 ``warming`` while the startup cache warmup (WARMUP_QUERY_LOG)
+    is still running, so instances only take traffic once warm.
+    """
+    warmup = get_cache_warmer().snapshot()
     checks = {
         "dev_mode": dev_mode_enabled(),
         "qdrant_url": bool(os.getenv("QDRANT_URL")),
         "groq_api_key": bool(os.getenv("GROQ_API_KEY")),
+        "cache_warmup": warmup,
     }
+    if not warmup["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming", "checks": checks})
     return {"status": "ok", "checks": checks}
 
 
@@ -52,14 +77,60 @@ async def _startup_checks():
         if not os.getenv("GROQ_API_KEY"):
             logger.warning("GROQ_API_KEY is not set. LLM streaming will be unavailable.")
 
-    # Quick try-import checks to surface potential install issues early
+    # Quick try-import checks to surface potential install issues early. In
+    # lazy mode only look the packages up: importing qdrant_client alone costs
+    # over a second of cold start, and the SDKs load on first use anyway.
     for pkg in ("sentence_transformers", "qdrant_client", "groq"):
+        if lazy_imports_enabled():
+            if importlib.util.find_spec(pkg) is None:
+                logger.warning("%s is not installed", pkg)
+            else:
+                logger.info("%s found (import deferred)", pkg)
+            continue
         try:
             __import__(pkg)
             logger.info("%s import OK", pkg)
         except Exception as e:
             logger.warning("Unable to import %s: %s", pkg, str(e))
 
+    # Load the in-process vector replica before serving (VECTOR_BACKEND=local)
+    if await warm_local_index():
+        logger.info("Local vector index ready")
+
+    # Connect to (and load replicas of) the tenants listed in TENANT_WARMUP
+    warm = [t.strip() for t in os.getenv("TENANT_WARMUP", "").split(",") if t.strip()]
+    if warm == ["*"]:
+        warm = list(tenant_routes())
+    for tenant in warm:
+        try:
+            info = await warm_route(get_route(tenant))
+            logger.info("Tenant %s warmed in %.0fms", tenant, info["elapsed_ms"])
+        except Exception as e:
+            logger.warning("Tenant %s warmup failed: %s", tenant, e)
+
+    # Load the in-process query encoder once per worker (EMBEDDING_PROVIDER=local)
+    if await warm_embedding_model():
+        logger.info("Local embedding model ready")
+
+    # Sample event-loop lag (LOOP_MONITOR / LOOP_BLOCKING_DETECTOR)
+    if start_loop_monitor():
+        logger.info("Event loop lag monitor started")
+
+    # Keep JWT signing keys fresh so auth never waits on the network
+    if start_jwks_refresh():
+        logger.info("JWKS background refresh started")
+
+    # Pre-embed and pre-fetch the most frequent past queries (WARMUP_QUERY_LOG)
+    if not dev_mode_enabled() and get_cache_warmer().start(answered_without_retrieval, get_warm_retrieval_cache()):
+        logger.info("Cache warmup started")
+
+
+@app.on_event("shutdown")
+async def _shutdown():
+    await get_cache_warmer().stop()
+    await stop_loop_monitor()
+    await stop_jwks_refresh()
+
 
 # @app.post("/api/chat")
 # async def chat(
@@ -227,6 +298,9 @@ class ConversationMetrics:
         self.re_engagement_attempts = 0
         self.context_switches = 0
         self.clarification_requests = 0
+        self.faq_hits = 0
+        self.searches_skipped = 0
+        self.warm_cache_hits = 0
         
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -236,9 +310,17 @@ class ConversationMetrics:
             "avg_user_wait_time": sum(self.user_wait_times) / len(self.user_wait_times) if self.user_wait_times else 0,
             "re_engagement_attempts": self.re_engagement_attempts,
             "context_switches": self.context_switches,
-            "clarification_requests": self.clarification_requests
+            "clarification_requests": self.clarification_requests,
+            "faq_hits": self.faq_hits,
+            "searches_skipped": self.searches_skipped,
+            "warm_cache_hits": self.warm_cache_hits
         }
 
+# Profile fields the engagement rollups are derived from
+_ROLLUP_FIELDS = frozenset(
+    {"last_seen", "total_sessions", "total_messages", "successful_resolutions", "frustration_indicators"}
+)
+
 class UserEngagementProfile:
     """Profile for tracking user behavior and preferences"""
     def __init__(self, user_id: str):
@@ -252,7 +334,19 @@ class UserEngagementProfile:
         self.average_session_length = 0.0
         self.successful_resolutions = 0
         self.frustration_indicators = 0
-        
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # Keep the fleet-wide rollups in step with every counter change
+        if name in _ROLLUP_FIELDS:
+            rollups = self.__dict__.get("_rollups")
+            if rollups is not None:
+                rollups.observe(self)
+
+    def track(self, rollups: EngagementRollups) -> None:
+        object.__setattr__(self, "_rollups", rollups)
+        rollups.observe(self)
+
     def update_visit(self):
         self.last_seen = datetime.utcnow()
         self.total_sessions += 1
@@ -260,8 +354,8 @@ class UserEngagementProfile:
     def is_returning_user(self) -> bool:
         return self.total_sessions > 1
         
-    def calculate_engagement_score(self) -> float:
-        """Calculate overall engagement score (0-100)"""
+    def base_engagement_score(self) -> float:
+        """Engagement score without the recency component (0-70)"""
         score = 0.0
         # Frequency component
         if self.total_sessions > 10:
@@ -270,22 +364,32 @@ class UserEngagementProfile:
             score += 20
         elif self.total_sessions > 1:
             score += 10
-            
-        # Recency component
-        days_since_last = (datetime.utcnow() - self.last_seen).days
-        if days_since_last < 7:
-            score += 30
-        elif days_since_last < 30:
-            score += 20
-        elif days_since_last < 90:
-            score += 10
-            
+
         # Success rate component
         if self.total_messages > 0:
             success_rate = self.successful_resolutions / self.total_messages
             score += success_rate * 40
-            
-        return min(score, 100.0)
+
+        return score
+
+    def calculate_engagement_score(self) -> float:
+        """Calculate overall engagement score (0-100)"""
+        days_since_last = (datetime.utcnow() - self.last_seen).days
+        return min(self.base_engagement_score() + recency_points(days_since_last), 100.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+            "total_sessions": self.total_sessions,
+            "total_messages": self.total_messages,
+            "preferred_response_style": self.preferred_response_style,
+            "topics_of_interest": self.topics_of_interest,
+            "average_session_length": self.average_session_length,
+            "successful_resolutions": self.successful_resolutions,
+            "frustration_indicators": self.frustration_indicators,
+        }
 
 # ============================================================================
 # ENGAGEMENT ENHANCEMENT FUNCTIONS
@@ -367,51 +471,98 @@ def assess_query_clarity(query: str) -> Dict[str, Any]:
     }
     
     # Detect vague queries
-    vague_patterns = ["it", "that", "this", "thing", "stuff"]
-    if any(pattern in query.lower().split() for pattern in vague_patterns) and len(words) < 8:
+    if any(pattern in query.lower().split() for pattern in VAGUE_PATTERNS) and len(words) < 8:
         assessment["needs_clarification"] = True
     
     return assessment
 
-def generate_clarification_prompt(query: str, assessment: Dict[str, Any]) -> Optional[str]:
-    """Generate helpful clarification prompt if needed"""
-    
+VAGUE_PATTERNS = frozenset(["it", "that", "this", "thing", "stuff"])
+
+CLARIFICATION_MESSAGES = {
+    # Use a short, friendly, and non-technical greeting
+    "greeting": "Hello! I'm here to help. What can I help you with today?",
+    # Keep clarification requests simple and user-friendly (avoid technical terms)
+    "vague": (
+        "I'd love to help — could you share a little more detail about what you need? "
+        "A short example or a couple more words would be great."
+    ),
+    # Ask for rephrasing in plain language
+    "rephrase": "Could you say that another way or add one or two details so I can help better?",
+}
+
+def clarification_kind(assessment: Dict[str, Any]) -> Optional[str]:
+    """Key into ``CLARIFICATION_MESSAGES`` for an assessment, if it needs one"""
     if assessment["is_greeting"]:
-        # Use a short, friendly, and non-technical greeting
-        return (
-            "Hello! I'm here to help. What can I help you with today?"
-        )
-    
+        return "greeting"
     if assessment["is_vague"]:
-        # Keep clarification requests simple and user-friendly (avoid technical terms)
-        return (
-            "I'd love to help — could you share a little more detail about what you need? "
-            "A short example or a couple more words would be great."
-        )
-    
+        return "vague"
     if assessment["needs_clarification"]:
-        # Ask for rephrasing in plain language
-        return (
-            "Could you say that another way or add one or two details so I can help better?"
-        )
-    
+        return "rephrase"
     return None
 
+def generate_clarification_prompt(query: str, assessment: Dict[str, Any]) -> Optional[str]:
+    """Generate helpful clarification prompt if needed"""
+    kind = clarification_kind(assessment)
+    return CLARIFICATION_MESSAGES[kind] if kind else None
+
+def clarity_decides(query: str, assessment: Dict[str, Any]) -> bool:
+    """True when the query has nothing to search for: only vague pronouns
+    ("this?", "that thing") or punctuation. The clarification is then the
+    answer on any turn, and embedding and retrieval are skipped. Greetings
+    don't count: later in a conversation they go to the model."""
+    if not (assessment["is_vague"] or assessment["needs_clarification"]):
+        return False
+    return all(word in VAGUE_PATTERNS for word in re.findall(r"\w+", query.lower()))
+
+def _load_metrics(response_words: int, unique_words: int, context_words: int) -> Dict[str, Any]:
+    return {
+        "response_length": response_words,
+        "information_density": unique_words / response_words if response_words else 0,
+        "context_ratio": context_words / max(response_words, 1),
+        "readability": "high" if response_words < 100 else "moderate" if response_words < 250 else "low",
+        "recommended_chunk": response_words > 200
+    }
+
 def calculate_cognitive_load(context: str, response: str) -> Dict[str, Any]:
     """Assess cognitive load of the response"""
     
     response_words = response.split()
     context_words = context.split()
     
-    load_metrics = {
-        "response_length": len(response_words),
-        "information_density": len(set(response_words)) / len(response_words) if response_words else 0,
-        "context_ratio": len(context_words) / max(len(response_words), 1),
-        "readability": "high" if len(response_words) < 100 else "moderate" if len(response_words) < 250 else "low",
-        "recommended_chunk": len(response_words) > 200
-    }
-    
-    return load_metrics
+    return _load_metrics(len(response_words), len(set(response_words)), len(context_words))
+
+class StreamingLoadTracker:
+    """``calculate_cognitive_load`` for a response that arrives token by token.
+
+    Word count and the unique-word set are updated as each token streams, so
+    the final metrics are ready when the stream ends without re-splitting the
+    response. A word split across tokens is held back until whitespace
+    completes it.
+    """
+
+    def __init__(self, context: str):
+        self.context_words = len(context.split())
+        self.response_words = 0
+        self.unique_words = set()
+        self._partial = ""
+
+    def feed(self, text: str) -> None:
+        if not text:
+            return
+        if self._partial:
+            text = self._partial + text
+        words = text.split()
+        self._partial = "" if text[-1].isspace() else words.pop()
+        self.response_words += len(words)
+        self.unique_words.update(words)
+
+    def metrics(self) -> Dict[str, Any]:
+        words = self.response_words
+        unique = len(self.unique_words)
+        if self._partial:
+            words += 1
+            unique += self._partial not in self.unique_words
+        return _load_metrics(words, unique, self.context_words)
 
 def detect_frustration_indicators(query: str, message_count: int) -> bool:
     """Detect signs of user frustration"""
@@ -450,12 +601,17 @@ def generate_recovery_message(frustration_level: str) -> str:
 
 # In-memory storage for demo (replace with persistent storage)
 user_profiles: Dict[str, UserEngagementProfile] = {}
+# Creation order of user_profiles, so export cursors are plain offsets
+user_profile_order: List[str] = []
 conversation_metrics: Dict[str, ConversationMetrics] = {}
 
 def get_user_profile(user_id: str) -> UserEngagementProfile:
     """Get or create user profile"""
     if user_id not in user_profiles:
-        user_profiles[user_id] = UserEngagementProfile(user_id)
+        profile = UserEngagementProfile(user_id)
+        profile.track(get_engagement_rollups())
+        user_profiles[user_id] = profile
+        user_profile_order.append(user_id)
     else:
         user_profiles[user_id].update_visit()
     return user_profiles[user_id]
@@ -470,25 +626,8 @@ def get_conversation_metrics(session_id: str) -> ConversationMetrics:
 # ENHANCED CHAT ENDPOINT
 # ============================================================================
 
-@app.post("/api/chat")
-async def chat(
-    request: Request,
-    user: User = Depends(get_current_user),
-    format: str = Query("stream", description="Response format: 'stream' for SSE or 'json' for JSON"),
-    session_id: Optional[str] = Query(None, description="Session ID for tracking")
-):
-    start_time = time.time()
-    
-    # Generate session ID if not provided
-    if not session_id:
-        session_id = f"{user.id}_{int(time.time())}"
-    
-    # Initialize engagement tracking
-    entry_context = detect_entry_context(request)
-    user_profile = get_user_profile(user.id)
-    conv_metrics = get_conversation_metrics(session_id)
-    
-    # Handle both JSON and form data
+async def read_chat_query(request: Request) -> Optional[str]:
+    """Pull ``query`` out of a JSON, form-encoded or form-wrapped JSON body."""
     content_type = request.headers.get("content-type", "").lower()
     query = None
     
@@ -536,6 +675,153 @@ async def chat(
                     pass
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error parsing request: {str(e)}")
+
+    return query
+
+
+async def retrieve_context(query: str, user_id: str, session_id: str, conv_metrics: ConversationMetrics):
+    """Chunks for ``query`` plus how they were obtained.
+
+    Returns ``(results, prefetched, retrieval_reused, warm_cache_hit)``. Embedding or search
+    failures surface as 503s.
+    """
+    # Results warmed by /api/chat/prefetch while the user was typing
+    prefetched = get_prefetch_cache().take(tenant_scoped(user_id), query)
+    if prefetched is not None:
+        return prefetched.results, prefetched, False, False
+
+    # Popular queries warmed from the query log at startup
+    warm_cache = get_warm_retrieval_cache()
+    if len(warm_cache):
+        results = warm_cache.get(query)
+        if results is not None:
+            conv_metrics.warm_cache_hits += 1
+            return results, None, False, True
+
+    # 1. Embed query
+    try:
+        query_vector = await get_embedding(query)
+    except RuntimeError as e:
+        logger.error("Embedding initialization failed: %s", e)
+        raise HTTPException(status_code=503, detail=str(e))
+
+    # 2. Retrieve context, reusing the session's last chunks for close follow-ups
+    results = get_session_cache().lookup(tenant_scoped(session_id), query_vector) if session_reuse_enabled() else None
+    if results is not None:
+        conv_metrics.searches_skipped += 1
+        return results, None, True, False
+
+    try:
+        results = await search_vectors(query_vector, top_k=5, threshold=0.7)
+    except RuntimeError as e:
+        logger.error("Vector search failed: %s", e)
+        raise HTTPException(status_code=503, detail=str(e))
+    if session_reuse_enabled():
+        get_session_cache().store(tenant_scoped(session_id), query_vector, results)
+    return results, None, False, False
+
+
+def no_results_message(is_frustrated: bool) -> str:
+    """Empathetic fallback when retrieval finds nothing."""
+    fallback_msg = (
+        "I couldn't find specific information about that in my knowledge base. "
+    )
+    
+    if is_frustrated:
+        fallback_msg = generate_recovery_message("moderate") + " " + fallback_msg
+    
+    fallback_msg += (
+        "Could you try rephrasing your question or asking about a related topic? "
+        "I'm here to help!"
+    )
+    return fallback_msg
+
+
+# Same encoding as JSONResponse; one shared encoder, since json.dumps with
+# non-default options builds a new one per call
+_json_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+def answered_without_retrieval(query: str) -> bool:
+    """FAQ hits and contentless queries never reach embedding or search."""
+    return bool(lookup_faq(query)) or clarity_decides(query, assess_query_clarity(query))
+
+def _json_bytes(value: Any) -> bytes:
+    return _json_encoder.encode(value).encode("utf-8")
+
+class CannedReply:
+    """A constant reply, serialized once as its SSE frame and as the head
+    of its JSON body. Only per-request fields are encoded when it is sent."""
+
+    __slots__ = ("text", "sse", "_json_head")
+
+    def __init__(self, text: str, sse_frame: str, **fields):
+        self.text = text
+        self.sse = sse_frame.encode("utf-8")
+        # Body without its closing brace; per-request fields are appended
+        self._json_head = _json_bytes({"response": text, **fields})[:-1]
+
+    def stream_response(self) -> Response:
+        return Response(self.sse, media_type="text/event-stream")
+
+    def json_response(self, **fields) -> Response:
+        parts = [self._json_head]
+        for key, value in fields.items():
+            parts += (b',"', key.encode("utf-8"), b'":', _json_bytes(value))
+        parts.append(b"}")
+        return Response(b"".join(parts), media_type="application/json")
+
+# Greetings and vague queries are a large share of traffic
+CLARIFICATION_REPLIES = {
+    kind: CannedReply(text, f"data: {text}\n\n", needs_clarification=True)
+    for kind, text in CLARIFICATION_MESSAGES.items()
+}
+NO_RESULTS_REPLIES = {
+    frustrated: CannedReply(
+        no_results_message(frustrated),
+        f"data: {json.dumps({'text': no_results_message(frustrated), 'no_results': True})}\n\n",
+        sources=[],
+        no_results=True,
+    )
+    for frustrated in (False, True)
+}
+
+
+def build_answer_prompt(context: str, query: str, is_frustrated: bool, user_profile: UserEngagementProfile) -> str:
+    """LLM prompt with engagement considerations (recovery tone, response style)."""
+    prompt = f"Context:\n{context}\n\n"
+    
+    if is_frustrated:
+        prompt += generate_recovery_message("moderate") + "\n\n"
+    
+    if user_profile.preferred_response_style == "concise":
+        prompt += "Provide a concise, direct answer.\n\n"
+    elif user_profile.preferred_response_style == "detailed":
+        prompt += "Provide a comprehensive, detailed answer.\n\n"
+    
+    prompt += f"Question: {query}\n\nAnswer:"
+    return prompt
+
+
+@app.post("/api/chat")
+async def chat(
+    request: Request,
+    user: User = Depends(get_current_user),
+    format: str = Query("stream", description="Response format: 'stream' for SSE or 'json' for JSON"),
+    session_id: Optional[str] = Query(None, description="Session ID for tracking")
+):
+    start_time = time.time()
+    
+    # Generate session ID if not provided
+    if not session_id:
+        session_id = f"{user.id}_{int(time.time())}"
+    
+    # Initialize engagement tracking
+    entry_context = detect_entry_context(request)
+    user_profile = get_user_profile(user.id)
+    conv_metrics = get_conversation_metrics(session_id)
+    
+    # Handle both JSON and form data
+    query = await read_chat_query(request)
     
     if not query:
         raise HTTPException(status_code=400, detail="Missing 'query' field in request body")
@@ -558,24 +844,51 @@ async def chat(
         conv_metrics.re_engagement_attempts += 1
         user_profile.frustration_indicators += 1
     
-    # Generate clarification if needed
-    clarification = generate_clarification_prompt(query, query_assessment)
-    if clarification and conv_metrics.message_count == 1:
-        # For first unclear message, provide guidance
+    # Generate clarification if needed: for the first unclear message, or
+    # whenever there is nothing to search for
+    clarification = clarification_kind(query_assessment)
+    if clarification and (conv_metrics.message_count == 1 or clarity_decides(query, query_assessment)):
+        reply = CLARIFICATION_REPLIES[clarification]
+        if format.lower() == "json":
+            return reply.json_response(query=query, engagement_metrics=conv_metrics.to_dict())
+        # Plain text in the SSE stream (clients expect the raw message text)
+        return reply.stream_response()
+    
+    # FAQ fast path: known questions skip embedding, retrieval and the LLM
+    faq_match = lookup_faq(query)
+    if faq_match:
+        conv_metrics.faq_hits += 1
+        user_profile.successful_resolutions += 1
+        response_time = time.time() - start_time
+        conv_metrics.total_response_time += response_time
+        answer = faq_match.entry.answer
+
         if format.lower() == "json":
             return JSONResponse(content={
-                "response": clarification,
+                "response": answer,
                 "query": query,
-                "needs_clarification": True,
-                "engagement_metrics": conv_metrics.to_dict()
+                "sources": [{"source": faq_match.entry.source, "score": faq_match.similarity}],
+                "engagement_metrics": conv_metrics.to_dict(),
+                "faq_hit": True,
+                "faq_match": faq_match.to_dict(),
+                "response_time": response_time,
+                "session_id": session_id
             })
-        
-        async def _clarification_stream():
-            # Emit plain text in the SSE stream (clients expect the raw message text)
-            yield f"data: {clarification}\n\n"
-        
-        return StreamingResponse(_clarification_stream(), media_type="text/event-stream")
-    
+
+        async def _faq_stream():
+            yield f"data: {answer}\n\n"
+            final_metrics = {
+                "type": "metrics",
+                "engagement_metrics": conv_metrics.to_dict(),
+                "response_time": response_time,
+                "faq_hit": True,
+                "faq_match": faq_match.to_dict(),
+                "session_id": session_id
+            }
+            yield f"data: {json.dumps(final_metrics)}\n\n"
+
+        return StreamingResponse(_faq_stream(), media_type="text/event-stream")
+
     # Dev mode check
     if dev_mode_enabled():
         async def _canned_gen():
@@ -583,67 +896,24 @@ async def chat(
         return StreamingResponse(_canned_gen(), media_type="text/event-stream")
 
     try:
-        # 1. Embed query
-        try:
-            query_vector = await get_embedding(query)
-        except RuntimeError as e:
-            logger.error("Embedding initialization failed: %s", e)
-            raise HTTPException(status_code=503, detail=str(e))
-
-        # 2. Retrieve context
-        try:
-            results = await search_vectors(query_vector, top_k=5, threshold=0.7)
-        except RuntimeError as e:
-            logger.error("Vector search failed: %s", e)
-            raise HTTPException(status_code=503, detail=str(e))
+        # 1-2. Embed and retrieve (or reuse prefetched / session results)
+        results, prefetched, retrieval_reused, warm_cache_hit = await retrieve_context(
+            query, user.id, session_id, conv_metrics
+        )
 
         # Handle no results with empathetic fallback
         if not results:
             conv_metrics.clarification_requests += 1
-            
-            fallback_msg = (
-                "I couldn't find specific information about that in my knowledge base. "
-            )
-            
-            if is_frustrated:
-                fallback_msg = generate_recovery_message("moderate") + " " + fallback_msg
-            
-            fallback_msg += (
-                "Could you try rephrasing your question or asking about a related topic? "
-                "I'm here to help!"
-            )
-            
+            reply = NO_RESULTS_REPLIES[is_frustrated]
             if format.lower() == "json":
-                return JSONResponse(content={
-                    "response": fallback_msg,
-                    "query": query,
-                    "sources": [],
-                    "engagement_metrics": conv_metrics.to_dict(),
-                    "no_results": True
-                })
-
-            async def _fallback_stream():
-                yield f"data: {json.dumps({'text': fallback_msg, 'no_results': True})}\n\n"
+                return reply.json_response(query=query, engagement_metrics=conv_metrics.to_dict())
+            return reply.stream_response()
 
-            return StreamingResponse(_fallback_stream(), media_type="text/event-stream")
-
-        context = "\n\n".join([r.payload["text"] for r in results])
+        # Merge overlapping chunks and trim to the prompt token budget
+        context, context_stats = pack_context(results)
         
-        # Calculate cognitive load
-        load_metrics = calculate_cognitive_load(context, query)
-
         # 3. Build enhanced prompt with engagement considerations
-        prompt = f"Context:\n{context}\n\n"
-        
-        if is_frustrated:
-            prompt += generate_recovery_message("moderate") + "\n\n"
-        
-        if user_profile.preferred_response_style == "concise":
-            prompt += "Provide a concise, direct answer.\n\n"
-        elif user_profile.preferred_response_style == "detailed":
-            prompt += "Provide a comprehensive, detailed answer.\n\n"
-        
-        prompt += f"Question: {query}\n\nAnswer:"
+        prompt = build_answer_prompt(context, query, is_frustrated, user_profile)
 
         # 4. Track response time
         response_start = time.time()
@@ -652,6 +922,8 @@ async def chat(
         if format.lower() == "json":
             try:
                 response_text = await get_llm_response(prompt)
+                # Cognitive load of the answer, as the streaming paths report it
+                load_metrics = calculate_cognitive_load(context, response_text)
                 
                 response_time = time.time() - response_start
                 conv_metrics.total_response_time += response_time
@@ -671,6 +943,10 @@ async def chat(
                     ],
                     "engagement_metrics": conv_metrics.to_dict(),
                     "cognitive_load": load_metrics,
+                    "context_packing": context_stats,
+                    "prefetch_hit": prefetched is not None,
+                    "retrieval_reused": retrieval_reused,
+                    "warm_cache_hit": warm_cache_hit,
                     "response_time": response_time,
                     "session_id": session_id
                 })
@@ -684,9 +960,12 @@ async def chat(
                     """Stream with engagement tracking"""
                     response_start = time.time()
                     token_count = 0
+                    load_tracker = StreamingLoadTracker(context)
                     
                     async for chunk in stream_llm_response(prompt):
                         token_count += 1
+                        # Frames are "data: <text>\n\n"; track the text itself
+                        load_tracker.feed(chunk[6:-2] if chunk.startswith("data: ") else chunk)
                         yield chunk
                     
                     # Send final engagement metrics
@@ -699,6 +978,11 @@ async def chat(
                         "engagement_metrics": conv_metrics.to_dict(),
                         "response_time": response_time,
                         "tokens_streamed": token_count,
+                        "cognitive_load": load_tracker.metrics(),
+                        "context_packing": context_stats,
+                        "prefetch_hit": prefetched is not None,
+                        "retrieval_reused": retrieval_reused,
+                        "warm_cache_hit": warm_cache_hit,
                         "session_id": session_id
                     }
                     
@@ -717,7 +1001,405 @@ async def chat(
     finally:
         # Log total request time
         total_time = time.time() - start_time
-        logger.info(f"Request completed in {total_time:.2f}s for user {user.id}")
+        logger.info("Request completed in %.2fs for user %s", total_time, user.id)
+
+@app.post("/api/chat/prefetch")
+async def prefetch(
+    request: Request,
+    user: User = Depends(get_current_user),
+):
+    """Warm embedding and retrieval for a debounced, possibly partial query.
+
+    Clients call this while the user types; a following ``/api/chat`` with the
+    same or nearly the same text reuses the results and skips to generation.
+    """
+    try:
+        body = await request.json()
+        query = (body.get("query") or "").strip()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error parsing request: {str(e)}")
+
+    if not query:
+        raise HTTPException(status_code=400, detail="Missing 'query' field in request body")
+
+    cache = get_prefetch_cache()
+    if not get_prefetch_limiter().allow(user.id):
+        cache.stats["rate_limited"] += 1
+        raise HTTPException(status_code=429, detail="Prefetch rate limit exceeded")
+
+    min_chars = int(os.getenv("PREFETCH_MIN_CHARS", "8"))
+    if len(query) < min_chars:
+        return {"status": "skipped", "reason": "too_short"}
+    if dev_mode_enabled():
+        return {"status": "skipped", "reason": "dev_mode"}
+    if lookup_faq(query):
+        return {"status": "skipped", "reason": "faq"}
+    if clarity_decides(query, assess_query_clarity(query)):
+        return {"status": "skipped", "reason": "unclear"}
+
+    started = time.perf_counter()
+    try:
+        query_vector = await get_embedding(query)
+        results = await search_vectors(query_vector, top_k=5, threshold=0.7)
+    except RuntimeError as e:
+        logger.warning("Prefetch failed: %s", e)
+        raise HTTPException(status_code=503, detail=str(e))
+    elapsed = time.perf_counter() - started
+
+    cache.put(tenant_scoped(user.id), PrefetchEntry(query, query_vector, results, elapsed))
+    return {"status": "warmed", "results": len(results), "elapsed_ms": round(elapsed * 1000, 2)}
+
+
+@app.get("/api/chat/prefetch/stats")
+async def prefetch_stats(user: User = Depends(get_current_user)):
+    """Prefetch hit rate and the embed+search latency it saved."""
+    return get_prefetch_cache().snapshot()
+
+@app.get("/api/chat/session-cache/stats")
+async def session_cache_stats(user: User = Depends(get_current_user)):
+    """Searches skipped by per-session retrieval reuse."""
+    return get_session_cache().snapshot()
+
+@app.post("/api/tenants/{tenant}/warmup")
+async def warmup_tenant(tenant: str, user: User = Depends(get_current_user)):
+    """Connect to a tenant's collection and load its replica ahead of traffic.
+
+    Allowed for admins and for members of the tenant (per the token claims).
+    """
+    if not user.is_admin and tenant != user.tenant and tenant not in user.tenants:
+        raise HTTPException(status_code=403, detail="Access denied")
+    try:
+        route = get_route(tenant)
+    except UnknownTenant:
+        raise HTTPException(status_code=404, detail="Unknown tenant")
+    try:
+        return await warm_route(route)
+    except Exception as e:
+        logger.warning("Tenant %s warmup failed: %s", tenant, e)
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.get("/api/metrics/loop-lag")
+async def loop_lag_metrics(user: User = Depends(get_current_user)):
+    """Event-loop lag percentiles and blocking-call count (LOOP_MONITOR)."""
+    return get_loop_monitor().snapshot()
+
+
+@app.post("/api/chat/batch")
+async def chat_batch(
+    request: Request,
+    user: User = Depends(get_current_user),
+):
+    """Answer many queries in one request, streaming NDJSON as each finishes.
+
+    Body: ``{"queries": ["...", {"id": "t-1", "query": "..."}, ...]}``. All
+    queries are embedded in one provider call and searched with one Qdrant
+    batch query; LLM calls then run at most ``BATCH_LLM_CONCURRENCY`` at a
+    time. Each line is ``{"type": "result", "index", "id", "query", ...}``
+    in completion order, followed by a final ``{"type": "summary"}`` line.
+    """
+    try:
+        body = await request.json()
+        raw = body.get("queries")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error parsing request: {str(e)}")
+
+    if not isinstance(raw, list) or not raw:
+        raise HTTPException(status_code=400, detail="Expected a non-empty 'queries' list in request body")
+    max_queries = int(os.getenv("BATCH_MAX_QUERIES", "500"))
+    if len(raw) > max_queries:
+        raise HTTPException(status_code=413, detail=f"At most {max_queries} queries per batch")
+
+    items = []
+    for i, q in enumerate(raw):
+        if isinstance(q, dict):
+            item_id, text = q.get("id", i), q.get("query")
+        else:
+            item_id, text = i, q
+        if not isinstance(text, str) or not text.strip():
+            raise HTTPException(status_code=400, detail=f"Query {i} is missing or empty")
+        items.append({"index": i, "id": item_id, "query": text})
+
+    start_time = time.time()
+
+    if dev_mode_enabled():
+        async def _canned_lines():
+            for item in items:
+                yield json.dumps({"type": "result", **item, "response": "This is a dev environment fallback response."}) + "\n"
+            yield json.dumps({"type": "summary", "count": len(items)}) + "\n"
+        return StreamingResponse(_canned_lines(), media_type="application/x-ndjson")
+
+    # Known FAQs are answered directly, as in /api/chat
+    pending = []
+    answered = []
+    for item in items:
+        faq_match = lookup_faq(item["query"])
+        if faq_match:
+            answered.append({
+                "type": "result", **item,
+                "response": faq_match.entry.answer,
+                "sources": [{"source": faq_match.entry.source, "score": faq_match.similarity}],
+                "faq_hit": True,
+            })
+        else:
+            pending.append(item)
+
+    results_per_query = []
+    if pending:
+        try:
+            vectors = await get_embedding([item["query"] for item in pending])
+        except RuntimeError as e:
+            logger.error("Batch embedding failed: %s", e)
+            raise HTTPException(status_code=503, detail=str(e))
+        try:
+            results_per_query = await search_vectors_batch(vectors, top_k=5, threshold=0.7)
+        except RuntimeError as e:
+            logger.error("Batch vector search failed: %s", e)
+            raise HTTPException(status_code=503, detail=str(e))
+
+    semaphore = asyncio.Semaphore(int(os.getenv("BATCH_LLM_CONCURRENCY", "8")))
+
+    async def _answer(item, results):
+        if not results:
+            return {"type": "result", **item, "response": None, "sources": [], "no_results": True}
+        context, context_stats = pack_context(results)
+        prompt = f"Context:\n{context}\n\nQuestion: {item['query']}\n\nAnswer:"
+        started = time.time()
+        try:
+            async with semaphore:
+                response_text = await get_llm_response(prompt)
+        except Exception as e:
+            logger.warning("Batch item %s failed: %s", item["id"], e)
+            return {"type": "result", **item, "error": str(e)}
+        return {
+            "type": "result", **item,
+            "response": response_text,
+            "sources": [{"source": r.payload.get("source", "unknown"), "score": r.score} for r in results],
+            "context_packing": context_stats,
+            "response_time": time.time() - started,
+        }
+
+    async def _ndjson():
+        errors = 0
+        for line in answered:
+            yield json.dumps(line) + "\n"
+        tasks = [asyncio.ensure_future(_answer(item, results)) for item, results in zip(pending, results_per_query)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                errors += "error" in line
+                yield json.dumps(line) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+        total_time = time.time() - start_time
+        logger.info("Batch of %d completed in %.2fs for user %s", len(items), total_time, user.id)
+        yield json.dumps({
+            "type": "summary",
+            "count": len(items),
+            "faq_hits": len(answered),
+            "errors": errors,
+            "elapsed": total_time,
+        }) + "\n"
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+
+# ============================================================================
+# WEBSOCKET CHAT
+# ============================================================================
+
+async def _ws_send_token(websocket: WebSocket, message_id: Any, text: str, binary: bool) -> None:
+    if binary:
+        await websocket.send_bytes(text.encode("utf-8"))
+    else:
+        await websocket.send_json({"type": "token", "id": message_id, "text": text})
+
+
+async def _ws_send_error(websocket: WebSocket, message_id: Any, status_code: int, detail: str) -> None:
+    try:
+        await websocket.send_json({"type": "error", "id": message_id, "status": status_code, "detail": detail})
+    except Exception:
+        pass  # connection already gone
+
+
+async def _ws_answer(
+    websocket: WebSocket,
+    message_id: Any,
+    query: str,
+    user: User,
+    session_id: str,
+    user_profile: UserEngagementProfile,
+    conv_metrics: ConversationMetrics,
+    binary: bool,
+) -> None:
+    """Answer one message on the connection; same pipeline as /api/chat."""
+    start_time = time.time()
+    tokens_streamed = 0
+    tokens = None
+    done = {"type": "done", "id": message_id, "session_id": session_id}
+    try:
+        conv_metrics.message_count += 1
+        user_profile.total_messages += 1
+
+        query_assessment = assess_query_clarity(query)
+        is_frustrated = detect_frustration_indicators(query, conv_metrics.message_count)
+        if is_frustrated:
+            conv_metrics.re_engagement_attempts += 1
+            user_profile.frustration_indicators += 1
+
+        clarification = generate_clarification_prompt(query, query_assessment)
+        if clarification and (conv_metrics.message_count == 1 or clarity_decides(query, query_assessment)):
+            await _ws_send_token(websocket, message_id, clarification, binary)
+            await websocket.send_json({**done, "needs_clarification": True, "engagement_metrics": conv_metrics.to_dict()})
+            return
+
+        faq_match = lookup_faq(query)
+        if faq_match:
+            conv_metrics.faq_hits += 1
+            user_profile.successful_resolutions += 1
+            response_time = time.time() - start_time
+            conv_metrics.total_response_time += response_time
+            await _ws_send_token(websocket, message_id, faq_match.entry.answer, binary)
+            await websocket.send_json({
+                **done,
+                "engagement_metrics": conv_metrics.to_dict(),
+                "response_time": response_time,
+                "faq_hit": True,
+                "faq_match": faq_match.to_dict(),
+            })
+            return
+
+        if dev_mode_enabled():
+            await _ws_send_token(websocket, message_id, "This is a dev environment fallback response.", binary)
+            await websocket.send_json(done)
+            return
+
+        results, prefetched, retrieval_reused, warm_cache_hit = await retrieve_context(
+            query, user.id, session_id, conv_metrics
+        )
+        if not results:
+            conv_metrics.clarification_requests += 1
+            await _ws_send_token(websocket, message_id, no_results_message(is_frustrated), binary)
+            await websocket.send_json({**done, "no_results": True, "engagement_metrics": conv_metrics.to_dict()})
+            return
+
+        context, context_stats = pack_context(results)
+        prompt = build_answer_prompt(context, query, is_frustrated, user_profile)
+
+        response_start = time.time()
+        load_tracker = StreamingLoadTracker(context)
+        tokens = stream_llm_tokens(prompt)
+        async for token in tokens:
+            tokens_streamed += 1
+            load_tracker.feed(token)
+            await _ws_send_token(websocket, message_id, token, binary)
+
+        response_time = time.time() - response_start
+        conv_metrics.total_response_time += response_time
+        user_profile.successful_resolutions += 1
+        await websocket.send_json({
+            **done,
+            "engagement_metrics": conv_metrics.to_dict(),
+            "response_time": response_time,
+            "tokens_streamed": tokens_streamed,
+            "cognitive_load": load_tracker.metrics(),
+            "sources": [{"source": r.payload.get("source", "unknown"), "score": r.score} for r in results],
+            "context_packing": context_stats,
+            "prefetch_hit": prefetched is not None,
+            "retrieval_reused": retrieval_reused,
+            "warm_cache_hit": warm_cache_hit,
+        })
+    except asyncio.CancelledError:
+        if tokens is not None:
+            # Close the upstream LLM stream now rather than at garbage collection
+            await tokens.aclose()
+        try:
+            await websocket.send_json({"type": "cancelled", "id": message_id, "tokens_streamed": tokens_streamed})
+        except Exception:
+            pass
+        raise
+    except HTTPException as e:
+        await _ws_send_error(websocket, message_id, e.status_code, str(e.detail))
+    except RuntimeError as e:
+        logger.error("LLM initialization failed: %s", e)
+        await _ws_send_error(websocket, message_id, 503, str(e))
+    except Exception as e:
+        logger.exception("Unhandled exception in /api/chat/ws: %s", e)
+        await _ws_send_error(websocket, message_id, 500, str(e))
+    finally:
+        logger.info("WebSocket answer finished in %.2fs for user %s", time.time() - start_time, user.id)
+
+
+@app.websocket("/api/chat/ws")
+async def chat_ws(
+    websocket: WebSocket,
+    user: User = Depends(get_current_user_ws),
+    session_id: Optional[str] = Query(None, description="Session ID for tracking"),
+    frames: str = Query("text", description="Token frames: 'text' for JSON or 'binary' for raw UTF-8"),
+):
+    """Chat over one connection: authenticate once, keep session state, stream tokens.
+
+    Client messages are JSON text frames:
+      {"type": "chat", "query": "...", "id": <optional>}
+      {"type": "cancel"}   stop the answer in progress
+      {"type": "ping"}
+    The server sends "ready" on connect; each answer is a run of "token" frames
+    (raw UTF-8 binary frames with ``frames=binary``) closed by "done",
+    "cancelled" or "error". One answer runs at a time per connection.
+    """
+    await websocket.accept()
+
+    # Per-connection state: looked up once instead of on every message
+    if not session_id:
+        session_id = f"{user.id}_{int(time.time())}"
+    user_profile = get_user_profile(user.id)
+    conv_metrics = get_conversation_metrics(session_id)
+    binary = frames.lower() == "binary"
+    await websocket.send_json({"type": "ready", "session_id": session_id, "frames": "binary" if binary else "text"})
+
+    answer: Optional[asyncio.Task] = None
+    turns = 0
+    try:
+        while True:
+            received = await websocket.receive()
+            if received["type"] == "websocket.disconnect":
+                break
+            raw = received.get("text")
+            if raw is None:
+                raw = (received.get("bytes") or b"").decode("utf-8", "replace")
+            try:
+                message = json.loads(raw)
+                kind = message.get("type", "chat")
+            except (ValueError, AttributeError):
+                await _ws_send_error(websocket, None, 400, "Messages must be JSON objects")
+                continue
+
+            busy = answer is not None and not answer.done()
+            if kind == "cancel":
+                if busy:
+                    answer.cancel()
+            elif kind == "ping":
+                await websocket.send_json({"type": "pong"})
+            elif kind == "chat":
+                turns += 1
+                message_id = message.get("id", turns)
+                query = (message.get("query") or "").strip()
+                if not query:
+                    await _ws_send_error(websocket, message_id, 400, "Missing 'query' field in message")
+                elif busy:
+                    await _ws_send_error(websocket, message_id, 409, "An answer is already in progress; cancel it first")
+                else:
+                    answer = asyncio.create_task(_ws_answer(
+                        websocket, message_id, query, user, session_id, user_profile, conv_metrics, binary
+                    ))
+            else:
+                await _ws_send_error(websocket, message.get("id"), 400, f"Unknown message type: {kind}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if answer is not None:
+            answer.cancel()
+            await asyncio.gather(answer, return_exceptions=True)
+
 
 # ============================================================================
 # ANALYTICS ENDPOINTS
@@ -747,6 +1429,47 @@ async def get_user_engagement(
         "last_seen": profile.last_seen.isoformat()
     }
 
+@app.get("/api/engagement/summary")
+async def get_engagement_summary(user: User = Depends(get_current_user)):
+    """Fleet-wide engagement rollups (admins only): active users by day, score
+    distribution, success and frustration rates. Maintained as profiles
+    change, so this never scans ``user_profiles``."""
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return get_engagement_rollups().snapshot()
+
+@app.get("/api/engagement/profiles/export")
+async def export_user_profiles(
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    user: User = Depends(get_current_user)
+):
+    """Stream raw user profiles as NDJSON for offline analysis (admins only).
+
+    Profiles are paged in creation order: each line is
+    ``{"type": "profile", ...}``, followed by a final
+    ``{"type": "page", "count", "next_cursor"}`` line. Pass ``next_cursor``
+    back as ``cursor`` until it is null.
+    """
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    page = user_profile_order[cursor:cursor + limit]
+    end = cursor + len(page)
+    next_cursor = end if end < len(user_profile_order) else None
+
+    async def _ndjson():
+        lines = []
+        for user_id in page:
+            lines.append(json.dumps({"type": "profile", **user_profiles[user_id].to_dict()}) + "\n")
+            if len(lines) == 100:
+                yield "".join(lines)
+                lines = []
+        lines.append(json.dumps({"type": "page", "count": len(page), "next_cursor": next_cursor}) + "\n")
+        yield "".join(lines)
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+
 @app.get("/api/engagement/session/{session_id}")
 async def get_session_metrics(
     session_id: str,
@@ -1,39 +1,349 @@
 # api/middleware/auth.py
-from fastapi import HTTPException, Depends
+"""Bearer-token authentication for the API.
+
+Tokens are Supabase-issued JWTs verified locally, without a network call
+per request:
+
+* ``SUPABASE_JWT_SECRET``  HS256 project secret, and/or
+* ``AUTH_JWKS_URL``        asymmetric signing keys (defaults to the project's
+                           ``/auth/v1/.well-known/jwks.json`` when
+                           ``SUPABASE_URL`` is set). The key set is fetched in
+                           the background every ``AUTH_JWKS_REFRESH_SECONDS``
+                           and re-fetched early when a token names an unknown
+                           ``kid`` (key rotation).
+
+Claims of verified tokens are cached by token hash until the token's
+``exp`` (at most ``AUTH_CLAIMS_CACHE_SIZE`` entries, LRU), so repeat
+requests skip signature verification entirely.
+
+With neither configured, any token is accepted and a mock user returned
+(development only).
+
+Users listed in ``ADMIN_USER_IDS`` (comma separated) get ``is_admin``.
+
+The request's tenant (``app_metadata.tenant`` claim, or a tenant header the
+claims allow via ``app_metadata.tenants``) is resolved here and bound for the
+rest of the request; see ``api/services/tenants.py``.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Depends, Request, WebSocket, WebSocketException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
+from starlette.requests import HTTPConnection
 from api.models import User
+from api.services.tenants import UnknownTenant, bind_tenant, resolve_tenant, tenant_header
+
+logger = logging.getLogger(__name__)
 
 # Set auto_error=False to allow requests without auth header (for development)
 security = HTTPBearer(auto_error=False)
 
+DEFAULT_JWKS_REFRESH_SECONDS = 600.0
+DEFAULT_CLAIMS_CACHE_SIZE = 10000
+# Lower bound between on-demand JWKS fetches triggered by unknown key ids
+MIN_JWKS_REFETCH_SECONDS = 30.0
+
+
+def _unauthorized(detail: str = "Invalid authentication credentials") -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+class _UnknownKey(Exception):
+    pass
+
+
+class TokenVerifier:
+    """Verifies JWTs locally and caches the claims of valid tokens until ``exp``."""
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        audience: Optional[str] = None,
+        issuer: Optional[str] = None,
+        cache_size: int = DEFAULT_CLAIMS_CACHE_SIZE,
+    ):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.issuer = issuer
+        self.cache_size = cache_size
+        self._keys: Dict[str, Any] = {}
+        self._keys_fetched = float("-inf")
+        self._claims: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "rejected": 0, "jwks_refreshes": 0}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.secret or self.jwks_url)
+
+    def load_jwks(self, jwks: Dict[str, Any]) -> int:
+        """Install a JWKS document's signing keys; returns how many were usable."""
+        import jwt
+
+        keys = {}
+        for jwk in jwt.PyJWKSet.from_dict(jwks).keys:
+            keys[jwk.key_id] = jwk
+        with self._lock:
+            self._keys = keys
+            self._keys_fetched = time.monotonic()
+        return len(keys)
+
+    def _fetch_jwks(self) -> Dict[str, Any]:
+        from urllib.request import urlopen
+
+        with urlopen(self.jwks_url, timeout=5) as resp:
+            return json.load(resp)
+
+    def refresh_jwks(self) -> int:
+        """Fetch and install the signing keys (blocking)."""
+        try:
+            count = self.load_jwks(self._fetch_jwks())
+        finally:
+            # Failed fetches count too, so a JWKS outage can't be hammered
+            self._keys_fetched = time.monotonic()
+        self.stats["jwks_refreshes"] += 1
+        return count
+
+    def _signing_key(self, token: str) -> Tuple[Any, List[str]]:
+        import jwt
+
+        header = jwt.get_unverified_header(token)
+        alg = header.get("alg")
+        if alg == "HS256":
+            if not self.secret:
+                raise jwt.InvalidTokenError("HS256 tokens are not accepted")
+            return self.secret, ["HS256"]
+        jwk = self._keys.get(header.get("kid"))
+        if jwk is None:
+            raise _UnknownKey(header.get("kid"))
+        return jwk.key, [jwk.algorithm_name]
+
+    def _decode(self, token: str) -> Dict[str, Any]:
+        import jwt
+
+        key, algorithms = self._signing_key(token)
+        return jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=self.audience,
+            issuer=self.issuer,
+            options={"require": ["exp", "sub"], "verify_aud": self.audience is not None},
+        )
+
+    def _cached(self, digest: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._claims.get(digest)
+            if entry is None:
+                return None
+            claims, exp = entry
+            if time.time() >= exp:
+                del self._claims[digest]
+                return None
+            self._claims.move_to_end(digest)
+            return claims
+
+    def _store(self, digest: bytes, claims: Dict[str, Any]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._claims[digest] = (claims, float(claims["exp"]))
+            self._claims.move_to_end(digest)
+            while len(self._claims) > self.cache_size:
+                self._claims.popitem(last=False)
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a valid token; raises a 401 ``HTTPException`` otherwise."""
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self._cached(digest)
+        if claims is not None:
+            self.stats["hits"] += 1
+            return claims
+        self.stats["misses"] += 1
+
+        import jwt
+
+        try:
+            try:
+                claims = self._decode(token)
+            except _UnknownKey:
+                # Possibly a rotated key: re-fetch once, rate limited
+                if not self.jwks_url or time.monotonic() - self._keys_fetched < MIN_JWKS_REFETCH_SECONDS:
+                    raise jwt.InvalidTokenError("unknown signing key")
+                try:
+                    await asyncio.to_thread(self.refresh_jwks)
+                except Exception as e:
+                    logger.warning("JWKS refresh failed: %s", e)
+                claims = self._decode(token)
+        except jwt.ExpiredSignatureError:
+            self.stats["rejected"] += 1
+            raise _unauthorized("Token expired")
+        except (jwt.InvalidTokenError, _UnknownKey) as e:
+            self.stats["rejected"] += 1
+            logger.info("Rejected token: %s", e)
+            raise _unauthorized()
+
+        self._store(digest, claims)
+        return claims
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update(cached_tokens=len(self._claims), signing_keys=len(self._keys))
+        return stats
+
+
+_verifier: Optional[TokenVerifier] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def _jwks_url() -> Optional[str]:
+    if os.getenv("AUTH_JWKS_URL"):
+        return os.getenv("AUTH_JWKS_URL")
+    supabase_url = os.getenv("SUPABASE_URL")
+    if supabase_url:
+        return supabase_url.rstrip("/") + "/auth/v1/.well-known/jwks.json"
+    return None
+
+
+def get_token_verifier() -> TokenVerifier:
+    global _verifier
+    if _verifier is None:
+        _verifier = TokenVerifier(
+            secret=os.getenv("SUPABASE_JWT_SECRET") or None,
+            jwks_url=_jwks_url(),
+            audience=os.getenv("AUTH_JWT_AUDIENCE", "authenticated") or None,
+            issuer=os.getenv("AUTH_JWT_ISSUER") or None,
+            cache_size=int(os.getenv("AUTH_CLAIMS_CACHE_SIZE", DEFAULT_CLAIMS_CACHE_SIZE)),
+        )
+    return _verifier
+
+
+async def _refresh_loop(verifier: TokenVerifier, interval: float) -> None:
+    while True:
+        try:
+            count = await asyncio.to_thread(verifier.refresh_jwks)
+            logger.info("Loaded %d JWT signing keys", count)
+        except Exception as e:
+            logger.warning("JWKS refresh failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+def start_jwks_refresh() -> bool:
+    """Keep the signing keys fresh in the background when a JWKS URL is configured."""
+    global _refresh_task
+    verifier = get_token_verifier()
+    if not verifier.jwks_url:
+        return False
+    if _refresh_task is None or _refresh_task.done():
+        interval = float(os.getenv("AUTH_JWKS_REFRESH_SECONDS", DEFAULT_JWKS_REFRESH_SECONDS))
+        _refresh_task = asyncio.get_running_loop().create_task(_refresh_loop(verifier, interval), name="jwks-refresh")
+    return True
+
+
+async def stop_jwks_refresh() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+
+def _is_admin(user_id: str) -> bool:
+    admins = os.getenv("ADMIN_USER_IDS", "")
+    return user_id in {u.strip() for u in admins.split(",") if u.strip()}
+
+
+def _user(
+    user_id: str, email: Optional[str], tenant: Optional[str] = None, tenants: Optional[List[str]] = None
+) -> User:
+    return User(id=user_id, email=email, is_admin=_is_admin(user_id), tenant=tenant, tenants=tenants or [])
+
 
 async def get_current_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    request: Request = None,
 ) -> User:
     """
     Extract and validate user from JWT token.
-    For development: accepts any token or no token (returns mock user).
-    For production: replace with actual Supabase/JWT validation.
+    With SUPABASE_JWT_SECRET or a JWKS configured the token is verified locally
+    (cached per token until it expires). Otherwise, for development, any token
+    or no token is accepted and a mock user returned.
     """
-    # For development: if no auth provided, return mock user
-    # TODO: Remove this in production and require valid authentication!
+    user = await _authenticate(credentials)
+    if request is not None:
+        _bind_tenant(user, request)
+    return user
+
+
+async def _authenticate(credentials: Optional[HTTPAuthorizationCredentials]) -> User:
+    verifier = get_token_verifier()
+    if not verifier.configured:
+        # For development: if no auth provided, return mock user
+        if credentials is None:
+            return _user("dev_user", "dev@example.com")
+        return _user("user_123", "user@example.com")
+
     if credentials is None:
-        return User(id="dev_user", email="dev@example.com")
-    
-    token = credentials.credentials
-    
-    # TODO: Validate token with Supabase
-    # For now, accept any token and return a mock user
-    # In production, decode and validate the JWT token here:
-    # from supabase import create_client, Client
-    # supabase: Client = create_client(url, key)
-    # user = supabase.auth.get_user(token)
-    
+        raise _unauthorized("Not authenticated")
+
+    claims = await verifier.verify(credentials.credentials)
+    app_metadata = claims.get("app_metadata") or {}
+    tenants = app_metadata.get("tenants")
+    return _user(
+        claims["sub"],
+        claims.get("email"),
+        app_metadata.get("tenant"),
+        [t for t in tenants if isinstance(t, str)] if isinstance(tenants, list) else None,
+    )
+
+
+def _bind_tenant(user: User, connection: HTTPConnection) -> None:
+    """Resolve and bind the tenant whose knowledge base this request searches."""
+    requested = connection.headers.get(tenant_header()) or connection.query_params.get("tenant")
     try:
-        # Placeholder: Accept any token for development
-        # Replace with actual validation in production
-        return User(id="user_123", email="user@example.com")
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        tenant = resolve_tenant(
+            getattr(user, "tenant", None),
+            requested,
+            allowed=getattr(user, "tenants", ()),
+            # Without verified tokens there are no claims to check against
+            trust_requested=not get_token_verifier().configured,
+        )
+    except UnknownTenant as e:
+        raise HTTPException(status_code=400, detail=f"Unknown tenant: {e.args[0]}")
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Access denied for tenant")
+    bind_tenant(tenant)
 
+
+async def get_current_user_ws(websocket: WebSocket) -> User:
+    """
+    Authenticate a WebSocket handshake once for the whole connection.
+    Browsers cannot set headers on WebSocket requests, so the bearer token may
+    also be passed as ``?token=``. Rejected handshakes close with 1008.
+    """
+    token = websocket.query_params.get("token")
+    scheme, _, value = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and value:
+        token = value
+
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token) if token else None
+    try:
+        user = await get_current_user(credentials)
+        _bind_tenant(user, websocket)
+        return user
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
@@ -1,4 +1,6 @@
 # api/models.py
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 
@@ -8,5 +10,10 @@ class ChatRequest(BaseModel):
 
 class User(BaseModel):
     id: str
-    email: str = None
+    email: Optional[str] = None
+    is_admin: bool = False
+    # Tenant membership from the token claims; the tenant a request searches
+    # is bound per request (api/services/tenants.py), not stored here.
+    tenant: Optional[str] = None
+    tenants: List[str] = []
 
@@ -0,0 +1,145 @@
+# api/services/context.py
+"""Prompt context packing.
+
+``scripts/ingest.py`` chunks documents with a 50-word overlap, so neighbouring
+hits from the same source repeat text. ``pack_context`` stitches overlapping
+chunks back together, orders the resulting blocks by score and trims them to
+a token budget before they are sent to the LLM.
+"""
+import os
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+DEFAULT_TOKEN_BUDGET = 1500
+# Chunks overlap by 50 words; look a little further in case chunk sizes change.
+MAX_OVERLAP_WORDS = 100
+MIN_OVERLAP_WORDS = 8
+# Don't bother appending a truncated tail shorter than this.
+MIN_TAIL_TOKENS = 32
+
+_encoding = None
+_FALLBACK_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def _get_encoding():
+    """Load a local BPE tokenizer once; None if tiktoken isn't installed."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with a local tokenizer.
+
+    Uses tiktoken's ``cl100k_base`` (close to Llama 3's BPE) when available,
+    otherwise a word/punctuation split, which tracks BPE counts for English
+    support text closely enough for budgeting.
+    """
+    enc = _get_encoding()
+    if enc is not None:
+        return len(enc.encode(text))
+    return len(_FALLBACK_TOKEN_RE.findall(text))
+
+
+def token_budget() -> int:
+    return int(os.getenv("CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+
+def _overlap(a: List[str], b: List[str]) -> int:
+    """Length of the longest suffix of ``a`` that is a prefix of ``b``."""
+    for k in range(min(len(a), len(b), MAX_OVERLAP_WORDS), MIN_OVERLAP_WORDS - 1, -1):
+        if a[-k:] == b[:k]:
+            return k
+    return 0
+
+
+def _merge_source(blocks: List[Tuple[float, List[str]]]) -> List[Tuple[float, List[str]]]:
+    """Merge blocks from one source that overlap or duplicate each other."""
+    merged = True
+    while merged and len(blocks) > 1:
+        merged = False
+        for i in range(len(blocks)):
+            for j in range(len(blocks)):
+                if i == j:
+                    continue
+                (sa, a), (sb, b) = blocks[i], blocks[j]
+                joined = None
+                if len(b) <= len(a) and f" {' '.join(b)} " in f" {' '.join(a)} ":
+                    joined = a
+                else:
+                    k = _overlap(a, b)
+                    if k:
+                        joined = a + b[k:]
+                if joined is not None:
+                    blocks[i] = (max(sa, sb), joined)
+                    del blocks[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return blocks
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut ``text`` at a word boundary so it fits in ``max_tokens``."""
+    words = text.split()
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(" ".join(words[:mid])) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo])
+
+
+def pack_context(results: Sequence[Any], budget: int | None = None) -> Tuple[str, Dict[str, Any]]:
+    """Build the prompt context from retrieved points.
+
+    Returns the packed context string and stats comparing it with the naive
+    ``"\\n\\n".join`` of every hit, including ``prompt_tokens_saved``.
+    """
+    budget = token_budget() if budget is None else budget
+    texts = [r.payload["text"] for r in results]
+    raw_tokens = count_tokens("\n\n".join(texts))
+
+    by_source: Dict[str, List[Tuple[float, List[str]]]] = {}
+    for r in results:
+        source = r.payload.get("source", "unknown")
+        by_source.setdefault(source, []).append((r.score, r.payload["text"].split()))
+
+    blocks = [b for group in by_source.values() for b in _merge_source(group)]
+    blocks.sort(key=lambda b: b[0], reverse=True)
+
+    parts: List[str] = []
+    used = 0
+    sep_tokens = count_tokens("\n\n")
+    for _, words in blocks:
+        text = " ".join(words)
+        cost = count_tokens(text) + (sep_tokens if parts else 0)
+        if used + cost <= budget:
+            parts.append(text)
+            used += cost
+            continue
+        remaining = budget - used - (sep_tokens if parts else 0)
+        # Always keep something from the best block, even on a tiny budget.
+        if remaining >= MIN_TAIL_TOKENS or not parts:
+            parts.append(_truncate(text, remaining))
+        break
+
+    context = "\n\n".join(parts)
+    packed_tokens = count_tokens(context)
+    return context, {
+        "chunks_retrieved": len(texts),
+        "blocks_used": len(parts),
+        "context_tokens_raw": raw_tokens,
+        "context_tokens_packed": packed_tokens,
+        "prompt_tokens_saved": max(raw_tokens - packed_tokens, 0),
+        "token_budget": budget,
+    }
@@ -4,16 +4,81 @@ This module used to depend on SentenceTransformers (heavy, requires torch).
 To keep the runtime lightweight (suitable for Vercel), we use an external
 embedding provider (OpenAI) by default. For tests the module-level `_model`
 can still be monkeypatched with a fake object that implements `.encode(...)`.
+
+`EMBEDDING_PROVIDER=local` instead runs an ONNX export of the ingest model
+in-process on CPU (onnxruntime + tokenizers only, no torch).
 """
 
 import asyncio
+import base64
+import logging
 import os
-import requests
+import threading
+from collections import OrderedDict
 from typing import List
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
 _model = None
 
+# LRU of single-string embeddings, warmed by /api/chat/prefetch. Entries
+# belong to the model that produced them and are dropped when it changes.
+DEFAULT_EMBEDDING_CACHE_SIZE = 1024
+_cache: "OrderedDict[str, Any]" = OrderedDict()
+_cache_owner = None
+_cache_lock = threading.Lock()
+
+
+def _cache_size() -> int:
+    return int(os.getenv("EMBEDDING_CACHE_SIZE", DEFAULT_EMBEDDING_CACHE_SIZE))
+
+
+def _cache_get(text: str):
+    global _cache_owner
+    with _cache_lock:
+        if _cache_owner is not _model:
+            _cache.clear()
+            _cache_owner = _model
+            return None
+        vec = _cache.get(text)
+        if vec is not None:
+            _cache.move_to_end(text)
+        return vec
+
+
+def _cache_put(text: str, vec) -> None:
+    size = _cache_size()
+    if size <= 0:
+        return
+    with _cache_lock:
+        if _cache_owner is not _model:
+            return
+        _cache[text] = vec
+        _cache.move_to_end(text)
+        while len(_cache) > size:
+            _cache.popitem(last=False)
+
+
+def _encoding_format() -> str:
+    """Wire format requested from the provider: ``base64`` (default) or ``float``.
+
+    base64 vectors are decoded with ``numpy.frombuffer`` straight into float32
+    arrays instead of parsing thousands of JSON floats into Python objects.
+    ``float`` keeps the old behaviour of returning plain lists.
+    """
+    return os.getenv("EMBEDDING_ENCODING_FORMAT", "base64").lower()
+
+
+def _decode_embedding(value: Any):
+    """float32 array for a base64 string; anything else is returned unchanged."""
+    if isinstance(value, str):
+        import numpy as np
+
+        return np.frombuffer(base64.b64decode(value), dtype="<f4")
+    return value
+
+
 class _OpenAIWrapper:
     """Minimal wrapper for OpenAI embeddings."""
 
@@ -23,7 +88,7 @@ class _OpenAIWrapper:
             raise RuntimeError("Environment variable OPENAI_API_KEY must be set")
         
         self._model = model_name or os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
-        self._base_url = "https://api.openai.com/v1/embeddings"
+        self._base_url = os.getenv("OPENAI_EMBEDDINGS_URL") or "https://api.openai.com/v1/embeddings"
 
     def encode(self, x: Any) -> List[float] | List[List[float]]:
         # Handle single string vs. list of strings
@@ -37,18 +102,22 @@ class _OpenAIWrapper:
             "model": self._model,
             "input": texts
         }
+        if _encoding_format() == "base64":
+            payload["encoding_format"] = "base64"
 
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self._api_key}"
         }
 
+        import requests  # deferred: ~50 ms of cold-start import, only needed per request
+
         response = requests.post(self._base_url, json=payload, headers=headers)
         response.raise_for_status()
         
         # Extract embeddings from response
         data = response.json().get("data", [])
-        embeddings = [item["embedding"] for item in data]
+        embeddings = [_decode_embedding(item["embedding"]) for item in data]
         
         if is_single:
             return embeddings[0]
@@ -80,12 +149,16 @@ class _GroqWrapper:
             "input": texts,
             "type": "query"  # Adjust based on Groq's payload requirements
         }
+        if _encoding_format() == "base64":
+            payload["encoding_format"] = "base64"
 
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self._api_key}"
         }
 
+        import requests
+
         response = requests.post(self._base_url, json=payload, headers=headers)
         response.raise_for_status()
         
@@ -97,15 +170,15 @@ class _GroqWrapper:
         for item in data:
             if isinstance(item, dict):
                 v = item.get("embedding") or item.get("vector") or item.get("embeddings")
-                if isinstance(v, list):
-                    embeddings.append(v)
+                if isinstance(v, (list, str)):
+                    embeddings.append(_decode_embedding(v))
                 else:
                     # If the dict itself looks like an embedding list, try flatten
                     possible = [val for val in item.values() if isinstance(val, list)]
                     if possible:
                         embeddings.append(possible[0])
-            elif isinstance(item, list):
-                embeddings.append(item)
+            elif isinstance(item, (list, str)):
+                embeddings.append(_decode_embedding(item))
             else:
                 # Unknown shape, skip
                 continue
@@ -115,15 +188,123 @@ class _GroqWrapper:
         return embeddings
 
 
+class _LocalWrapper:
+    """In-process CPU encoder for the model ``scripts/ingest.py`` indexes with.
+
+    Runs an ONNX export of all-MiniLM-L6-v2 (see
+    ``scripts/export_local_embedder.py``) under ONNX Runtime: tokenize,
+    mean-pool the last hidden state over the attention mask, L2-normalize.
+    That is the same pipeline SentenceTransformers applies at ingest time, so
+    query and document vectors share one 384-d space and no request leaves
+    the process.
+    """
+
+    # Preferred file names inside LOCAL_EMBEDDING_MODEL_DIR, int8 first.
+    MODEL_FILES = ("model_int8.onnx", "model.onnx")
+
+    def __init__(self, model_dir: str | None = None):
+        model_dir = model_dir or os.getenv("LOCAL_EMBEDDING_MODEL_DIR")
+        if not model_dir:
+            raise RuntimeError(
+                "Environment variable LOCAL_EMBEDDING_MODEL_DIR must be set for EMBEDDING_PROVIDER=local"
+            )
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError("EMBEDDING_PROVIDER=local requires onnxruntime and tokenizers: " + str(e))
+
+        model_file = os.getenv("LOCAL_EMBEDDING_MODEL_FILE")
+        candidates = [model_file] if model_file else self.MODEL_FILES
+        paths = [os.path.join(model_dir, name) for name in candidates]
+        model_path = next((p for p in paths if os.path.exists(p)), None)
+        if model_path is None:
+            raise RuntimeError(f"No ONNX model found in {model_dir} (looked for {', '.join(candidates)})")
+
+        options = ort.SessionOptions()
+        threads = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self.model_path = model_path
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=int(os.getenv("LOCAL_EMBEDDING_MAX_LENGTH", "256")))
+        self._tokenizer.enable_padding()
+
+    def encode(self, x: Any):
+        import numpy as np
+
+        is_single = isinstance(x, str)
+        texts = [x] if is_single else list(x)
+        if not texts:
+            return []
+
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self._session.run(None, feeds)[0]
+
+        if hidden.ndim == 3:
+            weights = mask[:, :, None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        else:
+            pooled = hidden
+        pooled = pooled.astype(np.float32, copy=False)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+        if is_single:
+            return pooled[0]
+        return list(pooled)
+
+
 def _init_model():
-    """Use either OpenAI or Groq based on EMBEDDING_PROVIDER."""
-    provider = os.getenv("EMBEDDING_PROVIDER").lower()
+    """Use OpenAI, Groq or the in-process encoder based on EMBEDDING_PROVIDER."""
+    provider = (os.getenv("EMBEDDING_PROVIDER") or "").lower()
     if provider == "groq":
         return _GroqWrapper()
+    elif provider == "local":
+        return _LocalWrapper()
     else:
         return _OpenAIWrapper()
 
 
+async def warm_embedding_model() -> bool:
+    """Load the in-process encoder at startup so no request pays for it.
+
+    Only ``EMBEDDING_PROVIDER=local`` has anything worth loading; remote
+    providers are cheap to construct. Returns False if loading failed.
+    """
+    global _model
+    if _model is not None or (os.getenv("EMBEDDING_PROVIDER") or "").lower() != "local":
+        return False
+    try:
+        _model = await asyncio.to_thread(_init_model)
+        return True
+    except RuntimeError as e:
+        logger.warning("Local embedding model unavailable: %s", e)
+        return False
+
+
+def cache_embeddings(texts: List[str], vectors) -> None:
+    """Seed the LRU with vectors from a batch call, as if each text had been
+    embedded on its own (used by deploy-time warmup). Vectors are stored as
+    the provider returned them, like ``get_embedding`` does."""
+    global _cache_owner
+    if _cache_size() <= 0:
+        return
+    with _cache_lock:
+        if _cache_owner is not _model:
+            _cache.clear()
+            _cache_owner = _model
+    for text, vec in zip(texts, vectors):
+        _cache_put(text, vec)
+
+
 async def get_embedding(text: str | list[str]):
     """Return embedding(s) for a string or list of strings.
 
@@ -136,8 +317,16 @@ async def get_embedding(text: str | list[str]):
     if _model is None:
         _model = _init_model()
 
+    cacheable = isinstance(text, str) and _cache_size() > 0
+    if cacheable:
+        cached = _cache_get(text)
+        if cached is not None:
+            return cached
+
     try:
         embedding = await asyncio.to_thread(_model.encode, text)
+        if cacheable:
+            _cache_put(text, embedding)
         return embedding
     except Exception as e:
         raise RuntimeError("Failed to generate embedding: " + str(e))
@@ -0,0 +1,147 @@
+# api/services/engagement_rollups.py
+"""Fleet-wide engagement rollups, maintained incrementally.
+
+Each tracked profile change is applied as a delta, so ``snapshot()`` costs
+the same for ten users or ten million:
+
+* totals: users, messages, successful resolutions and frustration signals
+  (hence success and frustration rates)
+* distinct active users per day, for the last ``ACTIVE_DAYS_KEPT`` days
+* engagement score distribution in 10-point buckets
+
+The score's recency component depends on today's date as well as the
+profile. Profiles are therefore counted by (last-seen day, bucket of the
+score without recency). Recency points are whole multiples of 10, so
+shifting each day's buckets by that day's recency gives the current
+distribution. Days are counted as calendar days, so a profile can land
+one bucket off near a 7/30/90-day boundary. Days beyond the recency
+horizon are folded into one group, which bounds the scan at about 90
+days x 8 buckets.
+
+Profiles are duck-typed: ``user_id``, ``last_seen`` (datetime),
+``total_messages``, ``successful_resolutions``, ``frustration_indicators``
+and ``base_engagement_score()``.
+"""
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+ACTIVE_DAYS_KEPT = 30
+RECENCY_HORIZON_DAYS = 90
+SCORE_BUCKETS = 10  # 0-9, 10-19, ..., 90-100
+_STALE = date.min  # group for profiles last seen beyond the recency horizon
+
+
+def recency_points(days_since_last_seen: int) -> int:
+    """Recency component of the engagement score."""
+    if days_since_last_seen < 7:
+        return 30
+    if days_since_last_seen < 30:
+        return 20
+    if days_since_last_seen < RECENCY_HORIZON_DAYS:
+        return 10
+    return 0
+
+
+def _bucket_label(i: int) -> str:
+    return f"{i * 10}-{i * 10 + 9}" if i < SCORE_BUCKETS - 1 else f"{i * 10}-100"
+
+
+class EngagementRollups:
+    """Counters kept in step with every tracked profile."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.users = 0
+        self.messages = 0
+        self.resolutions = 0
+        self.frustration = 0
+        self._active_by_day: Dict[date, int] = {}
+        self._score_groups: Dict[date, List[int]] = {}
+        # user_id -> (messages, resolutions, frustration, active_day, score_day, base_bucket)
+        self._seen: Dict[str, Tuple[int, int, int, date, date, int]] = {}
+
+    def observe(self, profile) -> None:
+        """Fold the profile's current state into the rollups (O(1))."""
+        day = profile.last_seen.date()
+        base_bucket = min(int(profile.base_engagement_score() // 10), SCORE_BUCKETS - 1)
+        state = (
+            profile.total_messages,
+            profile.successful_resolutions,
+            profile.frustration_indicators,
+            day,
+            day,
+            base_bucket,
+        )
+        with self._lock:
+            old = self._seen.get(profile.user_id)
+            if old == state:
+                return
+            self._seen[profile.user_id] = state
+            if old is None:
+                self.users += 1
+                old_messages = old_resolutions = old_frustration = 0
+                old_day = None
+            else:
+                old_messages, old_resolutions, old_frustration, old_day, old_score_day, old_bucket = old
+                group = self._score_groups.get(old_score_day)
+                if group is None:  # folded into the stale group since
+                    group = self._score_groups[_STALE]
+                group[old_bucket] -= 1
+
+            self.messages += state[0] - old_messages
+            self.resolutions += state[1] - old_resolutions
+            self.frustration += state[2] - old_frustration
+
+            if day != old_day:
+                self._active_by_day[day] = self._active_by_day.get(day, 0) + 1
+            self._score_groups.setdefault(day, [0] * SCORE_BUCKETS)[base_bucket] += 1
+
+    def _compact(self, today: date) -> None:
+        """Fold score groups past the recency horizon and drop old active days."""
+        horizon = today - timedelta(days=RECENCY_HORIZON_DAYS)
+        for day in [d for d in self._score_groups if d != _STALE and d <= horizon]:
+            group = self._score_groups.pop(day)
+            stale = self._score_groups.setdefault(_STALE, [0] * SCORE_BUCKETS)
+            for i, n in enumerate(group):
+                stale[i] += n
+            # Profiles still recorded under the folded day are decremented
+            # from the stale group by observe()
+        cutoff = today - timedelta(days=ACTIVE_DAYS_KEPT)
+        for day in [d for d in self._active_by_day if d <= cutoff]:
+            del self._active_by_day[day]
+
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        now = now or datetime.utcnow()
+        today = now.date()
+        with self._lock:
+            self._compact(today)
+            distribution = [0] * SCORE_BUCKETS
+            for day, group in self._score_groups.items():
+                shift = 0 if day == _STALE else recency_points((today - day).days) // 10
+                for i, n in enumerate(group):
+                    if n:
+                        distribution[min(i + shift, SCORE_BUCKETS - 1)] += n
+            active = {d.isoformat(): n for d, n in sorted(self._active_by_day.items(), reverse=True)}
+            messages = self.messages
+            return {
+                "users": self.users,
+                "messages": messages,
+                "successful_resolutions": self.resolutions,
+                "frustration_indicators": self.frustration,
+                "success_rate": self.resolutions / max(messages, 1),
+                "frustration_rate": self.frustration / max(messages, 1),
+                "active_users_by_day": active,
+                "score_distribution": {_bucket_label(i): n for i, n in enumerate(distribution)},
+                "generated_at": now.isoformat(),
+            }
+
+
+_rollups: Optional[EngagementRollups] = None
+
+
+def get_engagement_rollups() -> EngagementRollups:
+    global _rollups
+    if _rollups is None:
+        _rollups = EngagementRollups()
+    return _rollups
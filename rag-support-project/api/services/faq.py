@@ -0,0 +1,201 @@
+# api/services/faq.py
+"""Exact/near-exact FAQ answers that bypass embedding, retrieval and the LLM.
+
+The index is built once per process from the ``Q:``/``A:`` pairs in
+``data/`` plus, optionally, a JSONL file of past answers that scored as
+high-confidence (``FAQ_HISTORY_PATH``; one ``{"query", "response",
+"confidence"}`` object per line). Lookups are keyed by normalized query text,
+so "what are your business hours" and "What are your business hours?" hit the
+same entry.
+
+``FAQ_FUZZY_MATCH`` (off by default) adds a token-set fallback so "What are
+the business hours?" matches too. It only accepts entries that cover every
+content word of the query: an extra word ("...expedited shipping...",
+"...on weekends?") usually changes the question, and a canned answer to a
+different question is worse than a retrieval round trip.
+
+The index answers from the default knowledge base only, so it is skipped
+for requests bound to a tenant (see :mod:`api.services.tenants`); their
+questions always go through their own collection.
+"""
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from api.services.tenants import current_tenant
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+DEFAULT_MATCH_THRESHOLD = 0.85
+DEFAULT_HISTORY_MIN_CONFIDENCE = 0.9
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Function words carry no intent; dropping them lets phrasing vary.
+_STOPWORDS = frozenset(
+    "a an the is are was were be do does did i me my you your we our us it its "
+    "to of in on for at by with and or can could would should will how what "
+    "when where which who there this that please".split()
+)
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def content_tokens(text: str) -> Set[str]:
+    return {w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS}
+
+
+class FAQEntry:
+    __slots__ = ("question", "answer", "source", "tokens")
+
+    def __init__(self, question: str, answer: str, source: str):
+        self.question = question
+        self.answer = answer
+        self.source = source
+        self.tokens = frozenset(content_tokens(question))
+
+
+class FAQMatch:
+    __slots__ = ("entry", "similarity", "exact")
+
+    def __init__(self, entry: FAQEntry, similarity: float, exact: bool):
+        self.entry = entry
+        self.similarity = similarity
+        self.exact = exact
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "question": self.entry.question,
+            "source": self.entry.source,
+            "similarity": round(self.similarity, 3),
+            "exact": self.exact,
+        }
+
+
+class FAQIndex:
+    """Normalized-text dict plus an inverted token index for fuzzy lookups."""
+
+    def __init__(self, threshold: float = DEFAULT_MATCH_THRESHOLD, fuzzy: bool = False):
+        self.threshold = threshold
+        self.fuzzy = fuzzy
+        self._exact: Dict[str, FAQEntry] = {}
+        self._entries: List[FAQEntry] = []
+        self._postings: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, question: str, answer: str, source: str) -> None:
+        key = normalize(question)
+        if not key or key in self._exact:
+            return
+        entry = FAQEntry(question, answer, source)
+        self._exact[key] = entry
+        idx = len(self._entries)
+        self._entries.append(entry)
+        for token in entry.tokens:
+            self._postings.setdefault(token, []).append(idx)
+
+    def lookup(self, query: str) -> Optional[FAQMatch]:
+        entry = self._exact.get(normalize(query))
+        if entry is not None:
+            return FAQMatch(entry, 1.0, exact=True)
+        if not self.fuzzy:
+            return None
+
+        tokens = content_tokens(query)
+        # Two content words minimum: one shared keyword is not an intent match.
+        if len(tokens) < 2:
+            return None
+        candidates: Set[int] = set()
+        for token in tokens:
+            candidates.update(self._postings.get(token, ()))
+        best: Optional[FAQMatch] = None
+        for idx in candidates:
+            entry = self._entries[idx]
+            if not tokens <= entry.tokens:
+                continue
+            # Dice coefficient over content-token sets
+            similarity = 2 * len(tokens & entry.tokens) / (len(tokens) + len(entry.tokens))
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = FAQMatch(entry, similarity, exact=False)
+        return best
+
+
+def load_qa_pairs(path: Path):
+    """Yield ``(question, answer)`` pairs from a ``Q:``/``A:`` formatted file."""
+    question = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("Q:"):
+                question = line[2:].strip()
+            elif line.startswith("A:") and question:
+                yield question, line[2:].strip()
+                question = None
+
+
+def build_faq_index(
+    data_dir: Optional[Path] = None,
+    history_path: Optional[str] = None,
+    threshold: Optional[float] = None,
+    min_confidence: Optional[float] = None,
+    fuzzy: Optional[bool] = None,
+) -> FAQIndex:
+    data_dir = Path(data_dir or os.getenv("FAQ_DATA_DIR") or DEFAULT_DATA_DIR)
+    history_path = history_path or os.getenv("FAQ_HISTORY_PATH")
+    threshold = threshold if threshold is not None else float(
+        os.getenv("FAQ_MATCH_THRESHOLD", DEFAULT_MATCH_THRESHOLD)
+    )
+    min_confidence = min_confidence if min_confidence is not None else float(
+        os.getenv("FAQ_HISTORY_MIN_CONFIDENCE", DEFAULT_HISTORY_MIN_CONFIDENCE)
+    )
+
+    if fuzzy is None:
+        fuzzy = os.getenv("FAQ_FUZZY_MATCH", "false").lower() in ("1", "true", "yes")
+
+    index = FAQIndex(threshold=threshold, fuzzy=fuzzy)
+    if data_dir.is_dir():
+        for path in sorted(data_dir.iterdir()):
+            if path.is_file():
+                for question, answer in load_qa_pairs(path):
+                    index.add(question, answer, path.name)
+
+    if history_path and os.path.exists(history_path):
+        with open(history_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                if float(item.get("confidence", 0)) >= min_confidence and item.get("response"):
+                    index.add(item["query"], item["response"], "history")
+
+    logger.info("FAQ index built with %d entries", len(index))
+    return index
+
+
+_faq_index: Optional[FAQIndex] = None
+
+
+def get_faq_index() -> FAQIndex:
+    global _faq_index
+    if _faq_index is None:
+        _faq_index = build_faq_index()
+    return _faq_index
+
+
+def faq_enabled() -> bool:
+    return os.getenv("FAQ_FAST_PATH", "true").lower() in ("1", "true", "yes")
+
+
+def lookup_faq(query: str) -> Optional[FAQMatch]:
+    """Return a confident FAQ match for ``query``, or None."""
+    if not faq_enabled() or current_tenant() is not None:
+        return None
+    return get_faq_index().lookup(query)
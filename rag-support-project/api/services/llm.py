@@ -40,11 +40,15 @@ async def _call_with_rate_limit_retry(
     base_delay: float = 1.0,
     **kwargs: Any,
 ) -> Any:
-    """Call a synchronous LLM client function with exponential backoff on rate limits."""
+    """Call a synchronous LLM client function with exponential backoff on rate limits.
+
+    The call runs in a worker thread so a slow completion never blocks the
+    event loop, and concurrent callers (e.g. /api/chat/batch) overlap.
+    """
     delay = base_delay
     for attempt in range(1, max_retries + 1):
         try:
-            return fn(*args, **kwargs)
+            return await asyncio.to_thread(fn, *args, **kwargs)
         except Exception as e:
             # Heuristic detection of rate limit errors (works for OpenAI-like / Groq-style APIs)
             status_code = getattr(e, "status_code", None)
@@ -78,7 +82,8 @@ async def _call_with_rate_limit_retry(
             delay *= 2
 
 
-async def stream_llm_response(prompt) -> AsyncGenerator[str, None]:
+async def stream_llm_tokens(prompt) -> AsyncGenerator[str, None]:
+    """Stream the answer as raw text deltas (no transport framing)."""
     client = _get_client()
 
     def _create_stream():
@@ -91,9 +96,19 @@ async def stream_llm_response(prompt) -> AsyncGenerator[str, None]:
 
     stream = await _call_with_rate_limit_retry(_create_stream)
 
-    for chunk in stream:
-        if chunk.choices[0].delta.content:
-            yield f"data: {chunk.choices[0].delta.content}\n\n"
+    try:
+        for chunk in stream:
+            if chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # Release the upstream completion if the consumer stops early
+        stream.close()
+
+
+async def stream_llm_response(prompt) -> AsyncGenerator[str, None]:
+    """Stream the answer as SSE ``data:`` frames."""
+    async for token in stream_llm_tokens(prompt):
+        yield f"data: {token}\n\n"
 
 
 async def get_llm_response(prompt) -> str:
@@ -0,0 +1,221 @@
+# api/services/local_index.py
+"""In-process replica of the support_docs collection.
+
+The knowledge base is small enough to keep every vector in one contiguous
+float32 matrix (or a FAISS flat index when faiss is installed), which turns a
+network round-trip into a sub-millisecond dot product. Qdrant stays the
+source of truth: the replica records the collection's version and reloads
+itself in the background when ``scripts/ingest.py`` publishes a new one.
+
+Enable with ``VECTOR_BACKEND=local``. Tenants routed to other collections
+(see ``api/services/tenants.py``) get replicas of their own, at most
+``TENANT_REPLICA_CACHE_SIZE`` at a time, least recently used evicted.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_SECONDS = 60.0
+DEFAULT_TENANT_REPLICAS = 4
+
+
+class LocalPoint:
+    """Search hit with the same attributes chat() reads from a Qdrant ScoredPoint."""
+
+    __slots__ = ("id", "score", "payload")
+
+    def __init__(self, id: Any, score: float, payload: Dict[str, Any]):
+        self.id = id
+        self.score = score
+        self.payload = payload
+
+    def __repr__(self) -> str:
+        return f"LocalPoint(id={self.id!r}, score={self.score:.4f})"
+
+
+def local_index_enabled() -> bool:
+    return os.getenv("VECTOR_BACKEND", "qdrant").lower() == "local"
+
+
+def collection_version(client, collection_name: str) -> Tuple[Any, ...]:
+    """Cheap identity of the collection behind ``collection_name``.
+
+    Combines the ``index_version`` that ingest stamps into the collection
+    metadata with the point count, so both blue/green swaps and incremental
+    updates are noticed.
+    """
+    info = client.get_collection(collection_name)
+    metadata = getattr(info.config, "metadata", None) or {}
+    return (metadata.get("index_version"), info.points_count)
+
+
+class LocalIndex:
+    """Snapshot of every vector and payload in a collection."""
+
+    def __init__(self, refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.version: Optional[Tuple[Any, ...]] = None
+        self._ids: List[Any] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._matrix = None
+        self._faiss = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._matrix is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def load(self, client, collection_name: str, page_size: int = 1024, shard_key: Optional[str] = None) -> None:
+        """Pull all points from Qdrant and swap in a fresh snapshot."""
+        import numpy as np
+
+        version = collection_version(client, collection_name)
+        ids: List[Any] = []
+        payloads: List[Dict[str, Any]] = []
+        vectors: List[List[float]] = []
+        offset = None
+        extra = {"shard_key_selector": shard_key} if shard_key is not None else {}
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+                **extra,
+            )
+            for p in points:
+                ids.append(p.id)
+                payloads.append(p.payload or {})
+                vectors.append(p.vector)
+            if offset is None:
+                break
+
+        if not vectors:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        else:
+            matrix = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+        # Cosine collections already store unit vectors; normalise anyway so
+        # scores match Qdrant whatever produced the points.
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+
+        faiss_index = None
+        try:
+            import faiss
+
+            faiss_index = faiss.IndexFlatIP(matrix.shape[1])
+            faiss_index.add(matrix)
+        except ImportError:
+            pass
+
+        with self._lock:
+            self._ids, self._payloads = ids, payloads
+            self._matrix, self._faiss = matrix, faiss_index
+            self.version = version
+            self._checked_at = time.monotonic()
+        logger.info("Local index loaded %d vectors from %s (version %s)", len(ids), collection_name, version)
+
+    def check_due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.refresh_seconds
+
+    def mark_checked(self) -> None:
+        self._checked_at = time.monotonic()
+
+    def refresh_if_stale(self, client, collection_name: str, shard_key: Optional[str] = None) -> bool:
+        """Reload when Qdrant reports a different version; return True if reloaded."""
+        self.mark_checked()
+        if collection_version(client, collection_name) == self.version:
+            return False
+        self.load(client, collection_name, shard_key=shard_key)
+        return True
+
+    def schedule_refresh(self, client, collection_name: str, shard_key: Optional[str] = None) -> None:
+        """Kick off a background version check if the last one is old enough.
+
+        Searches keep using the current snapshot while the check runs.
+        """
+        if not self.check_due():
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self.mark_checked()
+
+        async def _refresh():
+            try:
+                await asyncio.to_thread(self.refresh_if_stale, client, collection_name, shard_key)
+            except Exception as e:
+                logger.warning("Local index refresh failed; keeping current snapshot: %s", e)
+
+        self._refresh_task = asyncio.get_running_loop().create_task(_refresh())
+
+    def search(self, query_vector, limit: int) -> List[LocalPoint]:
+        """Top ``limit`` points by cosine similarity, best first."""
+        import numpy as np
+
+        with self._lock:
+            matrix, faiss_index = self._matrix, self._faiss
+            ids, payloads = self._ids, self._payloads
+        if matrix is None or not len(ids):
+            return []
+
+        q = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        norm = float(np.linalg.norm(q))
+        if norm:
+            q = q / norm
+        k = min(limit, len(ids))
+        if faiss_index is not None:
+            scores, idx = faiss_index.search(q, k)
+            order = zip(idx[0].tolist(), scores[0].tolist())
+        else:
+            sims = matrix @ q[0]
+            top = np.argpartition(-sims, k - 1)[:k] if k < len(ids) else np.arange(len(ids))
+            top = top[np.argsort(-sims[top], kind="stable")]
+            order = ((int(i), float(sims[i])) for i in top)
+        return [LocalPoint(ids[i], score, payloads[i]) for i, score in order]
+
+
+_local_index: Optional[LocalIndex] = None
+_tenant_indexes: "OrderedDict[str, LocalIndex]" = OrderedDict()
+_tenant_lock = threading.Lock()
+
+
+def _new_index() -> LocalIndex:
+    return LocalIndex(refresh_seconds=float(os.getenv("LOCAL_INDEX_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS)))
+
+
+def get_local_index(key: Optional[str] = None) -> LocalIndex:
+    """Replica of the default collection, or of a tenant route's ``key``."""
+    global _local_index
+    if key is None:
+        if _local_index is None:
+            _local_index = _new_index()
+        return _local_index
+
+    with _tenant_lock:
+        index = _tenant_indexes.get(key)
+        if index is None:
+            index = _tenant_indexes[key] = _new_index()
+        _tenant_indexes.move_to_end(key)
+        limit = int(os.getenv("TENANT_REPLICA_CACHE_SIZE", DEFAULT_TENANT_REPLICAS))
+        while len(_tenant_indexes) > max(limit, 1):
+            evicted, _ = _tenant_indexes.popitem(last=False)
+            logger.info("Evicted local replica %s", evicted)
+    return index
+
+
+def loaded_replicas() -> List[str]:
+    with _tenant_lock:
+        return [key for key, index in _tenant_indexes.items() if index.loaded]
+
@@ -0,0 +1,190 @@
+# api/services/log_pipeline.py
+"""Non-blocking, sampled, structured logging.
+
+``configure_logging()`` replaces ``logging.basicConfig``. It installs a
+single ``QueueHandler`` on the root logger, so a log call on the event
+loop only appends the record to an in-memory queue. A background
+``QueueListener`` thread then formats the records and writes them to
+stderr. On that path:
+
+* Messages are formatted lazily. Records are enqueued with their ``msg`` and
+  ``args`` untouched, and ``%``-interpolation and tracebacks are rendered on the
+  listener thread. (The stdlib ``QueueHandler`` formats on the calling thread
+  so records can be pickled, which an in-process queue does not need.) Pass
+  values, not objects that are mutated right after the call.
+* The queue is bounded (``LOG_QUEUE_SIZE``). When the writer falls behind,
+  records are dropped and counted rather than blocking the caller.
+* ``LOG_SAMPLING`` keeps a fraction of INFO-and-below records per logger,
+  e.g. ``api.services.vector_store=0.1,api.main=0.5``. A setting for a
+  logger also applies to its children. WARNING and above are never sampled.
+* ``LOG_FORMAT=json`` (default) writes one JSON object per line: ``ts``,
+  ``level``, ``logger``, ``msg``, ``exc`` when there is one, plus any
+  ``extra=`` fields. ``LOG_FORMAT=text`` keeps the classic format.
+
+``LOG_LEVEL`` sets the root level (default INFO). ``LOG_QUEUE=false`` writes
+synchronously, e.g. when debugging the logging itself.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+DEFAULT_QUEUE_SIZE = 10000
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """``"a.b=0.1,c=0.5"`` -> ``{"a.b": 0.1, "c": 0.5}``; bad entries are skipped."""
+    rates = {}
+    for part in spec.split(","):
+        name, _, rate = part.partition("=")
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            continue
+    rates.pop("", None)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a per-logger fraction of INFO-and-below records."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+        self.sampled_out: Dict[str, int] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate, prefix = 1.0, name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out[record.name] = self.sampled_out.get(record.name, 0) + 1
+        return False
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records unformatted and drops them when the queue is full."""
+
+    def __init__(self, q: "queue.Queue"):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Root handler setup plus its background listener."""
+
+    def __init__(self, fmt: str = "json", queue_size: int = DEFAULT_QUEUE_SIZE,
+                 sampling: Optional[Dict[str, float]] = None, use_queue: bool = True, stream=None):
+        self.output = logging.StreamHandler(stream)
+        self.output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+        self.sampler = SamplingFilter(sampling or {})
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        if use_queue:
+            self.handler: logging.Handler = LazyQueueHandler(queue.Queue(maxsize=queue_size))
+            self.listener = logging.handlers.QueueListener(self.handler.queue, self.output)
+        else:
+            self.handler = self.output
+        self.handler.addFilter(self.sampler)
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self) -> None:
+        with self._lock:
+            if self.listener is not None and not self._running:
+                self.listener.start()
+                self._running = True
+
+    def stop(self) -> None:
+        """Flush queued records and stop the listener thread."""
+        with self._lock:
+            if self._running:
+                self.listener.stop()
+                self._running = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "queued": self.handler.queue.qsize() if self.listener else 0,
+            "dropped": getattr(self.handler, "dropped", 0),
+            "sampled_out": dict(self.sampler.sampled_out),
+        }
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def get_log_pipeline() -> Optional[LogPipeline]:
+    return _pipeline
+
+
+def configure_logging() -> LogPipeline:
+    """Install the pipeline on the root logger once per process."""
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+    _pipeline = LogPipeline(
+        fmt=os.getenv("LOG_FORMAT", "json").lower(),
+        queue_size=int(os.getenv("LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+        sampling=parse_sampling(os.getenv("LOG_SAMPLING", "")),
+        use_queue=os.getenv("LOG_QUEUE", "true").lower() in ("1", "true", "yes"),
+    )
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root.addHandler(_pipeline.handler)
+    _pipeline.start()
+    atexit.register(_pipeline.stop)
+    return _pipeline
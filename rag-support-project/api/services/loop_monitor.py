@@ -0,0 +1,213 @@
+# api/services/loop_monitor.py
+"""Event-loop lag monitoring and blocking-call detection (opt-in).
+
+``LOOP_MONITOR=true`` starts a task that sleeps ``LOOP_MONITOR_INTERVAL_MS``
+at a time and records how late each wake-up is. That delay is the time
+other callbacks held the loop, so its p50/p95/p99 over the last
+``LOOP_LAG_WINDOW`` samples show whether request handlers are blocking.
+The percentiles are served by ``GET /api/metrics/loop-lag`` and logged
+every ``LOOP_LAG_LOG_SECONDS``.
+
+``LOOP_BLOCKING_DETECTOR=true`` also starts a watchdog thread. When the
+monitor has not woken for ``LOOP_BLOCKING_THRESHOLD_MS`` past its interval,
+the loop is stuck in one callback. The watchdog then logs the loop
+thread's current stack, which names the coroutine making the blocking call.
+Each stall is logged once.
+"""
+import asyncio
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_MS = 100.0
+DEFAULT_WINDOW = 3000
+DEFAULT_BLOCKING_THRESHOLD_MS = 100.0
+DEFAULT_LOG_SECONDS = 60.0
+
+
+def _flag(name: str) -> bool:
+    return os.getenv(name, "false").lower() in ("1", "true", "yes")
+
+
+def loop_monitor_enabled() -> bool:
+    return _flag("LOOP_MONITOR") or blocking_detector_enabled()
+
+
+def blocking_detector_enabled() -> bool:
+    return _flag("LOOP_BLOCKING_DETECTOR")
+
+
+def _percentile(ordered, pct: float) -> float:
+    if not ordered:
+        return 0.0
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def _callback_stack(frame) -> traceback.StackSummary:
+    """Stack of the loop thread from the running callback down (server and
+    event-loop frames above it are dropped)."""
+    stack = traceback.extract_stack(frame)
+    for i in range(len(stack) - 2, -1, -1):
+        entry = stack[i]
+        if entry.name == "_run" and entry.filename.endswith(os.path.join("asyncio", "events.py")):
+            return traceback.StackSummary.from_list(stack[i + 1:])
+    return stack
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag and, optionally, reports what blocked it."""
+
+    def __init__(
+        self,
+        interval_ms: float = DEFAULT_INTERVAL_MS,
+        window: int = DEFAULT_WINDOW,
+        blocking_threshold_ms: Optional[float] = None,
+        log_seconds: float = DEFAULT_LOG_SECONDS,
+    ):
+        self.interval = interval_ms / 1000.0
+        self.blocking_threshold = blocking_threshold_ms / 1000.0 if blocking_threshold_ms else None
+        self.log_seconds = log_seconds
+        self._lags: "deque[float]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self.stats = {"samples": 0, "max_lag_ms": 0.0, "blocking_events": 0, "last_blocking": None}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start sampling on the running loop (and the watchdog, if configured)."""
+        if self.running:
+            return
+        self._stopped.clear()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._sample(), name="loop-lag-monitor")
+        if self.blocking_threshold:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-blocking-detector", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    def record(self, lag: float) -> None:
+        with self._lock:
+            self._lags.append(lag)
+            self.stats["samples"] += 1
+            self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag * 1000.0)
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_log = loop.time()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self._heartbeat = time.monotonic()
+            self.record(max(0.0, now - expected))
+            if self.log_seconds and now - last_log >= self.log_seconds:
+                last_log = now
+                snap = self.snapshot()
+                logger.info(
+                    "Event loop lag p50=%.1fms p95=%.1fms p99=%.1fms max=%.1fms blocking_events=%d",
+                    snap["p50_ms"], snap["p95_ms"], snap["p99_ms"], snap["window_max_ms"], snap["blocking_events"],
+                )
+
+    def _watch(self) -> None:
+        # Runs in its own thread: the loop can't report on itself while blocked.
+        limit = self.interval + self.blocking_threshold
+        reported = None
+        while not self._stopped.wait(self.blocking_threshold / 4):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat
+            if stalled < limit or heartbeat == reported:
+                continue
+            reported = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = _callback_stack(frame)
+            culprit = stack[-1]
+            with self._lock:
+                self.stats["blocking_events"] += 1
+                self.stats["last_blocking"] = {
+                    "stalled_ms": round(stalled * 1000.0, 1),
+                    "location": f"{culprit.filename}:{culprit.lineno} in {culprit.name}",
+                }
+            logger.warning(
+                "Event loop blocked for %.0fms (threshold %.0fms); loop thread stack:\n%s",
+                stalled * 1000.0,
+                self.blocking_threshold * 1000.0,
+                "".join(traceback.format_list(stack)),
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self._lags)
+            stats = dict(self.stats)
+        stats.update(
+            running=self.running,
+            interval_ms=self.interval * 1000.0,
+            blocking_threshold_ms=self.blocking_threshold * 1000.0 if self.blocking_threshold else None,
+            window=len(ordered),
+            p50_ms=_percentile(ordered, 50) * 1000.0,
+            p95_ms=_percentile(ordered, 95) * 1000.0,
+            p99_ms=_percentile(ordered, 99) * 1000.0,
+            window_max_ms=(ordered[-1] if ordered else 0.0) * 1000.0,
+        )
+        return stats
+
+
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_loop_monitor() -> LoopLagMonitor:
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopLagMonitor(
+            interval_ms=float(os.getenv("LOOP_MONITOR_INTERVAL_MS", DEFAULT_INTERVAL_MS)),
+            window=int(os.getenv("LOOP_LAG_WINDOW", DEFAULT_WINDOW)),
+            blocking_threshold_ms=(
+                float(os.getenv("LOOP_BLOCKING_THRESHOLD_MS", DEFAULT_BLOCKING_THRESHOLD_MS))
+                if blocking_detector_enabled() else None
+            ),
+            log_seconds=float(os.getenv("LOOP_LAG_LOG_SECONDS", DEFAULT_LOG_SECONDS)),
+        )
+    return _monitor
+
+
+def start_loop_monitor() -> bool:
+    """Start the monitor on the running loop when enabled; returns whether it runs."""
+    if not loop_monitor_enabled():
+        return False
+    get_loop_monitor().start()
+    return True
+
+
+async def stop_loop_monitor() -> None:
+    if _monitor is not None:
+        await _monitor.stop()
@@ -0,0 +1,179 @@
+# api/services/prefetch.py
+"""Speculative retrieval for queries the user is still typing.
+
+``/api/chat/prefetch`` embeds and searches a debounced partial query and
+parks the results here, per user, for a short TTL. When ``/api/chat``
+arrives with the same (or nearly the same) text, ``chat()`` takes the
+parked results and goes straight to generation.
+
+Both the cache and the rate limiter keep state per user; each holds at most
+``PREFETCH_MAX_USERS`` users and forgets the least recently active one, so
+users who prefetch but never send the message cannot grow memory unbounded.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, FrozenSet, List, Optional
+
+from api.services.faq import normalize
+
+DEFAULT_TTL_SECONDS = 60.0
+DEFAULT_SIMILARITY = 0.9
+DEFAULT_PER_USER = 5
+DEFAULT_RATE_PER_SECOND = 2.0
+DEFAULT_BURST = 5
+DEFAULT_MAX_USERS = 10000
+
+
+class RateLimiter:
+    """Per-key token bucket: ``rate`` tokens per second, up to ``burst``.
+
+    Only the ``max_keys`` most recently seen keys are tracked; a forgotten
+    key starts again with a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = DEFAULT_MAX_USERS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            allowed = tokens >= 1.0
+            self._buckets[key] = [tokens - 1.0 if allowed else tokens, now]
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class PrefetchEntry:
+    __slots__ = ("key", "words", "vector", "results", "cost_seconds", "created")
+
+    def __init__(self, query: str, vector: Any, results: List[Any], cost_seconds: float):
+        self.key = normalize(query)
+        self.words: FrozenSet[str] = frozenset(self.key.split())
+        self.vector = vector
+        self.results = results
+        self.cost_seconds = cost_seconds
+        self.created = time.monotonic()
+
+
+class PrefetchCache:
+    """Last few prefetched queries per user, with hit/miss accounting."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        similarity: float = DEFAULT_SIMILARITY,
+        per_user: int = DEFAULT_PER_USER,
+        max_users: int = DEFAULT_MAX_USERS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.per_user = per_user
+        self.max_users = max_users
+        self._entries: "OrderedDict[str, Deque[PrefetchEntry]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "prefetches": 0,
+            "evicted_users": 0,
+            "rate_limited": 0,
+            "hits": 0,
+            "misses": 0,
+            "latency_saved_seconds": 0.0,
+        }
+
+    def put(self, user_id: str, entry: PrefetchEntry) -> None:
+        with self._lock:
+            entries = self._entries.setdefault(user_id, deque(maxlen=self.per_user))
+            # A newer prefetch of the same text replaces the old one.
+            for old in list(entries):
+                if old.key == entry.key:
+                    entries.remove(old)
+            entries.append(entry)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self.stats["evicted_users"] += 1
+            self.stats["prefetches"] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def take(self, user_id: str, query: str) -> Optional[PrefetchEntry]:
+        """Return (and consume) the best fresh prefetch matching ``query``."""
+        key = normalize(query)
+        words = frozenset(key.split())
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries.get(user_id)
+            best, best_sim = None, 0.0
+            if entries:
+                for entry in list(entries):
+                    if now - entry.created > self.ttl_seconds:
+                        entries.remove(entry)
+                        continue
+                    if entry.key == key:
+                        sim = 1.0
+                    elif words and entry.words:
+                        sim = 2 * len(words & entry.words) / (len(words) + len(entry.words))
+                    else:
+                        sim = 0.0
+                    if sim >= self.similarity and sim > best_sim:
+                        best, best_sim = entry, sim
+                if best is not None:
+                    entries.remove(best)
+                if not entries:
+                    self._entries.pop(user_id, None)
+            if best is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self.stats["latency_saved_seconds"] += best.cost_seconds
+            return best
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["avg_latency_saved_ms"] = (
+            1000.0 * stats["latency_saved_seconds"] / stats["hits"] if stats["hits"] else 0.0
+        )
+        return stats
+
+
+_cache: Optional[PrefetchCache] = None
+_limiter: Optional[RateLimiter] = None
+
+
+def get_prefetch_cache() -> PrefetchCache:
+    global _cache
+    if _cache is None:
+        _cache = PrefetchCache(
+            ttl_seconds=float(os.getenv("PREFETCH_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            similarity=float(os.getenv("PREFETCH_SIMILARITY", DEFAULT_SIMILARITY)),
+            max_users=int(os.getenv("PREFETCH_MAX_USERS", DEFAULT_MAX_USERS)),
+        )
+    return _cache
+
+
+def get_prefetch_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter(
+            rate=float(os.getenv("PREFETCH_RATE_PER_SECOND", DEFAULT_RATE_PER_SECOND)),
+            burst=int(os.getenv("PREFETCH_BURST", DEFAULT_BURST)),
+            max_keys=int(os.getenv("PREFETCH_MAX_USERS", DEFAULT_MAX_USERS)),
+        )
+    return _limiter
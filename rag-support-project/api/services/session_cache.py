@@ -0,0 +1,118 @@
+# api/services/session_cache.py
+"""Per-session retrieval reuse for follow-up questions.
+
+Each session remembers the vector of its last searched query and the chunks
+that search returned. When the next query in the same session embeds within
+``SESSION_REUSE_THRESHOLD`` cosine similarity of it, ``chat()`` reuses those
+chunks instead of searching again. Sessions idle for longer than
+``SESSION_TTL_SECONDS`` are evicted.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_TTL_SECONDS = 1800.0
+DEFAULT_MAX_SESSIONS = 10000
+
+
+def _unit(vector) -> Optional[List[float]]:
+    values = [float(x) for x in vector]
+    norm = math.sqrt(sum(x * x for x in values))
+    if not norm:
+        return None
+    return [x / norm for x in values]
+
+
+class _SessionEntry:
+    __slots__ = ("unit", "results", "last_used")
+
+    def __init__(self, unit: List[float], results: List[Any]):
+        self.unit = unit
+        self.results = results
+        self.last_used = time.monotonic()
+
+
+class SessionRetrievalCache:
+    """Last query vector and retrieved chunks per session, LRU-bounded."""
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "searches_skipped": 0, "evicted": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict_expired(self, now: float) -> None:
+        # Entries are kept in last-used order, so expired ones sit at the front.
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            if now - entry.last_used <= self.ttl_seconds:
+                break
+            del self._entries[session_id]
+            self.stats["evicted"] += 1
+
+    def lookup(self, session_id: str, query_vector) -> Optional[List[Any]]:
+        """Cached chunks if ``query_vector`` is close to the session's last query."""
+        unit = _unit(query_vector)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            self.stats["lookups"] += 1
+            entry = self._entries.get(session_id)
+            if entry is None or unit is None or len(unit) != len(entry.unit):
+                return None
+            similarity = sum(a * b for a, b in zip(unit, entry.unit))
+            if similarity < self.threshold:
+                return None
+            entry.last_used = now
+            self._entries.move_to_end(session_id)
+            self.stats["searches_skipped"] += 1
+            return entry.results
+
+    def store(self, session_id: str, query_vector, results: List[Any]) -> None:
+        unit = _unit(query_vector)
+        if unit is None or not results:
+            return
+        with self._lock:
+            self._entries[session_id] = _SessionEntry(unit, results)
+            self._entries.move_to_end(session_id)
+            self._evict_expired(time.monotonic())
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["sessions"] = len(self._entries)
+        return stats
+
+
+_cache: Optional[SessionRetrievalCache] = None
+
+
+def session_reuse_enabled() -> bool:
+    return os.getenv("SESSION_REUSE", "true").lower() in ("1", "true", "yes")
+
+
+def get_session_cache() -> SessionRetrievalCache:
+    global _cache
+    if _cache is None:
+        _cache = SessionRetrievalCache(
+            threshold=float(os.getenv("SESSION_REUSE_THRESHOLD", DEFAULT_THRESHOLD)),
+            ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+        )
+    return _cache
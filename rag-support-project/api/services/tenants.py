@@ -0,0 +1,157 @@
+# api/services/tenants.py
+"""Per-tenant knowledge bases.
+
+``TENANT_ROUTES`` maps tenant names to where their documents live, as JSON:
+
+    {"acme":   {"collection": "acme_docs"},
+     "globex": {"collection": "shared_docs", "shard_key": "globex"},
+     "initech": {"collection": "initech_docs", "url": "https://...", "api_key": "..."}}
+
+``collection`` defaults to ``QDRANT_COLLECTION``; ``shard_key`` selects a
+custom shard of a shared collection; ``url``/``api_key`` point a tenant at
+its own Qdrant cluster (otherwise ``QDRANT_URL`` is used).
+
+The tenant of a request comes from the token (``app_metadata.tenant``). The
+``TENANT_HEADER`` header (``X-Tenant-ID``) or a ``?tenant=`` query parameter
+(WebSocket clients cannot set headers) may pick another tenant only if it is
+in the token's ``app_metadata.tenants`` allow-list, or when auth is not
+configured (development).
+``bind_tenant`` stores it in a context variable for the rest of the request,
+so retrieval code reads :func:`current_route` instead of threading a tenant
+argument through every call. Without ``TENANT_ROUTES`` there is a single
+default route and tenants are ignored.
+"""
+import json
+import os
+from contextvars import ContextVar
+from typing import Collection, Dict, Optional
+
+DEFAULT_TENANT_HEADER = "X-Tenant-ID"
+
+_current_tenant: ContextVar[Optional[str]] = ContextVar("tenant", default=None)
+
+
+class TenantRoute:
+    """Where one tenant's vectors are searched."""
+
+    __slots__ = ("tenant", "collection", "shard_key", "url", "api_key")
+
+    def __init__(
+        self,
+        tenant: Optional[str],
+        collection: str,
+        shard_key: Optional[str] = None,
+        url: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ):
+        self.tenant = tenant
+        self.collection = collection
+        self.shard_key = shard_key
+        self.url = url
+        self.api_key = api_key
+
+    @property
+    def key(self) -> Optional[str]:
+        """Identity of the searched data (None for the default route)."""
+        if self.tenant is None:
+            return None
+        return "|".join((self.url or "", self.collection, self.shard_key or ""))
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {
+            "tenant": self.tenant,
+            "collection": self.collection,
+            "shard_key": self.shard_key,
+            "dedicated_cluster": self.url is not None,
+        }
+
+
+class UnknownTenant(KeyError):
+    pass
+
+
+def default_collection() -> str:
+    return os.getenv("QDRANT_COLLECTION", "support_docs")
+
+
+_parsed: Dict[str, Dict[str, TenantRoute]] = {}
+
+
+def tenant_routes() -> Dict[str, TenantRoute]:
+    """Routes from ``TENANT_ROUTES`` (parsed once per distinct value)."""
+    raw = os.getenv("TENANT_ROUTES", "")
+    routes = _parsed.get(raw)
+    if routes is None:
+        try:
+            spec = json.loads(raw) if raw.strip() else {}
+        except ValueError as e:
+            raise RuntimeError("TENANT_ROUTES is not valid JSON: " + str(e))
+        routes = {
+            name: TenantRoute(
+                name,
+                collection=cfg.get("collection") or default_collection(),
+                shard_key=cfg.get("shard_key"),
+                url=cfg.get("url"),
+                api_key=cfg.get("api_key"),
+            )
+            for name, cfg in spec.items()
+        }
+        _parsed.clear()
+        _parsed[raw] = routes
+    return routes
+
+
+def tenants_enabled() -> bool:
+    return bool(tenant_routes())
+
+
+def tenant_header() -> str:
+    return os.getenv("TENANT_HEADER", DEFAULT_TENANT_HEADER)
+
+
+def get_route(tenant: Optional[str]) -> TenantRoute:
+    """Route for ``tenant``; None means the default collection."""
+    if tenant is None:
+        return TenantRoute(None, default_collection())
+    try:
+        return tenant_routes()[tenant]
+    except KeyError:
+        raise UnknownTenant(tenant)
+
+
+def resolve_tenant(
+    user_tenant: Optional[str],
+    requested: Optional[str],
+    allowed: Collection[str] = (),
+    trust_requested: bool = False,
+) -> Optional[str]:
+    """Tenant for a request: ``requested`` (header/query) if the user may use
+    it, else the user's own. Raises ``PermissionError`` when ``requested`` is
+    neither the user's tenant nor in ``allowed`` (unless ``trust_requested``),
+    and ``UnknownTenant`` for unconfigured names."""
+    if not tenants_enabled():
+        return None
+    if requested and requested != user_tenant and not trust_requested and requested not in allowed:
+        raise PermissionError(requested)
+    tenant = requested or user_tenant or None
+    if tenant is not None:
+        get_route(tenant)
+    return tenant
+
+
+def bind_tenant(tenant: Optional[str]) -> None:
+    _current_tenant.set(tenant)
+
+
+def current_tenant() -> Optional[str]:
+    return _current_tenant.get()
+
+
+def current_route() -> TenantRoute:
+    return get_route(_current_tenant.get())
+
+
+def tenant_scoped(key: str) -> str:
+    """Prefix a cache key with the current tenant so tenants never share entries."""
+    tenant = _current_tenant.get()
+    return key if tenant is None else f"{tenant}/{key}"
@@ -1,14 +1,24 @@
 # api/services/vector_store.py
 from dotenv import load_dotenv
 import os
-from typing import List
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
 import logging
 import asyncio
+import math
+import threading
+import time
+
+from api.services.local_index import get_local_index, local_index_enabled
+from api.services.tenants import TenantRoute, current_route, default_collection, get_route
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 _client = None
+DEFAULT_TENANT_CLIENTS = 8
+_tenant_clients: "OrderedDict[Tuple[str, Optional[str]], Any]" = OrderedDict()
+_tenant_clients_lock = threading.Lock()
 
 
 def _get_client():
@@ -38,10 +48,193 @@ def _get_client():
     return _client
 
 
+def _client_for(route: TenantRoute):
+    """Client for ``route``: the shared one unless the tenant has its own cluster.
+
+    Dedicated-cluster clients are kept in an LRU of ``TENANT_CLIENT_CACHE_SIZE``.
+    Evicted clients are only dropped, not closed, since a request may still
+    be using one.
+    """
+    if route.url is None:
+        return _get_client()
+
+    key = (route.url, route.api_key)
+    with _tenant_clients_lock:
+        client = _tenant_clients.get(key)
+        if client is not None:
+            _tenant_clients.move_to_end(key)
+            return client
+
+    try:
+        from qdrant_client import QdrantClient
+    except Exception as e:
+        raise RuntimeError("Failed to import qdrant_client: " + str(e))
+    try:
+        client = QdrantClient(url=route.url, api_key=route.api_key)
+    except Exception as e:
+        raise RuntimeError(f"Failed to initialize Qdrant client for tenant {route.tenant}: {e}")
+
+    limit = max(int(os.getenv("TENANT_CLIENT_CACHE_SIZE", DEFAULT_TENANT_CLIENTS)), 1)
+    with _tenant_clients_lock:
+        client = _tenant_clients.setdefault(key, client)
+        _tenant_clients.move_to_end(key)
+        while len(_tenant_clients) > limit:
+            _tenant_clients.popitem(last=False)
+    return client
+
+
+def _collection_name() -> str:
+    """Name searches go through: the ``support_docs`` alias by default.
+
+    ``scripts/ingest.py`` keeps this alias pointed at the live versioned
+    collection, so reindexing never changes what the API has to query.
+    Tenant routes name their own collections (``TENANT_ROUTES``).
+    """
+    return default_collection()
+
+
+def _search_params():
+    """Quantization search params, or None to use the collection defaults.
+
+    Set ``QDRANT_OVERSAMPLING`` (e.g. ``2.0``) when the collection was built
+    with ``--quantization``: Qdrant then fetches that many times ``top_k``
+    candidates from the compressed index and rescores them with the original
+    float32 vectors before returning.
+    """
+    oversampling = os.getenv("QDRANT_OVERSAMPLING")
+    if not oversampling:
+        return None
+    from qdrant_client.models import QuantizationSearchParams, SearchParams
+
+    return SearchParams(
+        quantization=QuantizationSearchParams(rescore=True, oversampling=float(oversampling))
+    )
+
+
+def adaptive_select(
+    points: List[object],
+    min_k: int = 1,
+    max_k: int = 5,
+    max_gap: float = 0.1,
+    mass: float = 0.9,
+    temperature: float = 0.05,
+) -> List[object]:
+    """Keep the leading hits only while the scores justify them.
+
+    ``points`` must be sorted by descending score. After the first ``min_k``
+    hits, the next one is kept only if its score is within ``max_gap`` of the
+    previous hit and the hits kept so far hold less than ``mass`` of the total
+    relevance (a softmax over the scores at ``temperature``). When one chunk
+    clearly dominates, that is usually the only one kept.
+    """
+    candidates = points[:max_k]
+    if len(candidates) <= min_k:
+        return candidates
+    top = candidates[0].score
+    weights = [math.exp((p.score - top) / temperature) for p in candidates]
+    total = sum(weights)
+    kept = candidates[:min_k]
+    cumulative = sum(weights[:min_k]) / total
+    for i in range(min_k, len(candidates)):
+        if cumulative >= mass or candidates[i - 1].score - candidates[i].score > max_gap:
+            break
+        kept.append(candidates[i])
+        cumulative += weights[i] / total
+    return kept
+
+
+def _adaptive_config(top_k: int) -> dict | None:
+    """Adaptive top-k settings from env, or None when ``RETRIEVAL_MODE`` isn't ``adaptive``."""
+    if os.getenv("RETRIEVAL_MODE", "fixed").lower() != "adaptive":
+        return None
+    return {
+        "min_k": int(os.getenv("ADAPTIVE_MIN_K", "1")),
+        "max_k": int(os.getenv("ADAPTIVE_MAX_K", str(top_k))),
+        "max_gap": float(os.getenv("ADAPTIVE_MAX_GAP", "0.1")),
+        "mass": float(os.getenv("ADAPTIVE_MASS", "0.9")),
+        "temperature": float(os.getenv("ADAPTIVE_TEMPERATURE", "0.05")),
+    }
+
+
+def _select(points: List[object], threshold: float, adaptive: dict | None) -> List[object]:
+    logger.info("Found %d results", len(points))
+    if not points:
+        return points
+    logger.info("Top result score: %s", points[0].score)
+    # Filter by threshold if provided
+    filtered = [p for p in points if p.score >= threshold]
+    logger.info("After threshold %s filtering: %d results", threshold, len(filtered))
+    # Return all if threshold filters everything, to at least have something
+    selected = filtered if filtered else points
+    if adaptive:
+        selected = adaptive_select(selected, **adaptive)
+        logger.info("Adaptive top-k kept %d results", len(selected))
+    return selected
+
+
+async def warm_local_index(route: Optional[TenantRoute] = None) -> bool:
+    """Load the in-process replica (``VECTOR_BACKEND=local``) of ``route``,
+    the default collection if omitted; False on failure."""
+    if not local_index_enabled():
+        return False
+    route = route or get_route(None)
+    index = get_local_index(route.key)
+    try:
+        await asyncio.to_thread(index.load, _client_for(route), route.collection, shard_key=route.shard_key)
+        return True
+    except Exception as e:
+        # Don't retry on every request; the next attempt waits a refresh interval.
+        index.mark_checked()
+        logger.warning("Local index unavailable, searching Qdrant directly: %s", e)
+        return False
+
+
+async def warm_route(route: TenantRoute) -> dict:
+    """Pay a tenant's first-request costs up front: create its client, open
+    the connection (collection lookup) and load its replica when enabled."""
+    started = time.perf_counter()
+    client = _client_for(route)
+    await asyncio.to_thread(client.get_collection, route.collection)
+    connected = time.perf_counter()
+    replica = await warm_local_index(route)
+    return {
+        **route.to_dict(),
+        "connect_ms": round((connected - started) * 1000, 2),
+        "replica_loaded": replica,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
 async def search_vectors(query_vector, top_k=5, threshold=0.7) -> List[object]:
-    """Search vectors in Qdrant with simple retry logic for connection issues."""
-    client = _get_client()
+    """Search vectors in Qdrant with simple retry logic for connection issues.
+
+    With ``RETRIEVAL_MODE=adaptive`` up to ``ADAPTIVE_MAX_K`` candidates are
+    fetched and trimmed by :func:`adaptive_select` after threshold filtering.
+    With ``VECTOR_BACKEND=local`` the search runs against the in-process
+    replica (same scores, same filtering) and only falls back to Qdrant
+    while the replica is not loaded. The request's tenant route picks the
+    collection, shard key and cluster.
+    """
+    adaptive = _adaptive_config(top_k)
+    limit = adaptive["max_k"] if adaptive else top_k
+    route = current_route()
+
+    if local_index_enabled():
+        index = get_local_index(route.key)
+        if not index.loaded and index.check_due():
+            await warm_local_index(route)
+        if index.loaded:
+            index.schedule_refresh(_client_for(route), route.collection, route.shard_key)
+            return _select(index.search(query_vector, limit), threshold, adaptive)
+
+    client = _client_for(route)
     last_error: Exception | None = None
+    extra = {}
+    search_params = _search_params()
+    if search_params is not None:
+        extra["search_params"] = search_params
+    if route.shard_key is not None:
+        extra["shard_key_selector"] = route.shard_key
 
     max_retries = 3
     for attempt in range(1, max_retries + 1):
@@ -49,21 +242,14 @@ async def search_vectors(query_vector, top_k=5, threshold=0.7) -> List[object]:
             # Use query_points method - it accepts query as a vector directly
             # For cosine distance, Qdrant returns similarity scores (higher is better, range ~0-1)
             results = client.query_points(
-                collection_name="support_docs",
+                collection_name=route.collection,
                 query=query_vector,
-                limit=top_k,
+                limit=limit,
                 with_payload=True,
+                **extra,
             )
             # query_points returns a QueryResponse object with .points attribute
-            logger.info("Found %d results from Qdrant", len(results.points))
-            if results.points:
-                logger.info("Top result score: %s", results.points[0].score)
-                # Filter by threshold if provided
-                filtered = [p for p in results.points if p.score >= threshold]
-                logger.info("After threshold %s filtering: %d results", threshold, len(filtered))
-                # Return all if threshold filters everything, to at least have something
-                return filtered if filtered else results.points
-            return results.points
+            return _select(results.points, threshold, adaptive)
         except Exception as e:
             last_error = e
             logger.error(
@@ -78,3 +264,57 @@ async def search_vectors(query_vector, top_k=5, threshold=0.7) -> List[object]:
             await asyncio.sleep(1 * attempt)
 
     raise RuntimeError("Qdrant query failed after retries: " + str(last_error))
+
+
+async def search_vectors_batch(query_vectors, top_k=5, threshold=0.7) -> List[List[object]]:
+    """Batched :func:`search_vectors`: one Qdrant round-trip for many queries.
+
+    Returns one result list per input vector, filtered and trimmed exactly as
+    the single-query path does.
+    """
+    if not query_vectors:
+        return []
+    adaptive = _adaptive_config(top_k)
+    limit = adaptive["max_k"] if adaptive else top_k
+    route = current_route()
+
+    if local_index_enabled():
+        index = get_local_index(route.key)
+        if not index.loaded and index.check_due():
+            await warm_local_index(route)
+        if index.loaded:
+            index.schedule_refresh(_client_for(route), route.collection, route.shard_key)
+            return [_select(index.search(v, limit), threshold, adaptive) for v in query_vectors]
+
+    from qdrant_client.models import QueryRequest
+
+    client = _client_for(route)
+    search_params = _search_params()
+    shard = {"shard_key": route.shard_key} if route.shard_key is not None else {}
+    requests = [
+        QueryRequest(query=v.tolist() if hasattr(v, "tolist") else list(v), limit=limit, with_payload=True, params=search_params, **shard)
+        for v in query_vectors
+    ]
+
+    last_error: Exception | None = None
+    max_retries = 3
+    for attempt in range(1, max_retries + 1):
+        try:
+            responses = client.query_batch_points(
+                collection_name=route.collection,
+                requests=requests,
+            )
+            return [_select(r.points, threshold, adaptive) for r in responses]
+        except Exception as e:
+            last_error = e
+            logger.error(
+                "Qdrant batch query error on attempt %d/%d: %s",
+                attempt,
+                max_retries,
+                e,
+            )
+            if attempt >= max_retries:
+                break
+            await asyncio.sleep(1 * attempt)
+
+    raise RuntimeError("Qdrant batch query failed after retries: " + str(last_error))
@@ -0,0 +1,221 @@
+# api/services/warmup.py
+"""Deploy-time cache warming from a historical query log.
+
+A fresh instance starts with empty caches, so the first wave of users
+after a deploy or scale-out pays full embed + search latency. With
+``WARMUP_QUERY_LOG`` set, startup launches a background job that:
+
+1. reads the log, JSONL with one past ``/api/chat`` query per line:
+   ``{"query": "...", "count": 42}``. ``count`` defaults to 1, and
+   repeated queries are summed. An optional ``"tenant"`` routes the query
+   like a request from that tenant.
+2. takes the ``WARMUP_TOP_N`` most frequent queries, skipping ones
+   ``chat()`` answers without retrieval (FAQ hits, clarifications).
+3. embeds them in batches of ``WARMUP_BATCH_SIZE`` (one provider call per
+   batch) into the embedding cache, and runs one batched search per batch
+   into :class:`WarmRetrievalCache`.
+
+All of this happens within ``WARMUP_BUDGET_SECONDS``. Whatever finished
+when the budget runs out stays cached. ``/api/health`` answers 503
+``warming`` until the job ends, so load balancers only route to warm
+instances.
+
+``retrieve_context`` serves warmed queries (same normalized text, same
+tenant) without embedding or searching, for ``RETRIEVAL_CACHE_TTL_SECONDS``.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from api.services import embeddings, vector_store
+from api.services.faq import normalize
+from api.services.tenants import bind_tenant, tenant_scoped
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_N = 200
+DEFAULT_BUDGET_SECONDS = 30.0
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_TTL_SECONDS = 900.0
+
+
+class WarmRetrievalCache:
+    """Retrieval results for popular queries, shared by all users of a tenant."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[List[Any], float]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, query: str, results: List[Any]) -> None:
+        """Cache ``results`` for ``query`` under the current tenant."""
+        with self._lock:
+            self._entries[tenant_scoped(normalize(query))] = (results, time.monotonic())
+
+    def get(self, query: str) -> Optional[List[Any]]:
+        key = tenant_scoped(normalize(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            self.stats["hits" if entry is not None else "misses"] += 1
+        return entry[0] if entry is not None else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._entries))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+def load_query_log(path: str) -> List[Tuple[Optional[str], str, int]]:
+    """``(tenant, query, count)`` from a JSONL query log, most frequent first.
+
+    Queries are merged by tenant and normalized text; the first spelling
+    seen is kept. Malformed lines are skipped.
+    """
+    merged: Dict[Tuple[Optional[str], str], List[Any]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                query = record["query"].strip()
+                count = int(record.get("count", 1))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+            if not query:
+                continue
+            key = (record.get("tenant"), normalize(query))
+            entry = merged.setdefault(key, [query, 0])
+            entry[1] += count
+    ranked = sorted(merged.items(), key=lambda item: -item[1][1])
+    return [(tenant, query, count) for (tenant, _), (query, count) in ranked]
+
+
+class CacheWarmer:
+    """Runs the warmup job once and reports its progress."""
+
+    def __init__(
+        self,
+        path: Optional[str],
+        top_n: int = DEFAULT_TOP_N,
+        budget_seconds: float = DEFAULT_BUDGET_SECONDS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.path = path
+        self.top_n = top_n
+        self.budget_seconds = budget_seconds
+        self.batch_size = max(batch_size, 1)
+        # idle (not started), running, done, timeout, failed, cancelled
+        self.state = "idle"
+        self.stats = {"selected": 0, "embedded": 0, "warmed": 0, "skipped": 0, "elapsed_ms": 0.0}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state != "running"
+
+    def _select(self, skip: Callable[[str], bool]) -> Dict[Optional[str], List[str]]:
+        by_tenant: Dict[Optional[str], List[str]] = {}
+        for tenant, query, _ in load_query_log(self.path):
+            if self.stats["selected"] >= self.top_n:
+                break
+            bind_tenant(tenant)  # runs in a worker thread's own context
+            if skip(query):
+                self.stats["skipped"] += 1
+                continue
+            by_tenant.setdefault(tenant, []).append(query)
+            self.stats["selected"] += 1
+        return by_tenant
+
+    async def _warm(self, skip: Callable[[str], bool], cache: WarmRetrievalCache) -> None:
+        by_tenant = await asyncio.to_thread(self._select, skip)
+        for tenant, queries in by_tenant.items():
+            bind_tenant(tenant)
+            for i in range(0, len(queries), self.batch_size):
+                batch = queries[i:i + self.batch_size]
+                vectors = await embeddings.get_embedding(batch)
+                embeddings.cache_embeddings(batch, vectors)
+                self.stats["embedded"] += len(batch)
+                results = await vector_store.search_vectors_batch(vectors, top_k=5, threshold=0.7)
+                for query, hits in zip(batch, results):
+                    cache.put(query, hits)
+                self.stats["warmed"] += len(batch)
+
+    async def run(self, skip: Callable[[str], bool], cache: WarmRetrievalCache) -> Dict[str, Any]:
+        """Warm the caches; never raises, ``state`` says how it ended."""
+        if not self.path:
+            return self.snapshot()
+        self.state = "running"
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._warm(skip, cache), timeout=self.budget_seconds)
+            self.state = "done"
+        except asyncio.TimeoutError:
+            self.state = "timeout"
+        except Exception as e:
+            logger.warning("Cache warmup failed: %s", e)
+            self.state = "failed"
+        finally:
+            bind_tenant(None)
+            self.stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(
+            "Cache warmup %s: %d/%d queries warmed in %.0fms",
+            self.state, self.stats["warmed"], self.stats["selected"], self.stats["elapsed_ms"],
+        )
+        return self.snapshot()
+
+    def start(self, skip: Callable[[str], bool], cache: WarmRetrievalCache) -> bool:
+        """Run in the background; not ready from this call until the job ends."""
+        if not self.path or self._task is not None:
+            return False
+        self.state = "running"
+        self._task = asyncio.get_running_loop().create_task(self.run(skip, cache), name="cache-warmup")
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self.state = "cancelled"
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "ready": self.ready, **self.stats}
+
+
+_cache: Optional[WarmRetrievalCache] = None
+_warmer: Optional[CacheWarmer] = None
+
+
+def get_warm_retrieval_cache() -> WarmRetrievalCache:
+    global _cache
+    if _cache is None:
+        _cache = WarmRetrievalCache(
+            ttl_seconds=float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+        )
+    return _cache
+
+
+def get_cache_warmer() -> CacheWarmer:
+    global _warmer
+    if _warmer is None:
+        _warmer = CacheWarmer(
+            path=os.getenv("WARMUP_QUERY_LOG") or None,
+            top_n=int(os.getenv("WARMUP_TOP_N", DEFAULT_TOP_N)),
+            budget_seconds=float(os.getenv("WARMUP_BUDGET_SECONDS", DEFAULT_BUDGET_SECONDS)),
+            batch_size=int(os.getenv("WARMUP_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        )
+    return _warmer
@@ -1,17 +1,78 @@
-from locust import HttpUser, task, between
-from dotenv import load_dotenv
+"""Locust scenarios for /api/chat in JSON and SSE modes.
+
+Point it at an API wired to the local fakes so no paid service is hit:
+
+    python scripts/fake_services.py          # prints the env exports (FAQ/session shortcuts off)
+    (export those) uvicorn api.main:app --port 8000
+    locust -f locustfile.py --host http://127.0.0.1:8000
+
+SSE requests additionally report a ``TTFT`` entry: time to the first
+streamed answer frame. ``scripts/loadtest.py`` runs the same scenarios
+without Locust and prints p50/p95/p99 directly.
+"""
+import itertools
 import os
+import sys
+import time
+import uuid
+
+from locust import HttpUser, between, events, task
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+
+from bench_common import load_eval_queries  # noqa: E402
+
+QUERIES = [q["query"] for q in load_eval_queries()]
+_query_ids = itertools.count()
 
-# Load environment variables from .env file
-load_dotenv()
 
- 
 class ChatUser(HttpUser):
-    wait_time = between(1, 3)
-    
+    wait_time = between(float(os.getenv("LOCUST_WAIT_MIN", "1")), float(os.getenv("LOCUST_WAIT_MAX", "3")))
+
+    def on_start(self):
+        # One session per simulated user; the first message may be answered
+        # with a clarification prompt, so send it untimed.
+        self.session_id = f"locust-{uuid.uuid4().hex[:12]}"
+        self.client.post(
+            f"/api/chat?format=json&session_id={self.session_id}",
+            json={"query": QUERIES[0]},
+            name="warmup",
+        )
+
+    def _query(self) -> str:
+        return QUERIES[next(_query_ids) % len(QUERIES)]
+
+    @task
+    def chat_json(self):
+        self.client.post(
+            f"/api/chat?format=json&session_id={self.session_id}",
+            json={"query": self._query()},
+            name="/api/chat [json]",
+        )
+
     @task
-    def chat(self):
-        supabase_key = os.getenv("SUPABASE_ANON_KEY")
-        self.client.post("/api/chat",
-            json={"query": "How do I reset password?"},
-            headers={"Authorization": f"Bearer {bool(supabase_key)}"})
\ No newline at end of file
+    def chat_sse(self):
+        start = time.perf_counter()
+        ttft = None
+        with self.client.post(
+            f"/api/chat?session_id={self.session_id}",
+            json={"query": self._query()},
+            name="/api/chat [sse]",
+            stream=True,
+            catch_response=True,
+        ) as resp:
+            for chunk in resp.iter_content(chunk_size=None, decode_unicode=True):
+                if ttft is None and "data: " in chunk and '"type": "metrics"' not in chunk:
+                    ttft = time.perf_counter() - start
+            if ttft is None:
+                resp.failure("no answer frame in stream")
+                return
+            resp.success()
+        events.request.fire(
+            request_type="SSE",
+            name="TTFT",
+            response_time=ttft * 1000.0,
+            response_length=0,
+            exception=None,
+            context={},
+        )
@@ -0,0 +1,131 @@
+# scripts/bench_cold_start.py
+"""Cold-start benchmark for the Vercel entry point, runnable in CI.
+
+Each run starts a fresh interpreter, imports ``api.index`` and runs the
+app's startup handlers, timing both. ``--check`` fails (exit 1) when
+
+* any SDK in ``DEFERRED`` was imported during import + startup, or
+* the median import + startup time exceeds the stored baseline by more than
+  ``tolerance`` (relative) plus ``slack_ms`` (absolute, for noisy runners).
+
+    python scripts/bench_cold_start.py
+    python scripts/bench_cold_start.py --check
+    python scripts/bench_cold_start.py --update-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bench_common import print_table  # noqa: E402
+from profile_imports import run_python  # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, "cold_start_baseline.json")
+
+# SDKs that must load on first use, never on cold start.
+DEFERRED = (
+    "requests",
+    "qdrant_client",
+    "groq",
+    "openai",
+    "numpy",
+    "sentence_transformers",
+    "torch",
+    "onnxruntime",
+    "tokenizers",
+    "tiktoken",
+    "jwt",
+    "cryptography",
+)
+
+PROBE = """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import api.index
+t1 = time.perf_counter()
+
+async def _startup():
+    for handler in api.index.app.router.on_startup:
+        await handler()
+
+asyncio.run(_startup())
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000.0,
+    "startup_ms": (t2 - t1) * 1000.0,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (DEFERRED,)
+
+
+def measure(runs: int = 5, lazy: bool = True):
+    env = {"LAZY_IMPORTS": "true" if lazy else "false", "DEV_MODE": "true"}
+    samples = []
+    for _ in range(runs):
+        out = run_python(PROBE, env=env).stdout.strip().splitlines()[-1]
+        samples.append(json.loads(out))
+    import_ms = statistics.median(s["import_ms"] for s in samples)
+    startup_ms = statistics.median(s["startup_ms"] for s in samples)
+    return {
+        "mode": "lazy" if lazy else "eager",
+        "import_ms": import_ms,
+        "startup_ms": startup_ms,
+        "total_ms": import_ms + startup_ms,
+        "loaded": sorted({m for s in samples for m in s["loaded"]}),
+    }
+
+
+def load_baseline():
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check(result, baseline) -> list:
+    failures = []
+    if result["loaded"]:
+        failures.append("SDKs imported during cold start: " + ", ".join(result["loaded"]))
+    limit = baseline["total_ms"] * (1 + baseline["tolerance"]) + baseline["slack_ms"]
+    if result["total_ms"] > limit:
+        failures.append(
+            f"cold start {result['total_ms']:.1f} ms exceeds {limit:.1f} ms "
+            f"(baseline {baseline['total_ms']:.1f} ms)"
+        )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="Exit 1 on regression against the baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--compare-eager", action="store_true", help="Also measure LAZY_IMPORTS=false")
+    args = parser.parse_args()
+
+    results = [measure(args.runs, lazy=True)]
+    if args.compare_eager:
+        results.append(measure(args.runs, lazy=False))
+    print_table([{**r, "loaded": ",".join(r["loaded"]) or "-"} for r in results])
+
+    if args.update_baseline:
+        baseline = {"total_ms": round(results[0]["total_ms"], 1), "tolerance": 0.5, "slack_ms": 150.0}
+        if os.path.exists(BASELINE_PATH):
+            old = load_baseline()
+            baseline.update(tolerance=old["tolerance"], slack_ms=old["slack_ms"])
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    if args.check:
+        failures = check(results[0], load_baseline())
+        for failure in failures:
+            print("FAIL:", failure)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
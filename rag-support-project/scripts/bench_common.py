@@ -0,0 +1,175 @@
+# scripts/bench_common.py
+"""Shared helpers for the offline benchmark scripts in ``scripts/``.
+
+Nothing here talks to a paid service: ``HashingEncoder`` is a deterministic
+bag-of-words stand-in for SentenceTransformers, and ``synthetic_corpus`` builds
+a scaled-up copy of ``data/`` in a temporary directory.
+``build_stand_in_onnx_model`` writes a small random ONNX encoder with the
+same inputs and outputs as the exported MiniLM, for exercising
+``EMBEDDING_PROVIDER=local`` without downloading anything.
+"""
+import math
+import os
+import re
+import statistics
+import zlib
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+VECTOR_SIZE = 384
+SUPPORT_DOCS = os.path.join(os.path.dirname(__file__), "..", "data", "support_docs.txt")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEncoder:
+    """Feature-hashing encoder with a SentenceTransformers-style ``encode``.
+
+    Texts sharing words get similar unit vectors, which is enough to exercise
+    retrieval quality metrics without downloading a model.
+    """
+
+    def __init__(self, dim: int = VECTOR_SIZE):
+        self.dim = dim
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            h = zlib.crc32(token.encode())
+            vec[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def encode(self, x: Any, batch_size: int | None = None, **_kwargs: Any):
+        if isinstance(x, str):
+            return self._encode_one(x)
+        return np.stack([self._encode_one(t) for t in x]) if x else np.zeros((0, self.dim), np.float32)
+
+
+def build_stand_in_onnx_model(
+    out_dir: str,
+    dim: int = VECTOR_SIZE,
+    layers: int = 4,
+    max_vocab: int = 8192,
+    int8: bool = True,
+    source: str = SUPPORT_DOCS,
+) -> str:
+    """Write ``model.onnx`` (+ ``model_int8.onnx``) and ``tokenizer.json`` to ``out_dir``.
+
+    The graph is an embedding lookup followed by ``layers`` dense+tanh blocks,
+    emitting ``last_hidden_state`` of shape (batch, sequence, dim) from
+    ``input_ids``/``attention_mask``/``token_type_ids``, like the real export.
+    The word-level vocabulary comes from ``source``. Needs onnx, onnxruntime
+    and tokenizers.
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(source, encoding="utf-8") as f:
+        words = sorted(set(_TOKEN_RE.findall(f.read().lower())))[: max_vocab - 2]
+    vocab = {"[PAD]": 0, "[UNK]": 1, **{w: i + 2 for i, w in enumerate(words)}}
+    tokenizer = Tokenizer(models.WordLevel(vocab=vocab, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.Lowercase()
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+    tokenizer.save(os.path.join(out_dir, "tokenizer.json"))
+
+    rng = np.random.default_rng(0)
+    inits = [numpy_helper.from_array(rng.normal(size=(len(vocab), dim)).astype(np.float32), "embeddings")]
+    nodes = [helper.make_node("Gather", ["embeddings", "input_ids"], ["h0"])]
+    for i in range(layers):
+        scale = 1.0 / math.sqrt(dim)
+        inits.append(numpy_helper.from_array((rng.normal(size=(dim, dim)) * scale).astype(np.float32), f"w{i}"))
+        inits.append(numpy_helper.from_array(np.zeros(dim, dtype=np.float32), f"b{i}"))
+        out = "last_hidden_state" if i == layers - 1 else f"h{i + 1}"
+        nodes += [
+            helper.make_node("MatMul", [f"h{i}", f"w{i}"], [f"m{i}"]),
+            helper.make_node("Add", [f"m{i}", f"b{i}"], [f"a{i}"]),
+            helper.make_node("Tanh", [f"a{i}"], [out]),
+        ]
+    seq = ["batch", "sequence"]
+    graph = helper.make_graph(
+        nodes,
+        "stand_in_encoder",
+        [helper.make_tensor_value_info(n, TensorProto.INT64, seq)
+         for n in ("input_ids", "attention_mask", "token_type_ids")],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, seq + [dim])],
+        inits,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    path = os.path.join(out_dir, "model.onnx")
+    onnx.save(model, path)
+
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(path, os.path.join(out_dir, "model_int8.onnx"), weight_type=QuantType.QInt8)
+    return out_dir
+
+
+def synthetic_corpus(target_dir: str, scale: int = 100, source: str = SUPPORT_DOCS) -> int:
+    """Write ``scale`` variants of ``source`` into ``target_dir``.
+
+    Each copy gets a distinct marker word per paragraph so chunks are not
+    byte-identical. Returns the total number of bytes written.
+    """
+    with open(source, encoding="utf-8") as f:
+        base = f.read()
+    paragraphs = base.split("\n\n")
+    total = 0
+    for n in range(scale):
+        text = "\n\n".join(f"{p} variant{n}" for p in paragraphs)
+        path = os.path.join(target_dir, f"support_docs_{n:04d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        total += len(text.encode("utf-8"))
+    return total
+
+
+def load_eval_queries(source: str = SUPPORT_DOCS) -> List[Dict[str, str]]:
+    """The ``Q:``/``A:`` pairs in the support docs, as ``{"query", "answer"}`` dicts."""
+    pairs = []
+    question = None
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("Q:"):
+                question = line[2:].strip()
+            elif line.startswith("A:") and question:
+                pairs.append({"query": question, "answer": line[2:].strip()})
+                question = None
+    return pairs
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def latency_summary(samples_s: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99 and mean of a list of durations, reported in milliseconds."""
+    ms = [s * 1000.0 for s in samples_s]
+    return {
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "mean_ms": statistics.fmean(ms) if ms else 0.0,
+    }
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    cols = list(rows[0])
+    fmt = lambda v: f"{v:.3f}" if isinstance(v, float) else str(v)  # noqa: E731
+    widths = [max(len(c), *(len(fmt(r[c])) for r in rows)) for c in cols]
+    print("  ".join(c.ljust(w) for c, w in zip(cols, widths)))
+    for r in rows:
+        print("  ".join(fmt(r[c]).ljust(w) for c, w in zip(cols, widths)))
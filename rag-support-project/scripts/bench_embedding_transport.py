@@ -0,0 +1,143 @@
+# scripts/bench_embedding_transport.py
+"""Compare float-list and base64 embedding transport.
+
+Starts a local mock of the OpenAI ``/v1/embeddings`` endpoint that honours
+``encoding_format``, then drives the real ``_OpenAIWrapper`` against it in
+both modes. For each mode it reports, per batch of ``--batch`` texts:
+
+* ``payload_kb``   response body size on the wire
+* ``parse_ms``     JSON decode + vector extraction only (body already in memory)
+* ``request_ms``   full ``encode()`` call, p50/p95 over ``--rounds``
+* ``peak_kb``      tracemalloc peak during one parse
+* ``result_kb``    memory held by the returned vectors
+
+    python scripts/bench_embedding_transport.py
+    python scripts/bench_embedding_transport.py --batch 100 --dim 3072 --rounds 50
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import numpy as np  # noqa: E402
+
+from api.services import embeddings  # noqa: E402
+from bench_common import latency_summary, print_table  # noqa: E402
+
+
+def _make_handler(dim: int):
+    rng = np.random.default_rng(0)
+    pool = rng.normal(size=(256, dim)).astype(np.float32)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            as_base64 = body.get("encoding_format") == "base64"
+            data = []
+            for i in range(len(texts)):
+                vec = pool[i % len(pool)]
+                emb = base64.b64encode(vec.tobytes()).decode() if as_base64 else vec.tolist()
+                data.append({"object": "embedding", "index": i, "embedding": emb})
+            out = json.dumps({"object": "list", "data": data, "model": body["model"]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _parse(raw: bytes):
+    data = json.loads(raw).get("data", [])
+    return [embeddings._decode_embedding(item["embedding"]) for item in data]
+
+
+def _result_bytes(vectors) -> int:
+    total = 0
+    for v in vectors:
+        if isinstance(v, np.ndarray):
+            total += v.nbytes
+        else:
+            total += sys.getsizeof(v) + sum(sys.getsizeof(x) for x in v)
+    return total
+
+
+def run(batch: int, dim: int, rounds: int):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(dim))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY") or "bench"
+    os.environ["OPENAI_EMBEDDINGS_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1/embeddings"
+    texts = [f"support question number {i}" for i in range(batch)]
+
+    import requests
+
+    rows = []
+    try:
+        for fmt in ("float", "base64"):
+            os.environ["EMBEDDING_ENCODING_FORMAT"] = fmt
+            wrapper = embeddings._OpenAIWrapper()
+
+            payload = {"model": "bench", "input": texts}
+            if fmt == "base64":
+                payload["encoding_format"] = "base64"
+            raw = requests.post(os.environ["OPENAI_EMBEDDINGS_URL"], json=payload).content
+
+            parse_s = []
+            for _ in range(rounds):
+                t0 = time.perf_counter()
+                vectors = _parse(raw)
+                parse_s.append(time.perf_counter() - t0)
+
+            tracemalloc.start()
+            vectors = _parse(raw)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            request_s = []
+            for _ in range(rounds):
+                t0 = time.perf_counter()
+                out = wrapper.encode(texts)
+                request_s.append(time.perf_counter() - t0)
+            assert len(out) == batch and len(out[0]) == dim
+
+            parse = latency_summary(parse_s)
+            request = latency_summary(request_s)
+            rows.append({
+                "format": fmt,
+                "payload_kb": round(len(raw) / 1024, 1),
+                "parse_ms": parse["p50_ms"],
+                "request_p50_ms": request["p50_ms"],
+                "request_p95_ms": request["p95_ms"],
+                "peak_kb": round(peak / 1024, 1),
+                "result_kb": round(_result_bytes(vectors) / 1024, 1),
+            })
+    finally:
+        server.shutdown()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=100, help="Texts per request")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension served by the mock")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    print_table(run(args.batch, args.dim, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# scripts/bench_hot_paths.py
+"""Run the hot-path micro-benchmarks and compare them with the stored baseline.
+
+Runs ``tests/benchmarks`` under pytest-benchmark (``--benchmark-only``) and
+reads each benchmark's median. ``--check`` fails (exit 1) when
+
+* a benchmark's median exceeds its baseline by more than ``tolerance``
+  (relative) plus ``slack_us`` (absolute, for noisy runners), or
+* a benchmark in the baseline no longer exists (rename it with
+  ``--update-baseline``).
+
+Benchmarks without a baseline entry are reported but never fail.
+
+    python scripts/bench_hot_paths.py
+    python scripts/bench_hot_paths.py --check
+    python scripts/bench_hot_paths.py --update-baseline
+    python scripts/bench_hot_paths.py -k groq        # extra args go to pytest
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from bench_common import print_table  # noqa: E402
+
+SUITE = os.path.join("tests", "benchmarks")
+BASELINE_PATH = os.path.join(PROJECT_ROOT, SUITE, "baseline.json")
+
+
+def run_suite(pytest_args=()) -> dict:
+    """Median time per benchmark, in microseconds."""
+    fd, out = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-m", "pytest", SUITE, "-q", "-p", "no:cacheprovider",
+             "--benchmark-only", f"--benchmark-json={out}", *pytest_args],
+            cwd=PROJECT_ROOT,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"benchmark suite failed (pytest exit {proc.returncode})")
+        with open(out, encoding="utf-8") as f:
+            report = json.load(f)
+    finally:
+        os.remove(out)
+    return {b["name"]: b["stats"]["median"] * 1e6 for b in report["benchmarks"]}
+
+
+def load_baseline():
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def limit_us(baseline, median_us: float) -> float:
+    return median_us * (1 + baseline["tolerance"]) + baseline["slack_us"]
+
+
+def check(medians, baseline) -> list:
+    failures = []
+    for name, base in baseline["benchmarks"].items():
+        if name not in medians:
+            failures.append(f"{name}: in baseline but not run")
+            continue
+        limit = limit_us(baseline, base)
+        if medians[name] > limit:
+            failures.append(
+                f"{name}: median {medians[name]:.1f} us exceeds {limit:.1f} us "
+                f"(baseline {base:.1f} us)"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Exit 1 on regression against the baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    args, pytest_args = parser.parse_known_args()
+
+    medians = run_suite(pytest_args)
+    baseline = load_baseline() if os.path.exists(BASELINE_PATH) else None
+
+    rows = []
+    for name, median in sorted(medians.items()):
+        base = baseline["benchmarks"].get(name) if baseline else None
+        rows.append({
+            "benchmark": name,
+            "median_us": median,
+            "baseline_us": base if base is not None else "-",
+            "ratio": median / base if base else "-",
+        })
+    print_table(rows)
+
+    if args.update_baseline:
+        new = {"tolerance": 1.5, "slack_us": 25.0, "benchmarks": {}}
+        if baseline:
+            new.update(tolerance=baseline["tolerance"], slack_us=baseline["slack_us"])
+            if pytest_args:
+                # A filtered run only refreshes the benchmarks it ran
+                new["benchmarks"].update(baseline["benchmarks"])
+        new["benchmarks"].update({name: round(m, 2) for name, m in sorted(medians.items())})
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(new, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    if args.check:
+        if baseline is None:
+            print(f"FAIL: no baseline at {BASELINE_PATH}; run with --update-baseline")
+            sys.exit(1)
+        failures = check(medians, baseline)
+        if pytest_args:
+            failures = [f for f in failures if not f.endswith("in baseline but not run")]
+        for failure in failures:
+            print("FAIL:", failure)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
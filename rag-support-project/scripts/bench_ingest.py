@@ -0,0 +1,131 @@
+# scripts/bench_ingest.py
+"""Throughput benchmark for ``scripts/ingest.py``.
+
+Builds a synthetic corpus 100x the size of ``data/support_docs.txt`` and
+ingests it the old way (encode one chunk at a time, one giant upsert), then
+through the streaming pipeline, then re-runs the pipeline with no changes to
+show the cost of a routine incremental update. Runs fully offline by
+default (hashing encoder + in-memory Qdrant); pass ``--model`` and/or
+``--qdrant-url`` to measure the real thing.
+
+    python scripts/bench_ingest.py
+    python scripts/bench_ingest.py --rtt-ms 30   # emulate a remote Qdrant node
+    python scripts/bench_ingest.py --scale 100 --workers 8 --model sentence-transformers/all-MiniLM-L6-v2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ingest  # noqa: E402
+from bench_common import HashingEncoder, print_table, synthetic_corpus  # noqa: E402
+
+
+def _legacy_ingest(client, encoder, data_dir: str, collection_name: str) -> int:
+    """The pre-streaming behaviour, kept here only as the comparison baseline."""
+    from qdrant_client.models import PointStruct
+
+    ingest.ensure_collection(client, collection_name, recreate=True)
+    docs = []
+    for filename in os.listdir(data_dir):
+        with open(os.path.join(data_dir, filename), encoding="utf-8") as f:
+            docs.extend((filename, c) for c in ingest.chunk_text(f.read()))
+    points = []
+    for idx, (source, text) in enumerate(docs):
+        embedding = encoder.encode(text).tolist()
+        points.append(PointStruct(id=idx, vector=embedding, payload={"text": text, "source": source}))
+    client.upsert(collection_name=collection_name, points=points)
+    return len(points)
+
+
+class _LocalClient:
+    """In-memory Qdrant wrapper for benchmarking.
+
+    Local mode is not thread-safe, so writes are serialised under a lock the
+    way a real server would serialise them. ``rtt_s`` adds a fixed round trip
+    per upsert, outside the lock, to mimic a remote node.
+    """
+
+    def __init__(self, client, rtt_s: float = 0.0):
+        self._client = client
+        self._rtt_s = rtt_s
+        self._lock = threading.Lock()
+
+    def upsert(self, *args, **kwargs):
+        if self._rtt_s:
+            time.sleep(self._rtt_s)
+        with self._lock:
+            return self._client.upsert(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def _make_client(url: str | None, rtt_ms: float = 0.0):
+    from qdrant_client import QdrantClient
+
+    if url:
+        return QdrantClient(url=url, api_key=os.getenv("QDRANT_KEY"))
+    return _LocalClient(QdrantClient(":memory:"), rtt_ms / 1000.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest throughput benchmark")
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=ingest.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--encode-batch-size", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=ingest.DEFAULT_WORKERS)
+    parser.add_argument("--model", default=None, help="SentenceTransformers model (default: hashing stand-in)")
+    parser.add_argument("--qdrant-url", default=None, help="Qdrant URL (default: in-memory)")
+    parser.add_argument("--rtt-ms", type=float, default=0.0,
+                        help="simulated per-upsert round trip for the in-memory client")
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    encoder = ingest.load_encoder(args.model) if args.model else HashingEncoder()
+    collection = "bench_ingest"
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        os.mkdir(data_dir)
+        corpus_bytes = synthetic_corpus(data_dir, scale=args.scale)
+        print(f"Synthetic corpus: {args.scale} files, {corpus_bytes / 1e6:.1f} MB")
+
+        if not args.skip_legacy:
+            client = _make_client(args.qdrant_url, args.rtt_ms)
+            t0 = time.perf_counter()
+            n = _legacy_ingest(client, encoder, data_dir, collection)
+            elapsed = time.perf_counter() - t0
+            rows.append({"mode": "legacy", "chunks": n, "seconds": elapsed, "chunks_per_s": n / elapsed})
+
+        client = _make_client(args.qdrant_url, args.rtt_ms)
+        # First pass embeds everything; the second pass is the routine
+        # "nothing changed" re-run that the content-hash diff short-circuits.
+        for mode, rebuild in (("streaming", True), ("incremental-noop", False)):
+            stats = ingest.run_ingest(
+                client,
+                encoder,
+                data_dir=data_dir,
+                collection_name=collection,
+                batch_size=args.batch_size,
+                encode_batch_size=args.encode_batch_size,
+                workers=args.workers,
+                rebuild=rebuild,
+            )
+            rows.append({
+                "mode": mode,
+                "chunks": stats["chunks"],
+                "seconds": stats["seconds"],
+                "chunks_per_s": stats["chunks"] / stats["seconds"],
+            })
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# scripts/bench_local_embedding.py
+"""Latency and throughput of the in-process embedding provider.
+
+Loads ``_LocalWrapper`` once per model file found in the model directory
+(fp32 ``model.onnx`` and int8 ``model_int8.onnx``) and reports:
+
+* ``load_ms``           session + tokenizer load, paid once per worker
+* ``p50/p95/p99_ms``    single-query ``encode`` over the support-doc questions
+* ``texts_per_s@N``     throughput at batch size N
+
+Without ``--model-dir`` a small random stand-in model is generated in a
+temporary directory (see ``bench_common.build_stand_in_onnx_model``), which
+measures the runtime plumbing; pass an export from
+``scripts/export_local_embedder.py`` for real MiniLM numbers.
+
+    python scripts/bench_local_embedding.py
+    python scripts/bench_local_embedding.py --model-dir models/minilm --threads 2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+from api.services.embeddings import _LocalWrapper  # noqa: E402
+from bench_common import build_stand_in_onnx_model, latency_summary, load_eval_queries, print_table  # noqa: E402
+
+
+def bench(model_dir: str, rounds: int, batch_sizes):
+    queries = [q["query"] for q in load_eval_queries()][:rounds]
+    rows = []
+    for model_file in _LocalWrapper.MODEL_FILES:
+        if not os.path.exists(os.path.join(model_dir, model_file)):
+            continue
+        os.environ["LOCAL_EMBEDDING_MODEL_FILE"] = model_file
+        t0 = time.perf_counter()
+        wrapper = _LocalWrapper(model_dir)
+        load_ms = (time.perf_counter() - t0) * 1000.0
+        wrapper.encode(queries[0])  # first run allocates arenas
+
+        samples = []
+        for q in queries:
+            t0 = time.perf_counter()
+            wrapper.encode(q)
+            samples.append(time.perf_counter() - t0)
+        row = {"model": model_file, "load_ms": load_ms}
+        row.update({k: v for k, v in latency_summary(samples).items() if k != "mean_ms"})
+
+        for n in batch_sizes:
+            batches = [queries[i:i + n] for i in range(0, len(queries), n)]
+            t0 = time.perf_counter()
+            for b in batches:
+                wrapper.encode(b)
+            row[f"texts_per_s@{n}"] = len(queries) / (time.perf_counter() - t0)
+        rows.append(row)
+    os.environ.pop("LOCAL_EMBEDDING_MODEL_FILE", None)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", help="Exported model directory; default builds a stand-in")
+    parser.add_argument("--rounds", type=int, default=180, help="Queries to encode (max 180)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--threads", type=int, help="Sets LOCAL_EMBEDDING_THREADS")
+    args = parser.parse_args()
+    if args.threads:
+        os.environ["LOCAL_EMBEDDING_THREADS"] = str(args.threads)
+
+    if args.model_dir:
+        print_table(bench(args.model_dir, args.rounds, args.batch_sizes))
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        build_stand_in_onnx_model(tmp)
+        print_table(bench(tmp, args.rounds, args.batch_sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# scripts/bench_quantization.py
+"""Compare float32, int8 scalar and binary quantized storage for support_docs.
+
+For each storage variant a collection is built from a synthetic corpus (100x
+``data/support_docs.txt`` by default) and queried with every ``Q:`` line in
+the support docs. Reported per variant:
+
+* ``est_ram_mb``  vector bytes resident in RAM, derived from the collection
+  config (float32 originals count as zero when stored on disk)
+* ``p50_ms`` / ``p99_ms``  query latency as seen by the client
+* ``recall@5``  overlap with an exact float32 search, the ground truth
+
+Quantization is a server-side feature (local ``:memory:`` mode ignores it),
+so this needs a running Qdrant:
+
+    docker run -p 6333:6333 qdrant/qdrant
+    python scripts/bench_quantization.py --qdrant-url http://localhost:6333
+    python scripts/bench_quantization.py --model sentence-transformers/all-MiniLM-L6-v2 --oversampling 3
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ingest  # noqa: E402
+from bench_common import (  # noqa: E402
+    HashingEncoder,
+    latency_summary,
+    load_eval_queries,
+    print_table,
+    synthetic_corpus,
+)
+
+# (name, quantization, on_disk)
+VARIANTS = [
+    ("float32", "none", False),
+    ("scalar", "scalar", False),
+    ("scalar+disk", "scalar", True),
+    ("binary", "binary", False),
+    ("binary+disk", "binary", True),
+]
+
+
+class _CachedEncoder:
+    """Encode each text once, however many variants get built from it."""
+
+    def __init__(self, encoder):
+        self._encoder = encoder
+        self._cache = {}
+
+    def encode(self, x, batch_size=None, **kwargs):
+        if isinstance(x, str):
+            return self.encode([x], batch_size=batch_size)[0]
+        missing = [t for t in x if t not in self._cache]
+        if missing:
+            for text, vec in zip(missing, self._encoder.encode(missing, batch_size=batch_size)):
+                self._cache[text] = vec
+        return [self._cache[t] for t in x]
+
+
+def _est_ram_bytes(n: int, dim: int, quantization: str, on_disk: bool) -> int:
+    original = 0 if on_disk else n * dim * 4
+    if quantization == "scalar":
+        return original + n * dim
+    if quantization == "binary":
+        return original + n * math.ceil(dim / 8)
+    return original
+
+
+def _wait_green(client, name: str, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if str(client.get_collection(name).status).lower().endswith("green"):
+            return
+        time.sleep(0.5)
+
+
+def _query(client, name, vector, k, params=None):
+    kwargs = {"search_params": params} if params is not None else {}
+    return client.query_points(collection_name=name, query=vector, limit=k, with_payload=False, **kwargs).points
+
+
+def main() -> None:
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import QuantizationSearchParams, SearchParams
+
+    parser = argparse.ArgumentParser(description="Quantized storage benchmark")
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--model", default=None, help="SentenceTransformers model (default: hashing stand-in)")
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--repeats", type=int, default=5, help="passes over the eval queries")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark collections")
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.qdrant_url, api_key=os.getenv("QDRANT_KEY"))
+    encoder = _CachedEncoder(ingest.load_encoder(args.model) if args.model else HashingEncoder())
+    queries = [encoder.encode(q["query"]) for q in load_eval_queries()]
+    queries = [v.tolist() if hasattr(v, "tolist") else list(v) for v in queries]
+    k = 5
+
+    rows = []
+    names = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            synthetic_corpus(tmp, scale=args.scale)
+            for label, quantization, on_disk in VARIANTS:
+                name = f"bench_quant_{label.replace('+', '_')}"
+                names.append((label, name, quantization, on_disk))
+                ingest.run_ingest(
+                    client, encoder, data_dir=tmp, collection_name=name,
+                    rebuild=True, quantization=quantization, on_disk=on_disk,
+                )
+                _wait_green(client, name)
+
+        baseline = names[0][1]
+        truth = [
+            {p.id for p in _query(client, baseline, v, k, SearchParams(exact=True))}
+            for v in queries
+        ]
+
+        for label, name, quantization, on_disk in names:
+            n = client.count(name).count
+            modes = [("-", None)]
+            if quantization != "none":
+                modes = [
+                    ("rescore", SearchParams(quantization=QuantizationSearchParams(
+                        rescore=True, oversampling=args.oversampling))),
+                    ("no-rescore", SearchParams(quantization=QuantizationSearchParams(rescore=False))),
+                ]
+            for mode, params in modes:
+                latencies = []
+                hits = 0
+                for _ in range(args.repeats):
+                    for vec, expected in zip(queries, truth):
+                        t0 = time.perf_counter()
+                        got = _query(client, name, vec, k, params)
+                        latencies.append(time.perf_counter() - t0)
+                        hits += len(expected & {p.id for p in got})
+                summary = latency_summary(latencies)
+                rows.append({
+                    "variant": label,
+                    "search": mode,
+                    "points": n,
+                    "est_ram_mb": _est_ram_bytes(n, ingest.VECTOR_SIZE, quantization, on_disk) / 1e6,
+                    "p50_ms": summary["p50_ms"],
+                    "p99_ms": summary["p99_ms"],
+                    "recall@5": hits / (args.repeats * sum(len(t) for t in truth) or 1),
+                })
+    finally:
+        if not args.keep:
+            for _, name, _, _ in names:
+                if client.collection_exists(name):
+                    client.delete_collection(name)
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# scripts/eval_adaptive_k.py
+"""Offline evaluation of adaptive top-k retrieval.
+
+Indexes ``data/`` into an in-memory Qdrant collection, then runs every
+``Q:`` line of the support docs through ``search_vectors`` in fixed top-k
+mode and under a sweep of adaptive settings. For each run it packs the
+context exactly as ``chat()`` does and reports:
+
+* ``avg_chunks``      hits kept per query
+* ``avg_ctx_tokens``  prompt context tokens per query
+* ``tokens_saved``    relative to fixed top-k
+* ``hit_rate``        share of queries whose reference answer is in the context
+
+    python scripts/eval_adaptive_k.py
+    python scripts/eval_adaptive_k.py --model sentence-transformers/all-MiniLM-L6-v2
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import ingest  # noqa: E402
+from api.services import vector_store  # noqa: E402
+from api.services.context import pack_context  # noqa: E402
+from bench_common import HashingEncoder, load_eval_queries, print_table  # noqa: E402
+
+ADAPTIVE_ENV = ("RETRIEVAL_MODE", "ADAPTIVE_MIN_K", "ADAPTIVE_MAX_K", "ADAPTIVE_MAX_GAP", "ADAPTIVE_MASS")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _run(vectors, answers, top_k, threshold, budget, env):
+    for key in ADAPTIVE_ENV:
+        os.environ.pop(key, None)
+    os.environ.update(env)
+    chunks = tokens = hits = 0
+    for vec, answer in zip(vectors, answers):
+        results = asyncio.run(vector_store.search_vectors(vec, top_k=top_k, threshold=threshold))
+        context, stats = pack_context(results, budget=budget)
+        chunks += len(results)
+        tokens += stats["context_tokens_packed"]
+        hits += answer in _normalize(context)
+    n = len(vectors) or 1
+    return chunks / n, tokens / n, hits / n
+
+
+def main() -> None:
+    from qdrant_client import QdrantClient
+
+    parser = argparse.ArgumentParser(description="Adaptive top-k evaluation")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(HERE), "data"))
+    parser.add_argument("--model", default=None, help="SentenceTransformers model (default: hashing stand-in)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--budget", type=int, default=None, help="context token budget (default: CONTEXT_TOKEN_BUDGET)")
+    args = parser.parse_args()
+
+    encoder = ingest.load_encoder(args.model) if args.model else HashingEncoder()
+    client = QdrantClient(":memory:")
+    ingest.run_ingest(client, encoder, data_dir=args.data_dir, collection_name="eval_docs", workers=1)
+    vector_store._get_client = lambda: client
+    os.environ["QDRANT_COLLECTION"] = "eval_docs"
+
+    pairs = load_eval_queries()
+    vectors = [v.tolist() if hasattr(v, "tolist") else list(v) for v in encoder.encode([p["query"] for p in pairs])]
+    answers = [_normalize(p["answer"]) for p in pairs]
+
+    runs = [("fixed", "-", {})]
+    for min_k, gap, mass in itertools.product((1, 2), (0.05, 0.1), (0.8, 0.9)):
+        runs.append((
+            "adaptive",
+            f"min_k={min_k} gap={gap} mass={mass}",
+            {
+                "RETRIEVAL_MODE": "adaptive",
+                "ADAPTIVE_MIN_K": str(min_k),
+                "ADAPTIVE_MAX_K": str(args.top_k),
+                "ADAPTIVE_MAX_GAP": str(gap),
+                "ADAPTIVE_MASS": str(mass),
+            },
+        ))
+
+    rows = []
+    baseline_tokens = None
+    for mode, params, env in runs:
+        avg_chunks, avg_tokens, hit_rate = _run(vectors, answers, args.top_k, args.threshold, args.budget, env)
+        baseline_tokens = baseline_tokens or avg_tokens
+        rows.append({
+            "mode": mode,
+            "params": params,
+            "avg_chunks": avg_chunks,
+            "avg_ctx_tokens": avg_tokens,
+            "tokens_saved": 1 - avg_tokens / baseline_tokens if baseline_tokens else 0.0,
+            "hit_rate": hit_rate,
+        })
+    print(f"{len(pairs)} eval queries")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
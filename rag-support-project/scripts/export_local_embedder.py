@@ -0,0 +1,75 @@
+# scripts/export_local_embedder.py
+"""Export the ingest model to ONNX for ``EMBEDDING_PROVIDER=local``.
+
+Writes ``model.onnx`` (the transformer, emitting ``last_hidden_state``) and
+``tokenizer.json`` to ``--out``; pooling and normalisation happen in
+``_LocalWrapper``. ``--int8`` also writes ``model_int8.onnx`` with dynamic
+int8 weight quantization, which the API prefers when present.
+
+Needs torch, transformers and onnxruntime at export time only; the API
+itself loads the result with onnxruntime and tokenizers.
+
+    python scripts/export_local_embedder.py --out models/minilm --int8
+    LOCAL_EMBEDDING_MODEL_DIR=models/minilm EMBEDDING_PROVIDER=local uvicorn api.main:app
+"""
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from ingest import MODEL_NAME  # noqa: E402
+
+
+def export(model_name: str, out_dir: str, opset: int = 17) -> str:
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.backend_tokenizer.save(os.path.join(out_dir, "tokenizer.json"))
+
+    sample = tokenizer(["an example query", "another one"], padding=True, return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic = {n: {0: "batch", 1: "sequence"} for n in names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in names),
+            path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=opset,
+        )
+    return path
+
+
+def quantize_int8(model_path: str) -> str:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out = os.path.join(os.path.dirname(model_path), "model_int8.onnx")
+    quantize_dynamic(model_path, out, weight_type=QuantType.QInt8)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--out", default="models/minilm")
+    parser.add_argument("--int8", action="store_true", help="Also write a dynamically quantized int8 model")
+    args = parser.parse_args()
+
+    path = export(args.model, args.out)
+    print(f"Wrote {path}")
+    if args.int8:
+        print(f"Wrote {quantize_int8(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# scripts/fake_services.py
+"""Local stand-ins for the paid services the API calls, for load testing.
+
+* embeddings  OpenAI/Groq-compatible ``POST .../embeddings`` (float or
+              base64), deterministic vectors, optional fixed latency
+* llm         Groq/OpenAI ``POST .../chat/completions``; streaming responses
+              wait ``ttft_ms`` before the first token, then emit tokens at
+              ``tokens_per_s``
+* qdrant      ``POST /collections/{name}/points/query`` (and ``/query/batch``)
+              answering with chunks of ``data/`` at scores above the API's
+              0.7 threshold
+
+``start_fake_services()`` runs all three on ephemeral ports in background
+threads and returns the environment that points the API at them. That
+environment also turns off the FAQ fast path and session retrieval reuse, so
+every request reaches the fakes (``--fast-paths`` keeps them on). Run this
+file directly to keep them up for an API started separately:
+
+    python scripts/fake_services.py --ttft-ms 300 --tokens-per-s 50
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import numpy as np  # noqa: E402
+
+from bench_common import SUPPORT_DOCS  # noqa: E402
+
+ANSWER = (
+    "Thanks for reaching out! You can reset your password from the sign-in page by "
+    "choosing Forgot password and following the link we email you. The link expires "
+    "after 24 hours, so request a new one if it stops working. Let me know if there "
+    "is anything else I can help with today."
+).split()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # One connection per request keeps streaming simple: the body ends when
+    # the socket closes, so no chunked encoding is needed.
+    protocol_version = "HTTP/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _json(self, payload, status: int = 200) -> None:
+        out = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+
+def _vector(text: str, dim: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+    vec = np.random.default_rng(seed).normal(size=dim).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def embeddings_handler(dim: int = 384, latency_ms: float = 0.0):
+    class Handler(_Handler):
+        def do_POST(self):
+            body = self._body()
+            texts = body.get("input") or []
+            texts = [texts] if isinstance(texts, str) else texts
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            as_base64 = body.get("encoding_format") == "base64"
+            data = []
+            for i, text in enumerate(texts):
+                vec = _vector(text, dim)
+                emb = base64.b64encode(vec.tobytes()).decode() if as_base64 else vec.tolist()
+                data.append({"object": "embedding", "index": i, "embedding": emb})
+            self._json({"object": "list", "data": data, "model": body.get("model", "fake")})
+
+    return Handler
+
+
+def llm_handler(ttft_ms: float = 200.0, tokens_per_s: float = 100.0, max_tokens: int = len(ANSWER)):
+    interval = 1.0 / tokens_per_s if tokens_per_s > 0 else 0.0
+
+    class Handler(_Handler):
+        def do_POST(self):
+            body = self._body()
+            n = min(max_tokens, int(body.get("max_tokens") or max_tokens))
+            tokens = [ANSWER[i % len(ANSWER)] + " " for i in range(n)]
+            base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": body.get("model", "fake")}
+            time.sleep(ttft_ms / 1000.0)
+
+            if not body.get("stream"):
+                time.sleep(interval * max(0, n - 1))
+                self._json({
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": n, "total_tokens": n},
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(interval)
+                chunk = {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            done = {**base, "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode())
+
+    return Handler
+
+
+def _support_chunks(limit: int = 200) -> List[str]:
+    with open(SUPPORT_DOCS, encoding="utf-8") as f:
+        paragraphs = [p.strip() for p in f.read().split("\n\n") if p.strip()]
+    return paragraphs[:limit] or ["(empty knowledge base)"]
+
+
+def qdrant_handler(latency_ms: float = 0.0):
+    chunks = _support_chunks()
+
+    def _points(query, limit: int):
+        # The REST client may wrap the vector, e.g. {"nearest": [...]}.
+        while isinstance(query, dict):
+            query = next(iter(query.values()), None)
+        start = int(abs(float(query[0])) * 1e6) % len(chunks) if query else 0
+        return [
+            {
+                "id": (start + i) % len(chunks),
+                "version": 0,
+                "score": 0.95 - 0.04 * i,
+                "payload": {"text": chunks[(start + i) % len(chunks)], "source": "support_docs.txt"},
+            }
+            for i in range(limit)
+        ]
+
+    class Handler(_Handler):
+        def do_GET(self):
+            if self.path.rstrip("/") == "":
+                self._json({"title": "qdrant - vector search engine", "version": "1.16.0"})
+            else:
+                self._json({"status": {"error": "not found"}}, status=404)
+
+        def do_POST(self):
+            body = self._body()
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            if self.path.endswith("/points/query/batch"):
+                result = [{"points": _points(r.get("query"), int(r.get("limit", 5)))}
+                          for r in body.get("searches", [])]
+            elif self.path.endswith("/points/query"):
+                result = {"points": _points(body.get("query"), int(body.get("limit", 5)))}
+            else:
+                self._json({"status": {"error": "not found"}}, status=404)
+                return
+            self._json({"result": result, "status": "ok", "time": 0.0})
+
+    return Handler
+
+
+class FakeServices:
+    def __init__(self, servers: Dict[str, ThreadingHTTPServer]):
+        self.servers = servers
+
+    def url(self, name: str) -> str:
+        host, port = self.servers[name].server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def env(self) -> Dict[str, str]:
+        """Environment that points the API at the fakes instead of paid services."""
+        return {
+            "DEV_MODE": "false",
+            "EMBEDDING_PROVIDER": "openai",
+            "OPENAI_API_KEY": "fake",
+            "OPENAI_EMBEDDINGS_URL": self.url("embeddings") + "/v1/embeddings",
+            "GROQ_API_KEY": "fake",
+            "GROQ_BASE_URL": self.url("llm"),
+            "QDRANT_URL": self.url("qdrant"),
+            "QDRANT_KEY": "",
+            # Shortcuts would answer the benchmark queries without the fakes
+            "FAQ_FAST_PATH": "false",
+            "SESSION_REUSE": "false",
+        }
+
+    def stop(self) -> None:
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+def start_fake_services(
+    ttft_ms: float = 200.0,
+    tokens_per_s: float = 100.0,
+    embed_latency_ms: float = 0.0,
+    qdrant_latency_ms: float = 0.0,
+    dim: int = 384,
+    host: str = "127.0.0.1",
+) -> FakeServices:
+    handlers = {
+        "embeddings": embeddings_handler(dim, embed_latency_ms),
+        "llm": llm_handler(ttft_ms, tokens_per_s),
+        "qdrant": qdrant_handler(qdrant_latency_ms),
+    }
+    servers = {}
+    for name, handler in handlers.items():
+        server = ThreadingHTTPServer((host, 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=f"fake-{name}", daemon=True).start()
+        servers[name] = server
+    return FakeServices(servers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-s", type=float, default=100.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=0.0)
+    parser.add_argument("--fast-paths", action="store_true", help="Keep FAQ answers and session reuse enabled")
+    args = parser.parse_args()
+
+    services = start_fake_services(args.ttft_ms, args.tokens_per_s, args.embed_latency_ms, args.qdrant_latency_ms)
+    env = dict(services.env)
+    if args.fast_paths:
+        env.update(FAQ_FAST_PATH="true", SESSION_REUSE="true")
+    for key, value in env.items():
+        print(f"export {key}={value}")
+    print("# Ctrl-C to stop", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        services.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,70 @@
 # scripts/ingest.py
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, VectorParams, Distance
-from dotenv import load_dotenv
+"""Stream documents from ``data/`` into the Qdrant ``support_docs`` collection.
+
+The pipeline is lazy end to end: files are read one at a time, chunks are
+grouped into fixed-size upload batches, each batch is encoded in CPU-sized
+sub-batches and handed to a small pool of uploader threads.
+
+Ingestion is incremental. Every chunk gets a deterministic point ID derived
+from its source file and content hash, so a run only embeds chunks that are
+not already in the collection and deletes points whose chunk has vanished.
+The same diff makes an interrupted run resumable: whatever was uploaded
+before the interruption is simply skipped next time.
+
+The API never queries a concrete collection: ``support_docs`` is a Qdrant
+alias. A full rebuild is written into a new versioned collection
+(``support_docs_v<timestamp>``), checked against a validation query set, and
+only then swapped in with a single atomic alias update. Previous versions are
+kept so a bad release can be rolled back instantly.
+
+Usage (from the project root):
+
+    python scripts/ingest.py                # incremental update of the live version
+    python scripts/ingest.py --workers 4 --batch-size 256
+    python scripts/ingest.py --rebuild      # blue/green: build, validate, swap alias
+    python scripts/ingest.py --rollback     # point the alias back at the previous version
+    python scripts/ingest.py --rebuild --quantization scalar --on-disk
+"""
+import argparse
+import hashlib
+import json
+import logging
 import os
-from tqdm import tqdm
+import time
+import uuid
+from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Init
-model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_KEY"))
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = os.getenv("QDRANT_COLLECTION", "support_docs")
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+VECTOR_SIZE = 384
+
+DEFAULT_DATA_DIR = "data/"
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_KEEP_VERSIONS = 3
+DEFAULT_MIN_PASS_RATE = 0.8
+DEFAULT_VALIDATION_QUERIES = os.path.join(os.path.dirname(__file__), "validation_queries.json")
+
+# Fixed namespace so point IDs are stable across machines and runs.
+POINT_ID_NAMESPACE = uuid.UUID("5b0c6f2e-3d4a-4c1e-9a57-2f7f1d8e6b90")
+
 
-# Create collection (replace deprecated recreate_collection)
-collection_name = "support_docs"
-if client.collection_exists(collection_name):
-    client.delete_collection(collection_name)
+def default_encode_batch_size() -> int:
+    """Encoder sub-batch size scaled to the available CPU cores."""
+    cpus = os.cpu_count() or 1
+    return max(16, min(128, 16 * cpus))
 
-client.create_collection(
-    collection_name=collection_name,
-    vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-)
 
 # Load and chunk documents
 def chunk_text(text, chunk_size=500, overlap=50):
@@ -32,22 +75,520 @@ def chunk_text(text, chunk_size=500, overlap=50):
         chunks.append(chunk)
     return chunks
 
-docs = []
-for filename in os.listdir("data/"):
-    with open(f"data/{filename}") as f:
-        text = f.read()
-        chunks = chunk_text(text)
-        docs.extend([(filename, chunk) for chunk in chunks])
-
-# Generate embeddings and upsert
-points = []
-for idx, (source, text) in enumerate(tqdm(docs)):
-    embedding = model.encode(text).tolist()
-    points.append(PointStruct(
-        id=idx,
-        vector=embedding,
-        payload={"text": text, "source": source}
-    ))
-
-client.upsert(collection_name="support_docs", points=points)
-print(f"✅ Upserted {len(points)} vectors")
\ No newline at end of file
+
+def iter_documents(data_dir: str = DEFAULT_DATA_DIR) -> Iterator[Tuple[str, str]]:
+    """Yield ``(source, chunk)`` pairs, reading one file at a time.
+
+    Files are visited in sorted order so runs are reproducible.
+    """
+    for filename in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, filename)
+        if not os.path.isfile(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        for chunk in chunk_text(text):
+            yield filename, chunk
+
+
+def iter_batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id(source: str, text: str) -> str:
+    """Deterministic point ID for a chunk: same source + same text, same ID.
+
+    Qdrant only accepts unsigned ints or UUIDs, so the (source, content hash)
+    pair is folded into a UUIDv5.
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source}\x00{content_hash(text)}"))
+
+
+def fetch_existing_ids(client, collection_name: str, page_size: int = 1024) -> Set[Any]:
+    """Scroll the collection and return every point ID (no payloads or vectors).
+
+    IDs keep their Qdrant type, so integer IDs left by older positional
+    ingests are recognised as vanished and deleted.
+    """
+    ids: Set[Any] = set()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        ids.update(p.id for p in points)
+        if offset is None:
+            return ids
+
+
+def call_with_retry(
+    fn: Callable[..., Any],
+    *args: Any,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    base_delay: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep,
+    **kwargs: Any,
+) -> Any:
+    """Call a Qdrant client method, retrying transient failures with exponential backoff."""
+    delay = base_delay
+    for attempt in range(1, max_retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt >= max_retries:
+                logger.error("Qdrant call failed on attempt %d/%d: %s", attempt, max_retries, e)
+                raise
+            logger.warning(
+                "Qdrant call failed; retrying in %.1fs (attempt %d/%d): %s",
+                delay,
+                attempt,
+                max_retries,
+                e,
+            )
+            sleep(delay)
+            delay *= 2
+
+
+def upsert_with_retry(
+    client,
+    collection_name: str,
+    points: List[Any],
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    base_delay: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> None:
+    """Upsert one batch, retrying transient failures with exponential backoff."""
+    call_with_retry(
+        client.upsert,
+        collection_name=collection_name,
+        points=points,
+        wait=True,
+        max_retries=max_retries,
+        base_delay=base_delay,
+        sleep=sleep,
+    )
+
+
+QUANTIZATION_CHOICES = ("none", "scalar", "binary")
+
+
+def quantization_config(kind: str = "none"):
+    """Qdrant quantization config for ``kind``.
+
+    Quantized vectors always stay in RAM; combined with ``on_disk=True`` the
+    float32 originals live on disk and are only read to rescore candidates.
+    """
+    from qdrant_client.models import (
+        BinaryQuantization,
+        BinaryQuantizationConfig,
+        ScalarQuantization,
+        ScalarQuantizationConfig,
+        ScalarType,
+    )
+
+    if kind == "none":
+        return None
+    if kind == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    raise ValueError(f"Unknown quantization {kind!r}; expected one of {QUANTIZATION_CHOICES}")
+
+
+def ensure_collection(
+    client,
+    collection_name: str,
+    recreate: bool,
+    quantization: str = "none",
+    on_disk: bool = False,
+) -> None:
+    """Create the collection if needed.
+
+    Storage options only take effect when the collection is (re)created, so
+    switching them means a ``--rebuild``.
+    """
+    from qdrant_client.models import Distance, VectorParams
+
+    if recreate and client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    if not client.collection_exists(collection_name):
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE, on_disk=on_disk),
+            quantization_config=quantization_config(quantization),
+        )
+
+
+def stamp_version(client, collection_name: str) -> None:
+    """Record a new ``index_version`` in the collection metadata.
+
+    API replicas (``VECTOR_BACKEND=local``) compare it to decide when to
+    reload. Older Qdrant servers without collection metadata just log.
+    """
+    try:
+        client.update_collection(collection_name, metadata={"index_version": uuid.uuid4().hex})
+    except Exception as e:
+        logger.warning("Could not stamp index version on %s: %s", collection_name, e)
+
+
+def run_ingest(
+    client,
+    encoder,
+    data_dir: str = DEFAULT_DATA_DIR,
+    collection_name: str = COLLECTION_NAME,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    encode_batch_size: Optional[int] = None,
+    workers: int = DEFAULT_WORKERS,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    rebuild: bool = False,
+    quantization: str = "none",
+    on_disk: bool = False,
+    progress: bool = False,
+) -> Dict[str, Any]:
+    """Bring the collection in line with the chunks under ``data_dir``.
+
+    Chunks whose ID is already present are left alone; new or edited chunks
+    are embedded and upserted; points whose chunk no longer exists are
+    deleted once all upserts have landed. ``encoder`` is anything with a
+    SentenceTransformers-style ``encode(texts, batch_size=...)``.
+    ``quantization`` and ``on_disk`` apply when the collection is created.
+    Returns a stats dict (chunks, upserted, unchanged, deleted, seconds).
+    """
+    from qdrant_client.models import PointIdsList, PointStruct
+
+    encode_batch_size = encode_batch_size or default_encode_batch_size()
+    ensure_collection(
+        client, collection_name, recreate=rebuild, quantization=quantization, on_disk=on_disk
+    )
+    existing = fetch_existing_ids(client, collection_name)
+    logger.info("Collection %s holds %d points", collection_name, len(existing))
+
+    bar = None
+    if progress:
+        from tqdm import tqdm
+
+        bar = tqdm(unit="chunk")
+
+    stats = {"chunks": 0, "upserted": 0, "unchanged": 0, "deleted": 0}
+    started = time.perf_counter()
+    seen: Set[str] = set()
+    # Keep at most two batches per worker in flight so memory stays bounded
+    # no matter how large the corpus is.
+    max_in_flight = max(1, workers) * 2
+    in_flight: Dict[Any, int] = {}
+
+    def _drain(block_until: int) -> None:
+        error: Optional[BaseException] = None
+        while len(in_flight) > block_until:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for fut in done:
+                n = in_flight.pop(fut)
+                if fut.exception() is not None:
+                    error = error or fut.exception()
+                    continue
+                stats["upserted"] += n
+                if bar is not None:
+                    bar.update(n)
+            if error is not None:
+                # Let the other uploads land before surfacing the failure;
+                # whatever made it in is skipped by the next run's diff.
+                block_until = 0
+        if error is not None:
+            raise error
+
+    def _changed_chunks() -> Iterator[Tuple[str, str, str]]:
+        for source, text in iter_documents(data_dir):
+            pid = point_id(source, text)
+            if pid in seen:
+                continue
+            seen.add(pid)
+            stats["chunks"] += 1
+            if pid in existing:
+                stats["unchanged"] += 1
+                if bar is not None:
+                    bar.update(1)
+                continue
+            yield pid, source, text
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for batch in iter_batches(_changed_chunks(), batch_size):
+            texts = [text for _, _, text in batch]
+            vectors = encoder.encode(texts, batch_size=encode_batch_size)
+            points = [
+                PointStruct(
+                    id=pid,
+                    vector=vector.tolist() if hasattr(vector, "tolist") else list(vector),
+                    payload={"text": text, "source": source, "content_hash": content_hash(text)},
+                )
+                for (pid, source, text), vector in zip(batch, vectors)
+            ]
+            fut = pool.submit(
+                upsert_with_retry, client, collection_name, points, max_retries
+            )
+            in_flight[fut] = len(points)
+            _drain(max_in_flight - 1)
+        _drain(0)
+
+    vanished = list(existing - seen)
+    for batch in iter_batches(vanished, batch_size):
+        call_with_retry(
+            client.delete,
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=batch),
+            max_retries=max_retries,
+        )
+        stats["deleted"] += len(batch)
+
+    if rebuild or stats["upserted"] or stats["deleted"]:
+        stamp_version(client, collection_name)
+
+    if bar is not None:
+        bar.close()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+# ============================================================================
+# BLUE/GREEN VERSIONS BEHIND AN ALIAS
+# ============================================================================
+
+def versioned_name(alias: str, now: Optional[datetime] = None) -> str:
+    # Fixed-width timestamps sort lexicographically in build order.
+    now = now or datetime.now(timezone.utc)
+    return f"{alias}_v{now:%Y%m%d%H%M%S%f}"
+
+
+def resolve_alias(client, alias: str) -> Optional[str]:
+    """Return the collection ``alias`` currently points at, or None."""
+    for desc in client.get_aliases().aliases:
+        if desc.alias_name == alias:
+            return desc.collection_name
+    return None
+
+
+def list_versions(client, alias: str) -> List[str]:
+    """Versioned collections built for ``alias``, oldest first."""
+    prefix = f"{alias}_v"
+    names = [c.name for c in client.get_collections().collections]
+    return sorted(n for n in names if n.startswith(prefix))
+
+
+def swap_alias(client, alias: str, target: str) -> Optional[str]:
+    """Atomically repoint ``alias`` at ``target``; return the previous target."""
+    from qdrant_client.models import (
+        CreateAlias,
+        CreateAliasOperation,
+        DeleteAlias,
+        DeleteAliasOperation,
+    )
+
+    previous = resolve_alias(client, alias)
+    if previous is None and alias in {c.name for c in client.get_collections().collections}:
+        # One-time migration from the pre-alias layout, where ``support_docs``
+        # was a real collection. An alias cannot share its name, so the old
+        # collection has to go first; this is the only non-atomic step.
+        logger.warning("Dropping legacy collection %s to replace it with an alias", alias)
+        client.delete_collection(alias)
+
+    operations = []
+    if previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=alias))
+    )
+    client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info("Alias %s: %s -> %s", alias, previous, target)
+    return previous
+
+
+def prune_versions(client, alias: str, keep: int) -> List[str]:
+    """Delete the oldest versions so at most ``keep`` remain; never the live one."""
+    live = resolve_alias(client, alias)
+    versions = list_versions(client, alias)
+    removed = []
+    for name in versions[: max(0, len(versions) - keep)]:
+        if name == live:
+            continue
+        client.delete_collection(name)
+        removed.append(name)
+    return removed
+
+
+def load_validation_queries(path: str = DEFAULT_VALIDATION_QUERIES) -> List[Dict[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def validate_collection(
+    client,
+    encoder,
+    collection_name: str,
+    queries: List[Dict[str, str]],
+    top_k: int = 5,
+    min_pass_rate: float = DEFAULT_MIN_PASS_RATE,
+) -> Dict[str, Any]:
+    """Run the validation set against ``collection_name`` before it goes live.
+
+    A query passes when any of its top-k hits contains the ``expect`` text.
+    """
+    failures = []
+    for item in queries:
+        vector = encoder.encode(item["query"])
+        vector = vector.tolist() if hasattr(vector, "tolist") else list(vector)
+        hits = client.query_points(
+            collection_name=collection_name, query=vector, limit=top_k, with_payload=True
+        ).points
+        expect = item["expect"].lower()
+        if not any(expect in (h.payload or {}).get("text", "").lower() for h in hits):
+            failures.append(item["query"])
+    total = len(queries)
+    pass_rate = (total - len(failures)) / total if total else 1.0
+    return {
+        "points": client.count(collection_name).count,
+        "queries": total,
+        "pass_rate": pass_rate,
+        "failures": failures,
+        "ok": pass_rate >= min_pass_rate,
+    }
+
+
+def blue_green_rebuild(
+    client,
+    encoder,
+    alias: str = COLLECTION_NAME,
+    queries: Optional[List[Dict[str, str]]] = None,
+    min_pass_rate: float = DEFAULT_MIN_PASS_RATE,
+    keep: int = DEFAULT_KEEP_VERSIONS,
+    **ingest_kwargs: Any,
+) -> Dict[str, Any]:
+    """Build a fresh version, validate it and swap the alias to it.
+
+    Search keeps hitting the old version throughout; if validation fails the
+    new collection is dropped and the alias is left untouched.
+    """
+    target = versioned_name(alias)
+    stats = run_ingest(client, encoder, collection_name=target, rebuild=True, **ingest_kwargs)
+    report = validate_collection(
+        client, encoder, target, queries or [], min_pass_rate=min_pass_rate
+    )
+    stats.update(collection=target, validation=report)
+    if not report["points"] or not report["ok"]:
+        client.delete_collection(target)
+        raise RuntimeError(
+            f"Validation failed for {target}: pass rate {report['pass_rate']:.0%}, "
+            f"{report['points']} points, failing queries: {report['failures']}"
+        )
+    stats["previous"] = swap_alias(client, alias, target)
+    stats["pruned"] = prune_versions(client, alias, keep)
+    return stats
+
+
+def rollback(client, alias: str = COLLECTION_NAME) -> str:
+    """Point ``alias`` back at the newest version older than the live one."""
+    live = resolve_alias(client, alias)
+    older = [v for v in list_versions(client, alias) if live is None or v < live]
+    if not older:
+        raise RuntimeError(f"No earlier version of {alias} to roll back to")
+    swap_alias(client, alias, older[-1])
+    return older[-1]
+
+
+def load_encoder(model_name: str = MODEL_NAME):
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--alias", default=COLLECTION_NAME,
+                        help="alias the API searches through")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="points per Qdrant upsert")
+    parser.add_argument("--encode-batch-size", type=int, default=None,
+                        help="texts per encoder call (default scales with CPU count)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="parallel uploader threads")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES)
+    parser.add_argument("--rebuild", action="store_true",
+                        help="build a new version, validate it and swap the alias")
+    parser.add_argument("--rollback", action="store_true",
+                        help="point the alias back at the previous version and exit")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP_VERSIONS,
+                        help="versioned collections to keep for rollback")
+    parser.add_argument("--quantization", choices=QUANTIZATION_CHOICES, default="none",
+                        help="compress vectors in RAM (applies to new versions)")
+    parser.add_argument("--on-disk", action="store_true",
+                        help="keep original float32 vectors on disk (applies to new versions)")
+    parser.add_argument("--validation-queries", default=DEFAULT_VALIDATION_QUERIES)
+    parser.add_argument("--min-pass-rate", type=float, default=DEFAULT_MIN_PASS_RATE)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from qdrant_client import QdrantClient
+
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+    client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_KEY"))
+
+    if args.rollback:
+        print(f"↩️  {args.alias} now points at {rollback(client, args.alias)}")
+        return
+
+    encoder = load_encoder()
+    ingest_kwargs = dict(
+        data_dir=args.data_dir,
+        batch_size=args.batch_size,
+        encode_batch_size=args.encode_batch_size,
+        workers=args.workers,
+        max_retries=args.max_retries,
+        progress=True,
+    )
+    live = resolve_alias(client, args.alias)
+    if args.rebuild or live is None:
+        # No alias yet (first run, or the legacy single-collection layout):
+        # bootstrap through the same validated blue/green path.
+        stats = blue_green_rebuild(
+            client,
+            encoder,
+            alias=args.alias,
+            queries=load_validation_queries(args.validation_queries),
+            min_pass_rate=args.min_pass_rate,
+            keep=args.keep,
+            quantization=args.quantization,
+            on_disk=args.on_disk,
+            **ingest_kwargs,
+        )
+        print(
+            f"✅ Built {stats['collection']} ({stats['upserted']} vectors, "
+            f"validation {stats['validation']['pass_rate']:.0%}) in {stats['seconds']:.1f}s; "
+            f"{args.alias} switched from {stats['previous']}"
+        )
+        return
+
+    stats = run_ingest(client, encoder, collection_name=live, **ingest_kwargs)
+    print(
+        f"✅ {live}: upserted {stats['upserted']} vectors, kept {stats['unchanged']} unchanged, "
+        f"deleted {stats['deleted']} in {stats['seconds']:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
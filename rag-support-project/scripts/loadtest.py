@@ -0,0 +1,183 @@
+# scripts/loadtest.py
+"""Async load test of ``/api/chat`` against local fake services.
+
+By default this starts the fakes from ``fake_services.py``, launches the API
+under uvicorn pointed at them, and drives it with ``--concurrency`` virtual
+users for ``--requests`` requests per mode. For each mode it reports:
+
+* ``rps``                  completed requests per second
+* ``ttft_p50/p95/p99_ms``  time to first streamed answer frame (SSE only)
+* ``p50/p95/p99_ms``       end-to-end latency
+* ``overhead_p50_ms``      p50 latency minus the time the fakes spend by
+                           design (LLM TTFT + token pacing + configured
+                           embed/Qdrant latency): the API's own cost
+
+Each virtual user keeps one session and sends an untimed first message, so
+first-message clarification prompts don't skew the numbers. The FAQ fast
+path and session retrieval reuse are disabled unless ``--fast-paths`` is
+given, so every timed request embeds, searches and generates.
+
+    python scripts/loadtest.py
+    python scripts/loadtest.py --mode sse --concurrency 64 --requests 1000 --ttft-ms 400
+    python scripts/loadtest.py --base-url http://127.0.0.1:8000   # API already running
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+import httpx  # noqa: E402
+
+from bench_common import latency_summary, load_eval_queries, print_table  # noqa: E402
+from fake_services import ANSWER, start_fake_services  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(env, workers: int = 1, verbose: bool = False):
+    port = _free_port()
+    output = None if verbose else subprocess.DEVNULL
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, **env},
+        stdout=output,
+        stderr=output,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("API exited during startup")
+        try:
+            if httpx.get(base_url + "/api/health", timeout=1).status_code == 200:
+                return proc, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("API did not become healthy within 30s")
+
+
+async def _json_request(client, session_id, query):
+    t0 = time.perf_counter()
+    resp = await client.post(f"/api/chat?format=json&session_id={session_id}", json={"query": query})
+    resp.raise_for_status()
+    resp.json()
+    return time.perf_counter() - t0, None
+
+
+async def _sse_request(client, session_id, query):
+    t0 = time.perf_counter()
+    ttft = None
+    async with client.stream("POST", f"/api/chat?session_id={session_id}", json={"query": query}) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.aiter_text():
+            # The first frame carrying answer text, not the trailing metrics frame
+            if ttft is None and "data: " in chunk and '"type": "metrics"' not in chunk:
+                ttft = time.perf_counter() - t0
+    return time.perf_counter() - t0, ttft
+
+
+async def run_mode(base_url, mode, concurrency, total, queries):
+    request = _json_request if mode == "json" else _sse_request
+    latencies, ttfts, errors = [], [], []
+    counter = itertools.count()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        async def user(uid):
+            session_id = f"load-{mode}-{uid}-{uuid.uuid4().hex[:8]}"
+            await request(client, session_id, queries[uid % len(queries)])  # untimed warmup
+            while (i := next(counter)) < total:
+                try:
+                    latency, ttft = await request(client, session_id, queries[i % len(queries)])
+                    latencies.append(latency)
+                    if ttft is not None:
+                        ttfts.append(ttft)
+                except Exception as e:
+                    errors.append(repr(e))
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(user(u) for u in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    row = {"mode": mode, "requests": len(latencies), "errors": len(errors), "rps": len(latencies) / elapsed}
+    ttft = latency_summary(ttfts) if ttfts else {}
+    for k in ("p50_ms", "p95_ms", "p99_ms"):
+        row[f"ttft_{k}"] = ttft.get(k, "-")
+    row.update({k: v for k, v in latency_summary(latencies).items() if k != "mean_ms"})
+    if errors:
+        print(f"{mode}: {len(errors)} errors, first: {errors[0]}", file=sys.stderr)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Load an already-running API instead of starting one")
+    parser.add_argument("--mode", choices=["json", "sse", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per mode")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started API")
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-s", type=float, default=200.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=5.0)
+    parser.add_argument("--fast-paths", action="store_true", help="Keep FAQ answers and session reuse enabled")
+    parser.add_argument("--json-out", help="Also write the result rows to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the started API's logs")
+    args = parser.parse_args()
+
+    services = proc = None
+    base_url = args.base_url
+    try:
+        if not base_url:
+            services = start_fake_services(
+                ttft_ms=args.ttft_ms,
+                tokens_per_s=args.tokens_per_s,
+                embed_latency_ms=args.embed_latency_ms,
+                qdrant_latency_ms=args.qdrant_latency_ms,
+            )
+            env = dict(services.env)
+            if args.fast_paths:
+                env.update(FAQ_FAST_PATH="true", SESSION_REUSE="true")
+            proc, base_url = start_api(env, args.workers, args.verbose)
+
+        queries = [q["query"] for q in load_eval_queries()]
+        modes = ["json", "sse"] if args.mode == "both" else [args.mode]
+        rows = [asyncio.run(run_mode(base_url, m, args.concurrency, args.requests, queries)) for m in modes]
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if services is not None:
+            services.stop()
+
+    if not args.base_url:
+        floor_ms = (args.ttft_ms + 1000.0 * (len(ANSWER) - 1) / args.tokens_per_s
+                    + args.embed_latency_ms + args.qdrant_latency_ms)
+        for row in rows:
+            row["overhead_p50_ms"] = row["p50_ms"] - floor_ms
+    print_table(rows)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
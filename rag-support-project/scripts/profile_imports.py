@@ -0,0 +1,88 @@
+# scripts/profile_imports.py
+"""Per-module import cost of the API entry point.
+
+Imports ``--module`` (default ``api.index``, the Vercel entry point) in a
+fresh interpreter under ``python -X importtime`` and reports the most
+expensive modules by cumulative time, plus self time summed per top-level
+package, so it is obvious which dependency a cold start is paying for.
+
+    python scripts/profile_imports.py
+    python scripts/profile_imports.py --eager --top 40
+    python scripts/profile_imports.py --module api.main --json > imports.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from bench_common import print_table  # noqa: E402
+
+
+def run_python(code: str, env: Optional[Dict[str, str]] = None, importtime: bool = False):
+    """Run ``code`` in a fresh interpreter rooted at the project directory."""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    full_env = {**os.environ, "PYTHONPATH": PROJECT_ROOT, **(env or {})}
+    return subprocess.run(cmd, cwd=PROJECT_ROOT, env=full_env, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, object]]:
+    """Rows of ``{"module", "depth", "self_ms", "cumulative_ms"}`` from ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_ms": int(self_us) / 1000.0,
+            "cumulative_ms": int(cumulative_us) / 1000.0,
+        })
+    return rows
+
+
+def by_package(rows: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    totals: Dict[str, Dict[str, object]] = {}
+    for row in rows:
+        package = str(row["module"]).split(".")[0]
+        entry = totals.setdefault(package, {"package": package, "modules": 0, "self_ms": 0.0})
+        entry["modules"] += 1
+        entry["self_ms"] += row["self_ms"]
+    return sorted(totals.values(), key=lambda r: -r["self_ms"])
+
+
+def profile(module: str = "api.index", lazy: bool = True) -> List[Dict[str, object]]:
+    env = {"LAZY_IMPORTS": "true" if lazy else "false"}
+    result = run_python(f"import {module}", env=env, importtime=True)
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="api.index")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--eager", action="store_true", help="Profile with LAZY_IMPORTS=false")
+    parser.add_argument("--json", action="store_true", help="Dump all rows as JSON instead of tables")
+    args = parser.parse_args()
+
+    rows = profile(args.module, lazy=not args.eager)
+    if args.json:
+        json.dump({"modules": rows, "packages": by_package(rows)}, sys.stdout, indent=2)
+        return
+
+    total = sum(r["self_ms"] for r in rows)
+    print(f"{args.module}: {len(rows)} modules, {total:.1f} ms total import time\n")
+    top = sorted(rows, key=lambda r: -r["cumulative_ms"])[: args.top]
+    print_table([{k: r[k] for k in ("module", "cumulative_ms", "self_ms")} for r in top])
+    print()
+    print_table(by_package(rows)[: args.top])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import asyncio
+import importlib.util
+
+import pytest
+
+
+# The suite needs pytest-benchmark; without it there is nothing to collect.
+if importlib.util.find_spec("pytest_benchmark") is None:
+    collect_ignore_glob = ["test_*.py"]
+
+
+@pytest.fixture(autouse=True)
+def _single_pass_unless_benchmarking(request):
+    # A plain `pytest` run only checks the hot paths still work (one call
+    # each); timing runs under `--benchmark-only`, which is what
+    # scripts/bench_hot_paths.py uses.
+    if "benchmark" in request.fixturenames and not request.config.getoption("benchmark_only"):
+        request.getfixturevalue("benchmark").disabled = True
+
+
+@pytest.fixture
+def event_loop_runner():
+    """Run coroutines on one loop for the whole benchmark, not a new loop per round."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
@@ -0,0 +1,217 @@
+"""Micro-benchmarks for the per-request hot paths of /api/chat.
+
+Run with timing and compare against the stored baseline:
+
+    python scripts/bench_hot_paths.py --check
+
+External services are never called: embeddings and Qdrant come from the
+conftest fixtures, the Groq client and HTTP responses are faked in-process.
+"""
+import base64
+import json
+from types import SimpleNamespace
+from urllib.parse import quote, urlencode
+
+import numpy as np
+import pytest
+from starlette.requests import Request
+
+import api.main as main
+import api.services.embeddings as embeddings
+import api.services.llm as llm
+import api.services.vector_store as vs
+
+
+QUERY = "How do I reset my account password after the reset link expired?"
+
+CONTEXT = (
+    "To reset your password, open the sign-in page and choose Forgot password. "
+    "We email a link that stays valid for 24 hours. "
+) * 20
+
+RESPONSE = (
+    "You can request a new reset link from the sign-in page. "
+    "Links expire after 24 hours, so use the newest email. "
+) * 15
+
+
+def _request(content_type: str, body: bytes) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/chat",
+        "query_string": b"",
+        "headers": [(b"content-type", content_type.encode())],
+    }
+    return Request(scope, receive)
+
+
+BODIES = {
+    "json": ("application/json", json.dumps({"query": QUERY}).encode()),
+    "form": ("application/x-www-form-urlencoded", urlencode({"query": QUERY}).encode()),
+    # Some clients post the JSON document itself as a form key
+    "form_wrapped_json": ("application/x-www-form-urlencoded", (quote(json.dumps({"query": QUERY})) + "=").encode()),
+    "no_content_type": ("", json.dumps({"query": QUERY}).encode()),
+}
+
+
+@pytest.mark.parametrize("kind", list(BODIES))
+def test_bench_read_chat_query(benchmark, event_loop_runner, kind):
+    content_type, body = BODIES[kind]
+    query = benchmark(lambda: event_loop_runner(main.read_chat_query(_request(content_type, body))))
+    assert query == QUERY
+
+
+@pytest.mark.parametrize("query", ["hi", "it broke", QUERY, " ".join([QUERY] * 4)], ids=["greeting", "vague", "typical", "long"])
+def test_bench_assess_query_clarity(benchmark, query):
+    assessment = benchmark(main.assess_query_clarity, query)
+    assert "needs_clarification" in assessment
+
+
+@pytest.mark.parametrize(
+    "query,message_count",
+    [(QUERY, 1), ("why is this still not working???", 5)],
+    ids=["calm", "frustrated"],
+)
+def test_bench_detect_frustration_indicators(benchmark, query, message_count):
+    frustrated = benchmark(main.detect_frustration_indicators, query, message_count)
+    assert frustrated is (message_count > 1)
+
+
+@pytest.mark.parametrize("scale", [1, 10], ids=["typical", "long"])
+def test_bench_calculate_cognitive_load(benchmark, scale):
+    metrics = benchmark(main.calculate_cognitive_load, CONTEXT * scale, RESPONSE * scale)
+    assert metrics["response_length"] > 0
+
+
+@pytest.mark.parametrize("mode", ["batch", "streaming"])
+def test_bench_cognitive_load_per_token(benchmark, mode):
+    # What the final metrics frame costs once the last token has streamed:
+    # batch re-splits the whole response, streaming only reads the counters.
+    tokens = [RESPONSE[i:i + 4] for i in range(0, len(RESPONSE), 4)]
+    if mode == "batch":
+        response = "".join(tokens)
+        metrics = benchmark(main.calculate_cognitive_load, CONTEXT, response)
+    else:
+        tracker = main.StreamingLoadTracker(CONTEXT)
+        for token in tokens:
+            tracker.feed(token)
+        metrics = benchmark(tracker.metrics)
+    assert metrics == main.calculate_cognitive_load(CONTEXT, RESPONSE)
+
+
+def test_bench_streaming_load_tracker_feed(benchmark):
+    tracker = main.StreamingLoadTracker(CONTEXT)
+    benchmark(tracker.feed, "word ")
+    assert tracker.response_words > 0
+
+
+@pytest.mark.parametrize("mode", ["canned", "dynamic"])
+def test_bench_clarification_json_body(benchmark, mode):
+    metrics = main.ConversationMetrics().to_dict()
+    text = main.CLARIFICATION_MESSAGES["vague"]
+    if mode == "canned":
+        reply = main.CLARIFICATION_REPLIES["vague"]
+        resp = benchmark(lambda: reply.json_response(query=QUERY, engagement_metrics=metrics))
+    else:
+        resp = benchmark(lambda: main.JSONResponse(content={
+            "response": text, "query": QUERY, "needs_clarification": True, "engagement_metrics": metrics,
+        }))
+    assert json.loads(resp.body)["response"] == text
+
+
+@pytest.mark.parametrize("fmt", ["json", "stream"])
+def test_bench_unclear_query_request(benchmark, monkeypatch, test_client, fmt):
+    async def _fake_user():
+        return SimpleNamespace(id="bench", email="bench@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    monkeypatch.setattr(main, "lookup_faq", lambda q: None)
+    try:
+        resp = benchmark(test_client.post, f"/api/chat?format={fmt}&session_id=bench-unclear", json={"query": "that stuff, it"})
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+    assert main.CLARIFICATION_MESSAGES["rephrase"] in resp.text
+
+
+class _ChunkStream(list):
+    """Pre-built chunks with the ``close()`` of groq's ``Stream``."""
+
+    def close(self):
+        pass
+
+
+class _FakeGroqStream:
+    """Groq client whose streamed completion yields ``tokens`` pre-built chunks."""
+
+    def __init__(self, tokens: int):
+        self.chunks = _ChunkStream(
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=f"token{i} "))])
+            for i in range(tokens)
+        )
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        return self.chunks
+
+
+@pytest.mark.parametrize("tokens", [50, 500])
+def test_bench_enhanced_stream_frames(
+    benchmark, monkeypatch, test_client, mock_embedding_model, mock_qdrant_client, tokens
+):
+    async def _fake_user():
+        return SimpleNamespace(id="bench", email="bench@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    monkeypatch.setenv("FAQ_FAST_PATH", "false")
+    monkeypatch.setenv("SESSION_REUSE", "false")
+    monkeypatch.setattr(vs, "_get_client", lambda: mock_qdrant_client)
+    monkeypatch.setattr(llm, "_client", _FakeGroqStream(tokens))
+
+    def _stream():
+        resp = test_client.post(f"/api/chat?session_id=bench-{tokens}", json={"query": QUERY})
+        return resp.text
+
+    try:
+        text = benchmark(_stream)
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+
+    frames = text.split("\n\n")
+    assert frames[0] == "data: token0 "
+    assert json.loads(frames[-2][len("data: "):])["tokens_streamed"] == tokens
+
+
+class _FakeResponse:
+    def __init__(self, payload: dict):
+        self._body = json.dumps(payload)
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self._body)
+
+
+@pytest.mark.parametrize("encoding", ["float", "base64"])
+@pytest.mark.parametrize("batch", [1, 32])
+def test_bench_groq_encode_parsing(benchmark, monkeypatch, encoding, batch):
+    vectors = np.random.default_rng(0).normal(size=(batch, 384)).astype(np.float32)
+    if encoding == "base64":
+        data = [{"embedding": base64.b64encode(v.tobytes()).decode()} for v in vectors]
+    else:
+        data = [{"embedding": v.tolist()} for v in vectors]
+    response = _FakeResponse({"data": data})
+
+    monkeypatch.setenv("GROQ_API_KEY", "bench")
+    monkeypatch.setenv("EMBEDDING_ENCODING_FORMAT", encoding)
+    monkeypatch.setattr("requests.post", lambda *args, **kwargs: response)
+
+    wrapper = embeddings._GroqWrapper()
+    texts = [QUERY] * batch
+    out = benchmark(wrapper.encode, texts if batch > 1 else QUERY)
+    first = out[0] if batch > 1 else out
+    assert np.allclose(first, vectors[0], atol=1e-6)
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+jwt = pytest.importorskip("jwt")
+rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+
+import api.main as main
+import api.middleware.auth as auth
+
+SECRET = "test-secret-with-at-least-32-bytes!!"
+
+
+def _token(key=SECRET, alg="HS256", kid=None, **claims):
+    payload = {"sub": "user-1", "email": "u1@example.com", "aud": "authenticated", "exp": int(time.time()) + 300}
+    payload.update(claims)
+    return jwt.encode(payload, key, algorithm=alg, headers={"kid": kid} if kid else None)
+
+
+def _rsa_jwks(kid):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private.public_key(), as_dict=True)
+    jwk.update(kid=kid, alg="RS256", use="sig")
+    return private, {"keys": [jwk]}
+
+
+def _verify(verifier, token):
+    return asyncio.run(verifier.verify(token))
+
+
+def test_hs256_claims_are_cached_until_exp(monkeypatch):
+    verifier = auth.TokenVerifier(secret=SECRET, audience="authenticated")
+    token = _token()
+    assert _verify(verifier, token)["sub"] == "user-1"
+    assert _verify(verifier, token)["email"] == "u1@example.com"
+    assert verifier.snapshot()["hits"] == 1
+    assert verifier.snapshot()["misses"] == 1
+
+    # Past exp the cached entry is not served; the token is verified again
+    # (and rejected by the signature check's own clock, see the "expired" case)
+    exp = jwt.decode(token, options={"verify_signature": False})["exp"]
+    monkeypatch.setattr(auth.time, "time", lambda: exp + 1)
+    monkeypatch.setattr(verifier, "_decode", lambda t: (_ for _ in ()).throw(jwt.ExpiredSignatureError()))
+    with pytest.raises(HTTPException) as exc:
+        _verify(verifier, token)
+    assert exc.value.status_code == 401
+    assert "expired" in exc.value.detail.lower()
+    assert verifier.snapshot()["misses"] == 2
+    assert verifier.snapshot()["cached_tokens"] == 0
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        _token(key="another-secret-with-at-least-32-bytes"),
+        _token(exp=int(time.time()) - 10),
+        _token(aud="someone-else"),
+        jwt.encode({"sub": "user-1", "aud": "authenticated"}, SECRET, algorithm="HS256"),
+        "not-a-jwt",
+    ],
+    ids=["bad_signature", "expired", "wrong_audience", "no_exp", "garbage"],
+)
+def test_invalid_tokens_are_rejected_and_not_cached(token):
+    verifier = auth.TokenVerifier(secret=SECRET, audience="authenticated")
+    with pytest.raises(HTTPException) as exc:
+        _verify(verifier, token)
+    assert exc.value.status_code == 401
+    assert verifier.snapshot()["cached_tokens"] == 0
+    assert verifier.snapshot()["rejected"] == 1
+
+
+def test_claims_cache_is_bounded():
+    verifier = auth.TokenVerifier(secret=SECRET, audience="authenticated", cache_size=2)
+    for i in range(3):
+        _verify(verifier, _token(sub=f"user-{i}"))
+    assert verifier.snapshot()["cached_tokens"] == 2
+
+
+def test_jwks_keys_and_rotation(monkeypatch):
+    old_key, old_jwks = _rsa_jwks("old")
+    new_key, new_jwks = _rsa_jwks("new")
+    verifier = auth.TokenVerifier(jwks_url="https://example.invalid/jwks.json", audience="authenticated")
+    assert verifier.load_jwks(old_jwks) == 1
+    assert _verify(verifier, _token(old_key, "RS256", kid="old"))["sub"] == "user-1"
+
+    # A token signed with a rotated key triggers one early JWKS fetch
+    fetches = []
+    monkeypatch.setattr(verifier, "_fetch_jwks", lambda: fetches.append(1) or new_jwks)
+    monkeypatch.setattr(verifier, "_keys_fetched", float("-inf"))
+    assert _verify(verifier, _token(new_key, "RS256", kid="new"))["sub"] == "user-1"
+    assert len(fetches) == 1
+
+    # Unknown keys right after a fetch are rejected without fetching again
+    with pytest.raises(HTTPException):
+        _verify(verifier, _token(old_key, "RS256", kid="other"))
+    assert len(fetches) == 1
+    # HS256 tokens are refused when no secret is configured
+    with pytest.raises(HTTPException):
+        _verify(verifier, _token())
+
+
+def test_background_refresh_loads_keys(monkeypatch):
+    _, jwks = _rsa_jwks("k1")
+    monkeypatch.setenv("AUTH_JWKS_URL", "https://example.invalid/jwks.json")
+    monkeypatch.setattr(auth, "_verifier", None)
+    monkeypatch.setattr(auth.TokenVerifier, "_fetch_jwks", lambda self: jwks)
+
+    async def _run():
+        assert auth.start_jwks_refresh() is True
+        await asyncio.sleep(0.05)
+        await auth.stop_jwks_refresh()
+
+    asyncio.run(_run())
+    assert auth.get_token_verifier().snapshot()["signing_keys"] == 1
+
+
+def test_endpoint_requires_valid_token_when_configured(monkeypatch, test_client):
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("AUTH_JWKS_URL", raising=False)
+    monkeypatch.setattr(auth, "_verifier", None)
+    main.app.dependency_overrides.pop(main.get_current_user, None)
+
+    assert test_client.get("/api/chat/prefetch/stats").status_code == 401
+    bad = test_client.get("/api/chat/prefetch/stats", headers={"Authorization": "Bearer nope"})
+    assert bad.status_code == 401
+    ok = test_client.get("/api/chat/prefetch/stats", headers={"Authorization": f"Bearer {_token()}"})
+    assert ok.status_code == 200
+
+
+def test_token_without_email_is_accepted(monkeypatch, test_client):
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("AUTH_JWKS_URL", raising=False)
+    monkeypatch.setattr(auth, "_verifier", None)
+    main.app.dependency_overrides.pop(main.get_current_user, None)
+    token = jwt.encode(
+        {"sub": "phone-user", "aud": "authenticated", "exp": int(time.time()) + 300}, SECRET, algorithm="HS256"
+    )
+
+    resp = test_client.get("/api/chat/prefetch/stats", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    with test_client.websocket_connect(f"/api/chat/ws?token={token}") as ws:
+        assert ws.receive_json()["type"] == "ready"
@@ -0,0 +1,100 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import api.main as main
+
+
+@pytest.fixture
+def as_user():
+    async def _fake_user():
+        return SimpleNamespace(id="u1", email="u1@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    yield
+    main.app.dependency_overrides.pop(main.get_current_user, None)
+
+
+@pytest.fixture
+def no_retrieval(monkeypatch):
+    async def _boom(*args, **kwargs):
+        raise AssertionError("embedding/search should be skipped")
+
+    monkeypatch.setattr(main, "get_embedding", _boom)
+    monkeypatch.setattr(main, "search_vectors", _boom)
+
+
+@pytest.mark.parametrize("kind", list(main.CLARIFICATION_MESSAGES))
+def test_clarification_replies_match_dynamic_encoding(kind):
+    reply = main.CLARIFICATION_REPLIES[kind]
+    text = main.CLARIFICATION_MESSAGES[kind]
+    metrics = main.ConversationMetrics().to_dict()
+    body = reply.json_response(query='say "this" — ünïcode', engagement_metrics=metrics).body
+
+    assert json.loads(body) == {
+        "response": text,
+        "query": 'say "this" — ünïcode',
+        "needs_clarification": True,
+        "engagement_metrics": metrics,
+    }
+    assert reply.sse == f"data: {text}\n\n".encode("utf-8")
+
+
+@pytest.mark.parametrize("frustrated", [False, True])
+def test_no_results_replies_match_dynamic_encoding(frustrated):
+    reply = main.NO_RESULTS_REPLIES[frustrated]
+    text = main.no_results_message(frustrated)
+    assert json.loads(reply.json_response(query="q", engagement_metrics={}).body) == {
+        "response": text,
+        "query": "q",
+        "sources": [],
+        "engagement_metrics": {},
+        "no_results": True,
+    }
+    assert reply.sse == f"data: {json.dumps({'text': text, 'no_results': True})}\n\n".encode()
+
+
+@pytest.mark.parametrize(
+    "query,decides",
+    [("that thing", True), ("it", True), ("this stuff!", True),
+     ("this?", False), ("hi", False), ("fix it", False), ("how do I reset this password", False)],
+)
+def test_clarity_decides(query, decides):
+    assert main.clarity_decides(query, main.assess_query_clarity(query)) is decides
+
+
+def test_unclear_follow_up_skips_retrieval(monkeypatch, test_client, as_user, no_retrieval):
+    monkeypatch.setattr(main, "lookup_faq", lambda q: None)
+    session = "canned-1"
+    for turn in range(3):
+        resp = test_client.post(f"/api/chat?format=json&session_id={session}", json={"query": "this thing"})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["needs_clarification"] is True
+        assert body["engagement_metrics"]["message_count"] == turn + 1
+
+    resp = test_client.post(f"/api/chat?session_id={session}", json={"query": "that stuff, it"})
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.text == f"data: {main.CLARIFICATION_MESSAGES['rephrase']}\n\n"
+
+
+def test_prefetch_skips_unclear_queries(monkeypatch, test_client, as_user, no_retrieval):
+    monkeypatch.setattr(main, "lookup_faq", lambda q: None)
+    resp = test_client.post("/api/chat/prefetch", json={"query": "this thing"})
+    assert resp.json() == {"status": "skipped", "reason": "unclear"}
+
+
+def test_no_results_stream_frame(monkeypatch, test_client, as_user):
+    async def fake_embed(q):
+        return [0.0] * 384
+
+    async def fake_search(q, top_k=5, threshold=0.7):
+        return []
+
+    monkeypatch.setenv("FAQ_FAST_PATH", "false")
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors", fake_search)
+    resp = test_client.post("/api/chat?session_id=canned-2", json={"query": "How do I export my invoices?"})
+    frame = json.loads(resp.text[len("data: "):])
+    assert frame == {"text": main.no_results_message(False), "no_results": True}
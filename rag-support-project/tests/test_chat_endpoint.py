@@ -123,3 +123,99 @@ def test_clarification_streaming_returns_plain_text(monkeypatch, test_client):
     # Expect plain message text and not a JSON object with 'text' key
     assert "Hello! I'm here to help. What can I help you with today?" in body
     assert "\"text\":" not in body
+
+
+def test_chat_batch_streams_ndjson(monkeypatch, test_client):
+    import json
+
+    monkeypatch.setenv("FAQ_FAST_PATH", "false")
+    monkeypatch.setenv("BATCH_LLM_CONCURRENCY", "2")
+
+    async def _fake_user():
+        return SimpleNamespace(id="batch_user", email="b@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+
+    embed_calls = []
+
+    async def fake_embed(texts):
+        embed_calls.append(texts)
+        return [[float(i)] * 4 for i in range(len(texts))]
+
+    async def fake_batch_search(vectors, top_k=5, threshold=0.7):
+        return [
+            [SimpleNamespace(score=0.9, payload={"text": f"doc{i}", "source": "s"})] if i != 1 else []
+            for i in range(len(vectors))
+        ]
+
+    async def fake_llm(prompt):
+        if "doc2" in prompt:
+            raise RuntimeError("llm down")
+        return "answer:" + prompt.split("Question: ")[1].split("\n")[0]
+
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors_batch", fake_batch_search)
+    monkeypatch.setattr(main, "get_llm_response", fake_llm)
+
+    resp = test_client.post(
+        "/api/chat/batch",
+        json={"queries": ["first question", {"id": "t-2", "query": "second"}, "third", "fourth"]},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(l) for l in resp.text.splitlines()]
+    assert len(embed_calls) == 1 and len(embed_calls[0]) == 4
+
+    by_index = {l["index"]: l for l in lines if l["type"] == "result"}
+    assert by_index[0]["response"] == "answer:first question"
+    assert by_index[1]["id"] == "t-2" and by_index[1]["no_results"] is True
+    assert "error" in by_index[2]
+    assert by_index[3]["response"] == "answer:fourth"
+    assert lines[-1]["type"] == "summary" and lines[-1]["count"] == 4 and lines[-1]["errors"] == 1
+
+    assert test_client.post("/api/chat/batch", json={"queries": []}).status_code == 400
+
+
+def test_chat_batch_llm_calls_overlap(monkeypatch, test_client):
+    import threading
+    import time
+
+    import api.services.llm as llm
+
+    monkeypatch.setenv("FAQ_FAST_PATH", "false")
+    monkeypatch.setenv("BATCH_LLM_CONCURRENCY", "4")
+
+    async def _fake_user():
+        return SimpleNamespace(id="batch_user", email="b@example.com")
+
+    async def fake_embed(texts):
+        return [[1.0] * 4 for _ in texts]
+
+    async def fake_batch_search(vectors, top_k=5, threshold=0.7):
+        return [[SimpleNamespace(score=0.9, payload={"text": "doc", "source": "s"})] for _ in vectors]
+
+    lock = threading.Lock()
+    in_flight = {"now": 0, "max": 0}
+
+    def fake_create(**kwargs):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        time.sleep(0.2)
+        with lock:
+            in_flight["now"] -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake_create)))
+    monkeypatch.setattr(llm, "_get_client", lambda: client)
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors_batch", fake_batch_search)
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    try:
+        resp = test_client.post("/api/chat/batch", json={"queries": [f"question {i}" for i in range(8)]})
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+
+    assert resp.status_code == 200
+    assert resp.text.count('"response": "ok"') == 8
+    assert in_flight["max"] == 4
@@ -0,0 +1,189 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, WebSocketException, status
+from starlette.websockets import WebSocketDisconnect
+
+import api.main as main
+
+QUERY = "How do I reset my account password?"
+
+
+@pytest.fixture
+def ws_services(monkeypatch):
+    """Fake user, embedding, search and token stream; counts auth calls."""
+    calls = {"auth": 0, "tokens": 5, "delay": 0.0}
+
+    async def _fake_user():
+        calls["auth"] += 1
+        return SimpleNamespace(id="u1", email="u1@example.com")
+
+    async def fake_embed(q):
+        return [0.1] * 384
+
+    async def fake_search(q, top_k=5, threshold=0.7):
+        return [SimpleNamespace(score=0.9, payload={"text": "Reset it from the sign-in page.", "source": "s"})]
+
+    async def fake_tokens(prompt):
+        calls["closed"] = False
+        try:
+            for i in range(calls["tokens"]):
+                if calls["delay"]:
+                    await asyncio.sleep(calls["delay"])
+                yield f"tok{i} "
+        finally:
+            calls["closed"] = True
+
+    monkeypatch.setenv("FAQ_FAST_PATH", "false")
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors", fake_search)
+    monkeypatch.setattr(main, "stream_llm_tokens", fake_tokens)
+    main.app.dependency_overrides[main.get_current_user_ws] = _fake_user
+    yield calls
+    main.app.dependency_overrides.pop(main.get_current_user_ws, None)
+
+
+def _read_answer(ws):
+    tokens, frame = [], ws.receive_json()
+    while frame["type"] == "token":
+        tokens.append(frame["text"])
+        frame = ws.receive_json()
+    return tokens, frame
+
+
+def test_ws_streams_tokens_and_keeps_session_state(ws_services, test_client):
+    with test_client.websocket_connect("/api/chat/ws?session_id=ws-s1") as ws:
+        assert ws.receive_json() == {"type": "ready", "session_id": "ws-s1", "frames": "text"}
+
+        ws.send_json({"type": "chat", "query": QUERY, "id": "a"})
+        tokens, done = _read_answer(ws)
+        assert tokens == [f"tok{i} " for i in range(5)]
+        assert done["type"] == "done" and done["id"] == "a"
+        assert done["tokens_streamed"] == 5
+        assert done["engagement_metrics"]["message_count"] == 1
+
+        ws.send_json({"type": "chat", "query": QUERY + " again"})
+        _, done = _read_answer(ws)
+        assert done["id"] == 2
+        assert done["engagement_metrics"]["message_count"] == 2
+
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+
+    # Authenticated once for the whole connection
+    assert ws_services["auth"] == 1
+
+
+def test_ws_binary_frames(ws_services, test_client):
+    with test_client.websocket_connect("/api/chat/ws?frames=binary") as ws:
+        assert ws.receive_json()["frames"] == "binary"
+        ws.send_json({"type": "chat", "query": QUERY})
+        chunks = [ws.receive_bytes() for _ in range(5)]
+        assert b"".join(chunks).decode() == "".join(f"tok{i} " for i in range(5))
+        assert ws.receive_json()["type"] == "done"
+
+
+def test_ws_cancel_stops_answer_in_progress(ws_services, test_client):
+    ws_services.update(tokens=1000, delay=0.005)
+    with test_client.websocket_connect("/api/chat/ws") as ws:
+        ws.receive_json()
+        ws.send_json({"type": "chat", "query": QUERY, "id": 1})
+        assert ws.receive_json()["type"] == "token"
+
+        ws.send_json({"type": "chat", "query": QUERY, "id": 2})
+        ws.send_json({"type": "cancel"})
+        frames = []
+        while not frames or frames[-1]["type"] not in ("cancelled", "done"):
+            frames.append(ws.receive_json())
+        busy = [f for f in frames if f["type"] == "error"]
+        assert busy and busy[0]["status"] == 409 and busy[0]["id"] == 2
+        assert frames[-1]["type"] == "cancelled"
+        assert frames[-1]["id"] == 1
+        assert frames[-1]["tokens_streamed"] < 1000
+        assert ws_services["closed"] is True
+
+        # The connection stays usable after a cancel
+        ws_services.update(tokens=3, delay=0.0)
+        ws.send_json({"type": "chat", "query": QUERY, "id": 3})
+        tokens, done = _read_answer(ws)
+        assert len(tokens) == 3 and done["id"] == 3
+
+
+def test_ws_rejects_bad_messages(ws_services, test_client):
+    with test_client.websocket_connect("/api/chat/ws") as ws:
+        ws.receive_json()
+        ws.send_text("not json")
+        assert ws.receive_json()["status"] == 400
+        ws.send_json({"type": "chat", "query": "  "})
+        assert ws.receive_json()["status"] == 400
+        ws.send_json({"type": "subscribe"})
+        assert ws.receive_json()["status"] == 400
+
+
+def test_ws_rejects_unauthenticated_handshake(monkeypatch, test_client):
+    async def _raise_unauth():
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="unauth")
+
+    main.app.dependency_overrides[main.get_current_user_ws] = _raise_unauth
+    try:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with test_client.websocket_connect("/api/chat/ws") as ws:
+                ws.receive_json()
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user_ws, None)
+    assert exc.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+def test_ws_auth_reads_token_from_query_or_header(monkeypatch):
+    import api.middleware.auth as auth
+
+    seen = []
+
+    async def fake_get_current_user(credentials=None):
+        seen.append(credentials.credentials if credentials else None)
+        if credentials is None:
+            raise HTTPException(status_code=401, detail="unauth")
+        return SimpleNamespace(id="u1")
+
+    monkeypatch.setattr(auth, "get_current_user", fake_get_current_user)
+
+    def _ws(query_string=b"", headers=()):
+        return SimpleNamespace(
+            query_params=dict(p.split("=") for p in query_string.decode().split("&") if p),
+            headers=dict(headers),
+        )
+
+    asyncio.run(auth.get_current_user_ws(_ws(b"token=abc")))
+    asyncio.run(auth.get_current_user_ws(_ws(headers=[("authorization", "Bearer xyz")])))
+    with pytest.raises(WebSocketException) as exc:
+        asyncio.run(auth.get_current_user_ws(_ws()))
+    assert seen == ["abc", "xyz", None]
+    assert exc.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+def test_stream_llm_tokens_closes_upstream_stream(monkeypatch):
+    import api.services.llm as llm
+
+    class FakeStream:
+        closed = False
+
+        def __iter__(self):
+            while True:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="tok"))])
+
+        def close(self):
+            self.closed = True
+
+    stream = FakeStream()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: stream)))
+    monkeypatch.setattr(llm, "_get_client", lambda: client)
+
+    async def _consume_two():
+        tokens = llm.stream_llm_tokens("prompt")
+        assert [await tokens.__anext__(), await tokens.__anext__()] == ["tok", "tok"]
+        await tokens.aclose()
+
+    asyncio.run(_consume_two())
+    assert stream.closed
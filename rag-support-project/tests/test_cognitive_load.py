@@ -0,0 +1,99 @@
+import json
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import api.main as main
+
+CONTEXT = "Reset your password from the sign-in page. The link is valid for 24 hours.\n\n" * 5
+RESULTS = [SimpleNamespace(score=0.9, payload={"text": CONTEXT, "source": "s"})]
+
+
+def _split_randomly(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), k=min(len(text) - 1, len(text) // 4)))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("words", [0, 1, 40, 180, 300])
+def test_streaming_tracker_matches_batch_metrics(seed, words):
+    rng = random.Random(seed)
+    vocab = ["reset", "password", "link", "the", "email", "hours", "page", "again", "sign-in"]
+    response = "".join(rng.choice(vocab) + rng.choice([" ", "  ", "\n", " "]) for _ in range(words))
+    if rng.random() < 0.5:
+        response = response.rstrip()
+
+    tracker = main.StreamingLoadTracker(CONTEXT)
+    for token in _split_randomly(response, rng) if len(response) > 1 else [response]:
+        tracker.feed(token)
+    assert tracker.metrics() == main.calculate_cognitive_load(CONTEXT, response)
+
+
+def test_stream_final_metrics_include_cognitive_load(monkeypatch, test_client):
+    async def _fake_user():
+        return SimpleNamespace(id="u1", email="u1@example.com")
+
+    async def fake_embed(q):
+        return [0.1] * 384
+
+    async def fake_search(q, top_k=5, threshold=0.7):
+        return RESULTS
+
+    tokens = ["You can res", "et it from the ", "sign-in page", " again."]
+
+    async def fake_stream(prompt):
+        for token in tokens:
+            yield f"data: {token}\n\n"
+
+    monkeypatch.setenv("FAQ_FAST_PATH", "false")
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors", fake_search)
+    monkeypatch.setattr(main, "stream_llm_response", fake_stream)
+    try:
+        resp = test_client.post("/api/chat?session_id=load-1", json={"query": "How do I reset my password?"})
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+
+    frames = [f for f in resp.text.split("\n\n") if f]
+    final = json.loads(frames[-1][len("data: "):])
+    load = final["cognitive_load"]
+    assert load["response_length"] == 9
+    context, _ = main.pack_context(RESULTS)
+    assert load == main.calculate_cognitive_load(context, "".join(tokens))
+
+
+def test_json_and_stream_report_load_of_the_response(monkeypatch, test_client):
+    async def _fake_user():
+        return SimpleNamespace(id="u1", email="u1@example.com")
+
+    async def fake_embed(q):
+        return [0.1] * 384
+
+    async def fake_search(q, top_k=5, threshold=0.7):
+        return RESULTS
+
+    answer = "Open Settings, choose Security and pick Reset password to get a reset link by email."
+
+    async def fake_llm(prompt):
+        return answer
+
+    async def fake_stream(prompt):
+        yield f"data: {answer}\n\n"
+
+    monkeypatch.setenv("FAQ_FAST_PATH", "false")
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors", fake_search)
+    monkeypatch.setattr(main, "get_llm_response", fake_llm)
+    monkeypatch.setattr(main, "stream_llm_response", fake_stream)
+    query = {"query": "How do I reset my password?"}
+    try:
+        json_load = test_client.post("/api/chat?format=json&session_id=load-2", json=query).json()["cognitive_load"]
+        frames = [f for f in test_client.post("/api/chat?session_id=load-3", json=query).text.split("\n\n") if f]
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+
+    assert json_load["response_length"] == len(answer.split())
+    assert json_load == json.loads(frames[-1][len("data: "):])["cognitive_load"]
@@ -0,0 +1,32 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import bench_cold_start  # noqa: E402
+from profile_imports import by_package, parse_importtime  # noqa: E402
+
+
+def test_lazy_cold_start_defers_sdks():
+    result = bench_cold_start.measure(runs=1, lazy=True)
+    assert result["loaded"] == []
+
+
+def test_check_flags_regressions():
+    baseline = {"total_ms": 200.0, "tolerance": 0.5, "slack_ms": 100.0}
+    ok = {"total_ms": 390.0, "loaded": []}
+    assert bench_cold_start.check(ok, baseline) == []
+    slow = {"total_ms": 450.0, "loaded": ["qdrant_client"]}
+    assert len(bench_cold_start.check(slow, baseline)) == 2
+
+
+def test_parse_importtime():
+    rows = parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |     pydantic.version\n"
+        "import time:       400 |        500 |   pydantic\n"
+        "import time:      1000 |       1500 | api.main\n"
+    )
+    assert [r["module"] for r in rows] == ["pydantic.version", "pydantic", "api.main"]
+    assert rows[0]["depth"] == 2 and rows[2]["cumulative_ms"] == 1.5
+    assert by_package(rows)[0] == {"package": "api", "modules": 1, "self_ms": 1.0}
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import api.services.context as ctx
+
+
+def _hit(score, text, source="s.txt"):
+    return SimpleNamespace(score=score, payload={"text": text, "source": source})
+
+
+def _words(start, end):
+    return " ".join(f"w{i}" for i in range(start, end))
+
+
+def test_overlapping_chunks_are_merged():
+    # Same layout as ingest.chunk_text: 500-word chunks overlapping by 50.
+    first, second = _words(0, 500), _words(450, 950)
+    context, stats = ctx.pack_context([_hit(0.8, second), _hit(0.9, first)], budget=10_000)
+    assert context == _words(0, 950)
+    assert stats["blocks_used"] == 1
+    assert stats["prompt_tokens_saved"] > 0
+
+
+def test_duplicates_dropped_and_sources_kept_apart():
+    text = _words(0, 40)
+    hits = [_hit(0.9, text, "a.txt"), _hit(0.85, text, "a.txt"), _hit(0.7, text, "b.txt")]
+    context, stats = ctx.pack_context(hits, budget=10_000)
+    assert context.count(text) == 2
+    assert stats["blocks_used"] == 2
+
+
+def test_blocks_ordered_by_score_and_trimmed_to_budget():
+    hits = [_hit(0.5, "low " * 200, "a.txt"), _hit(0.95, "high " * 200, "b.txt")]
+    context, stats = ctx.pack_context(hits, budget=250)
+    assert context.startswith("high")
+    assert stats["context_tokens_packed"] <= 250
+    assert ctx.count_tokens(context) <= 250
+
+
+def test_tiny_budget_still_keeps_best_block():
+    context, _ = ctx.pack_context([_hit(0.9, "answer " * 100)], budget=5)
+    assert 0 < ctx.count_tokens(context) <= 5
+
+
+def test_budget_from_env(monkeypatch):
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", "42")
+    _, stats = ctx.pack_context([_hit(0.9, "doc")])
+    assert stats["token_budget"] == 42
@@ -128,3 +128,106 @@ def test_groq_wrapper_uses_embeddings_endpoint(monkeypatch):
     v = asyncio.run(emb_mod.get_embedding("hello groq"))
     assert len(v) == 384
     assert called['url'].endswith('/openai/v1/embeddings')
+
+
+def _capture_post(monkeypatch, response):
+    import requests as requests_mod
+
+    called = {}
+
+    class FakeResponse:
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return response
+
+    def fake_post(url, json=None, headers=None):
+        called["json"] = json
+        return FakeResponse()
+
+    monkeypatch.setattr(requests_mod, "post", fake_post)
+    return called
+
+
+def test_base64_transport_decodes_float32(monkeypatch):
+    import base64
+    import numpy as np
+    import api.services.embeddings as emb_mod
+
+    vecs = np.arange(8, dtype="<f4").reshape(2, 4)
+    called = _capture_post(monkeypatch, {"data": [
+        {"embedding": base64.b64encode(v.tobytes()).decode()} for v in vecs
+    ]})
+    monkeypatch.setenv("OPENAI_API_KEY", "k")
+    monkeypatch.delenv("EMBEDDING_ENCODING_FORMAT", raising=False)
+
+    out = emb_mod._OpenAIWrapper().encode(["a", "b"])
+    assert called["json"]["encoding_format"] == "base64"
+    assert all(o.dtype == np.float32 for o in out)
+    assert np.array_equal(np.stack(out), vecs)
+
+    monkeypatch.setenv("GROQ_API_KEY", "k")
+    single = emb_mod._GroqWrapper().encode("a")
+    assert np.array_equal(single, vecs[0])
+
+
+def test_float_transport_keeps_lists(monkeypatch):
+    import api.services.embeddings as emb_mod
+
+    called = _capture_post(monkeypatch, {"data": [{"embedding": [0.25] * 4}]})
+    monkeypatch.setenv("OPENAI_API_KEY", "k")
+    monkeypatch.setenv("EMBEDDING_ENCODING_FORMAT", "float")
+
+    out = emb_mod._OpenAIWrapper().encode("a")
+    assert "encoding_format" not in called["json"]
+    assert out == [0.25] * 4
+
+
+def test_local_provider_runs_onnx_in_process(monkeypatch, tmp_path):
+    import sys
+    from pathlib import Path
+
+    import pytest
+
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+    from bench_common import build_stand_in_onnx_model
+
+    import api.services.embeddings as emb_mod
+
+    build_stand_in_onnx_model(str(tmp_path), layers=1, int8=False)
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "local")
+    monkeypatch.setenv("LOCAL_EMBEDDING_MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(emb_mod, "_model", None)
+
+    assert asyncio.run(emb_mod.warm_embedding_model()) is True
+    assert isinstance(emb_mod._model, emb_mod._LocalWrapper)
+
+    single = asyncio.run(emb_mod.get_embedding("How do I reset my password?"))
+    assert single.dtype == np.float32 and single.shape == (384,)
+    assert abs(float(np.linalg.norm(single)) - 1.0) < 1e-5
+
+    # Padding in a batch must not change a text's vector
+    batch = asyncio.run(emb_mod.get_embedding(["How do I reset my password?", "refund"]))
+    assert np.allclose(batch[0], single, atol=1e-6)
+
+
+def test_local_provider_requires_model_dir(monkeypatch):
+    import pytest
+    import api.services.embeddings as emb_mod
+
+    monkeypatch.delenv("LOCAL_EMBEDDING_MODEL_DIR", raising=False)
+    with pytest.raises(RuntimeError, match="LOCAL_EMBEDDING_MODEL_DIR"):
+        emb_mod._LocalWrapper()
+
+
+def test_unset_provider_defaults_to_openai(monkeypatch):
+    import api.services.embeddings as emb_mod
+
+    monkeypatch.delenv("EMBEDDING_PROVIDER", raising=False)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    assert isinstance(emb_mod._init_model(), emb_mod._OpenAIWrapper)
@@ -0,0 +1,138 @@
+import json
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import api.main as main
+from api.services.engagement_rollups import EngagementRollups
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+def _naive_summary(profiles, now):
+    """What a full scan over the profiles would report."""
+    distribution = [0] * 10
+    for p in profiles:
+        score = min(p.base_engagement_score() + main.recency_points((now.date() - p.last_seen.date()).days), 100.0)
+        distribution[min(int(score // 10), 9)] += 1
+    messages = sum(p.total_messages for p in profiles)
+    return {
+        "users": len(profiles),
+        "messages": messages,
+        "success_rate": sum(p.successful_resolutions for p in profiles) / max(messages, 1),
+        "frustration_rate": sum(p.frustration_indicators for p in profiles) / max(messages, 1),
+        "score_distribution": distribution,
+    }
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_rollups_match_full_scan(seed):
+    rng = random.Random(seed)
+    rollups = EngagementRollups()
+    profiles = []
+    for i in range(60):
+        p = main.UserEngagementProfile(f"u{i}")
+        p.last_seen = NOW - timedelta(days=rng.choice([0, 3, 10, 45, 120, 400]))
+        p.track(rollups)
+        profiles.append(p)
+
+    for _ in range(500):
+        p = rng.choice(profiles)
+        action = rng.random()
+        if action < 0.4:
+            p.total_messages += 1
+        elif action < 0.6 and p.successful_resolutions < p.total_messages:
+            p.successful_resolutions += 1
+        elif action < 0.7:
+            p.frustration_indicators += 1
+        elif action < 0.8:
+            p.total_sessions += 1
+        else:
+            p.last_seen = NOW - timedelta(days=rng.choice([0, 1, 8]))
+
+    # Later snapshots shift every day's recency, including folds past 90 days
+    for later in (NOW, NOW + timedelta(days=8), NOW + timedelta(days=95)):
+        snap = rollups.snapshot(now=later)
+        expected = _naive_summary(profiles, later)
+        assert snap["users"] == expected["users"]
+        assert snap["messages"] == expected["messages"]
+        assert snap["success_rate"] == pytest.approx(expected["success_rate"])
+        assert snap["frustration_rate"] == pytest.approx(expected["frustration_rate"])
+        assert list(snap["score_distribution"].values()) == expected["score_distribution"]
+
+
+def test_active_users_counted_once_per_day():
+    rollups = EngagementRollups()
+    p = main.UserEngagementProfile("u1")
+    p.last_seen = NOW - timedelta(days=1)
+    p.track(rollups)
+    p.update_visit()
+    p.last_seen = NOW
+    p.total_messages += 3
+
+    active = rollups.snapshot(now=NOW)["active_users_by_day"]
+    assert active == {NOW.date().isoformat(): 1, (NOW - timedelta(days=1)).date().isoformat(): 1}
+    assert rollups.snapshot(now=NOW + timedelta(days=31))["active_users_by_day"] == {}
+
+
+def test_engagement_score_unchanged():
+    p = main.UserEngagementProfile("u1")
+    p.total_sessions, p.total_messages, p.successful_resolutions = 6, 4, 3
+    assert p.calculate_engagement_score() == 20 + 30 + 30
+    p.last_seen = datetime.utcnow() - timedelta(days=40)
+    assert p.calculate_engagement_score() == 20 + 10 + 30
+
+
+@pytest.fixture
+def fresh_profiles(monkeypatch):
+    monkeypatch.setattr(main, "user_profiles", {})
+    monkeypatch.setattr(main, "user_profile_order", [])
+    monkeypatch.setattr("api.services.engagement_rollups._rollups", None)
+
+
+def _as(user):
+    async def _fake_user():
+        return user
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+
+
+def test_summary_endpoint_tracks_profiles(fresh_profiles, test_client):
+    for i in range(3):
+        main.get_user_profile(f"u{i}").total_messages += 2
+    main.get_user_profile("u0").successful_resolutions += 1
+
+    _as(SimpleNamespace(id="u0", is_admin=False))
+    try:
+        assert test_client.get("/api/engagement/summary").status_code == 403
+        _as(SimpleNamespace(id="admin", is_admin=True))
+        summary = test_client.get("/api/engagement/summary").json()
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+
+    assert summary["users"] == 3
+    assert summary["messages"] == 6
+    assert summary["success_rate"] == pytest.approx(1 / 6)
+    assert sum(summary["active_users_by_day"].values()) == 3
+
+
+def test_profile_export_pages_ndjson(fresh_profiles, test_client):
+    for i in range(5):
+        main.get_user_profile(f"u{i}")
+
+    _as(SimpleNamespace(id="u0", is_admin=False))
+    try:
+        assert test_client.get("/api/engagement/profiles/export").status_code == 403
+        _as(SimpleNamespace(id="admin", is_admin=True))
+        seen, cursor = [], 0
+        while cursor is not None:
+            resp = test_client.get(f"/api/engagement/profiles/export?cursor={cursor}&limit=2")
+            assert resp.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in resp.text.splitlines()]
+            seen += [line["user_id"] for line in lines if line["type"] == "profile"]
+            cursor = lines[-1]["next_cursor"]
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+
+    assert seen == [f"u{i}" for i in range(5)]
@@ -0,0 +1,66 @@
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import api.main as main  # noqa: E402
+import api.services.embeddings as emb_mod  # noqa: E402
+import api.services.llm as llm_mod  # noqa: E402
+import api.services.vector_store as vs  # noqa: E402
+from fake_services import start_fake_services  # noqa: E402
+
+pytest.importorskip("groq")
+pytest.importorskip("qdrant_client")
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    services = start_fake_services(ttft_ms=10, tokens_per_s=0)
+    for key, value in services.env.items():
+        monkeypatch.setenv(key, value)
+    for mod in (vs, llm_mod):
+        monkeypatch.setattr(mod, "_client", None)
+    monkeypatch.setattr(emb_mod, "_model", None)
+    yield services
+    services.stop()
+
+
+def test_chat_end_to_end_against_fakes(fakes, test_client, monkeypatch):
+    monkeypatch.setenv("DEV_MODE", "false")
+
+    async def _fake_user():
+        return SimpleNamespace(id="load_user", email="l@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    query = {"query": "How long does standard delivery take to arrive?"}
+
+    resp = test_client.post("/api/chat?format=json&session_id=fakes-json", json=query)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["response"].startswith("Thanks for reaching out!")
+    assert len(body["sources"]) == 5
+
+    resp = test_client.post("/api/chat?session_id=fakes-sse", json=query)
+    frames = [f[len("data: "):] for f in resp.text.split("\n\n") if f]
+    assert frames[0] == "Thanks "
+    assert json.loads(frames[-1])["tokens_streamed"] == len(frames) - 1
+
+
+def test_fakes_env_reaches_services_for_faq_queries(fakes, test_client):
+    from bench_common import load_eval_queries
+
+    from api.services.faq import get_faq_index
+
+    async def _fake_user():
+        return SimpleNamespace(id="load_user", email="l@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    query = load_eval_queries()[0]["query"]
+    assert get_faq_index().lookup(query) is not None
+
+    resp = test_client.post("/api/chat?format=json&session_id=fakes-faq", json={"query": query})
+    assert resp.json()["response"].startswith("Thanks for reaching out!")
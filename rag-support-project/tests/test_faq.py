@@ -0,0 +1,95 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import api.main as main
+import api.services.faq as faq
+
+
+@pytest.fixture
+def faq_index(tmp_path, monkeypatch):
+    (tmp_path / "faq.txt").write_text(
+        "Q: What are your business hours?\n"
+        "A: Monday through Friday, 9 to 6.\n\n"
+        "Q: Can I change my email address?\n"
+        "A: Yes, in Account Settings.\n"
+    )
+    history = tmp_path / "history.jsonl"
+    history.write_text(
+        json.dumps({"query": "Do you ship to Canada?", "response": "Yes.", "confidence": 0.95}) + "\n"
+        + json.dumps({"query": "Is there a refund fee?", "response": "Maybe.", "confidence": 0.5}) + "\n"
+    )
+    index = faq.build_faq_index(data_dir=tmp_path, history_path=str(history), fuzzy=True)
+    monkeypatch.setattr(faq, "_faq_index", index)
+    return index
+
+
+def test_exact_and_fuzzy_lookup(faq_index):
+    exact = faq_index.lookup("what are your BUSINESS hours")
+    assert exact.exact and exact.entry.answer.startswith("Monday")
+
+    fuzzy = faq_index.lookup("What are the business hours?")
+    assert fuzzy is not None and not fuzzy.exact
+    assert fuzzy.entry.question == "What are your business hours?"
+
+    assert faq_index.lookup("Can I change my shipping address?") is None
+    assert faq_index.lookup("hours") is None
+
+
+@pytest.mark.parametrize("fuzzy", [False, True])
+@pytest.mark.parametrize(
+    "query",
+    [
+        "How much does expedited shipping cost?",
+        "Do you offer phone support on weekends?",
+        "I can't change my email address",
+    ],
+)
+def test_extra_words_are_not_faq_hits(query, fuzzy):
+    index = faq.build_faq_index(data_dir=faq.DEFAULT_DATA_DIR, history_path="", fuzzy=fuzzy)
+    assert index.lookup(query) is None
+
+
+def test_fuzzy_tier_is_off_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("FAQ_FUZZY_MATCH", raising=False)
+    (tmp_path / "faq.txt").write_text("Q: What are your business hours?\nA: Nine to six.\n")
+    index = faq.build_faq_index(data_dir=tmp_path, history_path="")
+    assert index.lookup("what are your business hours").exact
+    assert index.lookup("What are the business hours?") is None
+
+
+def test_history_respects_confidence(faq_index):
+    assert faq_index.lookup("Do you ship to Canada?").entry.source == "history"
+    assert faq_index.lookup("Is there a refund fee?") is None
+
+
+def _fail_embed(q):
+    raise AssertionError("FAQ hits must not embed the query")
+
+
+def test_chat_faq_hit_skips_embedding(monkeypatch, test_client, faq_index):
+    async def _fake_user():
+        return SimpleNamespace(id="faq_user", email="f@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    monkeypatch.setattr(main, "get_embedding", _fail_embed)
+
+    resp = test_client.post(
+        "/api/chat?format=json&session_id=faq-json",
+        json={"query": "What are the business hours?"},
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["faq_hit"] is True
+    assert body["response"] == "Monday through Friday, 9 to 6."
+    assert body["engagement_metrics"]["faq_hits"] == 1
+
+    resp = test_client.post(
+        "/api/chat?session_id=faq-stream",
+        json={"query": "What are your business hours?"},
+    )
+    assert resp.headers.get("content-type", "").startswith("text/event-stream")
+    frames = [f[len("data: "):] for f in resp.content.decode().split("\n\n") if f]
+    assert frames[0] == "Monday through Friday, 9 to 6."
+    assert json.loads(frames[1])["faq_hit"] is True
@@ -0,0 +1,159 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import ingest  # noqa: E402
+from bench_common import HashingEncoder  # noqa: E402
+
+qdrant_client = pytest.importorskip("qdrant_client")
+
+
+def _write_docs(data_dir, n_files=3, words=1200):
+    data_dir.mkdir()
+    for i in range(n_files):
+        (data_dir / f"doc{i}.txt").write_text(" ".join(f"w{i}_{j}" for j in range(words)))
+
+
+def test_iter_documents_is_sorted_and_lazy(tmp_path):
+    data_dir = tmp_path / "data"
+    _write_docs(data_dir, n_files=2, words=600)
+    docs = ingest.iter_documents(str(data_dir))
+    first = next(docs)
+    assert first[0] == "doc0.txt"
+    assert [s for s, _ in docs] == ["doc0.txt", "doc1.txt", "doc1.txt"]
+
+
+def test_upsert_with_retry_recovers(monkeypatch):
+    calls = {"n": 0}
+
+    class FlakyClient:
+        def upsert(self, **kwargs):
+            calls["n"] += 1
+            if calls["n"] < 3:
+                raise RuntimeError("connection reset")
+
+    ingest.upsert_with_retry(FlakyClient(), "c", [], max_retries=3, sleep=lambda _s: None)
+    assert calls["n"] == 3
+
+
+def test_point_id_is_deterministic():
+    assert ingest.point_id("a.txt", "hello") == ingest.point_id("a.txt", "hello")
+    assert ingest.point_id("a.txt", "hello") != ingest.point_id("b.txt", "hello")
+    assert ingest.point_id("a.txt", "hello") != ingest.point_id("a.txt", "hello!")
+
+
+# Qdrant's in-memory mode is not thread-safe, so these tests use one uploader.
+def test_interrupted_run_resumes(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    _write_docs(data_dir)
+    client = qdrant_client.QdrantClient(":memory:")
+
+    real_upsert = ingest.upsert_with_retry
+    uploaded = {"n": 0}
+
+    def _fail_after_first(client_, collection_name, points, max_retries=3, **kw):
+        uploaded["n"] += 1
+        if uploaded["n"] > 1:
+            raise RuntimeError("qdrant down")
+        return real_upsert(client_, collection_name, points, max_retries, **kw)
+
+    monkeypatch.setattr(ingest, "upsert_with_retry", _fail_after_first)
+    with pytest.raises(RuntimeError):
+        ingest.run_ingest(
+            client, HashingEncoder(), data_dir=str(data_dir), collection_name="t",
+            batch_size=2, workers=1,
+        )
+
+    monkeypatch.setattr(ingest, "upsert_with_retry", real_upsert)
+    stats = ingest.run_ingest(
+        client, HashingEncoder(), data_dir=str(data_dir), collection_name="t",
+        batch_size=2, workers=1,
+    )
+    assert stats["unchanged"] == 2
+    assert stats["upserted"] == stats["chunks"] - 2
+    assert client.count("t").count == stats["chunks"]
+
+
+def test_incremental_run_only_touches_changed_chunks(tmp_path):
+    data_dir = tmp_path / "data"
+    _write_docs(data_dir)
+    client = qdrant_client.QdrantClient(":memory:")
+    # A leftover positional point from the old ingest must be cleaned up.
+    from qdrant_client.models import PointStruct
+
+    ingest.ensure_collection(client, "t", recreate=True)
+    client.upsert("t", points=[PointStruct(id=0, vector=[0.1] * 384, payload={"text": "old"})])
+
+    first = ingest.run_ingest(client, HashingEncoder(), data_dir=str(data_dir), collection_name="t")
+    assert first["deleted"] == 1
+
+    (data_dir / "doc1.txt").write_text("a completely rewritten document")
+    (data_dir / "doc2.txt").unlink()
+
+    class CountingEncoder(HashingEncoder):
+        encoded = 0
+
+        def encode(self, x, batch_size=None, **kw):
+            CountingEncoder.encoded += len(x)
+            return super().encode(x, batch_size=batch_size)
+
+    second = ingest.run_ingest(client, CountingEncoder(), data_dir=str(data_dir), collection_name="t")
+    assert CountingEncoder.encoded == 1
+    assert second["upserted"] == 1
+    assert second["unchanged"] == first["chunks"] // 3
+    assert second["deleted"] == 2 * (first["chunks"] // 3)
+    assert client.count("t").count == second["chunks"]
+
+
+def test_blue_green_rebuild_swaps_alias_and_rolls_back(tmp_path):
+    data_dir = tmp_path / "data"
+    _write_docs(data_dir)
+    client = qdrant_client.QdrantClient(":memory:")
+    # Pre-alias layout: a concrete collection named like the alias.
+    ingest.ensure_collection(client, "docs", recreate=True)
+    queries = [{"query": "w0_5 w0_6 w0_7", "expect": "w0_6"}]
+
+    first = ingest.blue_green_rebuild(
+        client, HashingEncoder(), alias="docs", queries=queries, data_dir=str(data_dir)
+    )
+    assert first["previous"] is None
+    assert ingest.resolve_alias(client, "docs") == first["collection"]
+
+    second = ingest.blue_green_rebuild(
+        client, HashingEncoder(), alias="docs", queries=queries, data_dir=str(data_dir)
+    )
+    assert second["previous"] == first["collection"]
+    assert ingest.list_versions(client, "docs") == [first["collection"], second["collection"]]
+
+    assert ingest.rollback(client, "docs") == first["collection"]
+    assert ingest.resolve_alias(client, "docs") == first["collection"]
+
+
+def test_failed_validation_keeps_live_alias(tmp_path):
+    data_dir = tmp_path / "data"
+    _write_docs(data_dir)
+    client = qdrant_client.QdrantClient(":memory:")
+    live = ingest.blue_green_rebuild(client, HashingEncoder(), alias="docs", data_dir=str(data_dir))
+
+    with pytest.raises(RuntimeError, match="Validation failed"):
+        ingest.blue_green_rebuild(
+            client, HashingEncoder(), alias="docs", data_dir=str(data_dir),
+            queries=[{"query": "anything", "expect": "not in the corpus"}],
+        )
+    assert ingest.resolve_alias(client, "docs") == live["collection"]
+    assert ingest.list_versions(client, "docs") == [live["collection"]]
+
+
+def test_quantization_config():
+    from qdrant_client.models import BinaryQuantization, ScalarQuantization, ScalarType
+
+    assert ingest.quantization_config("none") is None
+    scalar = ingest.quantization_config("scalar")
+    assert isinstance(scalar, ScalarQuantization)
+    assert scalar.scalar.type == ScalarType.INT8 and scalar.scalar.always_ram
+    assert isinstance(ingest.quantization_config("binary"), BinaryQuantization)
+    with pytest.raises(ValueError):
+        ingest.quantization_config("pq")
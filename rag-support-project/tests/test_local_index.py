@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+import api.services.local_index as li
+import api.services.vector_store as vs
+
+qdrant_client = pytest.importorskip("qdrant_client")
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def qdrant():
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+
+    client = qdrant_client.QdrantClient(":memory:")
+    client.create_collection("docs", vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+    rng = np.random.default_rng(0)
+    client.upsert("docs", points=[
+        PointStruct(id=i, vector=rng.normal(size=8).tolist(), payload={"text": f"t{i}", "source": "s"})
+        for i in range(50)
+    ])
+    client.update_collection("docs", metadata={"index_version": "v1"})
+    return client
+
+
+def test_local_search_matches_qdrant(qdrant):
+    index = li.LocalIndex()
+    index.load(qdrant, "docs")
+    assert len(index) == 50
+    query = np.random.default_rng(1).normal(size=8).tolist()
+    remote = qdrant.query_points("docs", query=query, limit=5, with_payload=True).points
+    local = index.search(query, 5)
+    assert [p.id for p in local] == [p.id for p in remote]
+    assert [p.payload for p in local] == [p.payload for p in remote]
+    assert np.allclose([p.score for p in local], [p.score for p in remote], atol=1e-5)
+
+
+def test_refresh_only_when_version_changes(qdrant):
+    from qdrant_client.models import PointStruct
+
+    index = li.LocalIndex()
+    index.load(qdrant, "docs")
+    assert index.refresh_if_stale(qdrant, "docs") is False
+
+    qdrant.upsert("docs", points=[PointStruct(id=99, vector=[1.0] * 8, payload={"text": "new"})])
+    qdrant.update_collection("docs", metadata={"index_version": "v2"})
+    assert index.refresh_if_stale(qdrant, "docs") is True
+    assert len(index) == 51
+    assert index.search([1.0] * 8, 1)[0].payload["text"] == "new"
+
+
+def test_search_vectors_uses_local_backend(qdrant, monkeypatch):
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setenv("QDRANT_COLLECTION", "docs")
+    monkeypatch.setattr(li, "_local_index", None)
+    monkeypatch.setattr(vs, "_get_client", lambda: qdrant)
+
+    res = asyncio.run(vs.search_vectors([0.5] * 8, top_k=3, threshold=0.0))
+    assert len(res) == 3
+    assert isinstance(res[0], li.LocalPoint)
+
+    # Once loaded, searches never touch Qdrant's query API.
+    def _boom(*args, **kwargs):
+        raise AssertionError("query_points should not be called")
+
+    monkeypatch.setattr(qdrant, "query_points", _boom)
+    assert len(asyncio.run(vs.search_vectors([0.5] * 8, top_k=3, threshold=0.0))) == 3
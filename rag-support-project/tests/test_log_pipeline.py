@@ -0,0 +1,99 @@
+import io
+import json
+import logging
+import threading
+
+import pytest
+
+from api.services.log_pipeline import LogPipeline, parse_sampling
+
+
+@pytest.fixture
+def make_logger(request):
+    def _make(pipeline, name="pipeline.test"):
+        log = logging.getLogger(name)
+        log.setLevel(logging.DEBUG)
+        log.propagate = False
+        log.addHandler(pipeline.handler)
+        pipeline.start()
+
+        def _cleanup():
+            pipeline.stop()
+            log.removeHandler(pipeline.handler)
+            log.propagate = True
+
+        request.addfinalizer(_cleanup)
+        return log
+    return _make
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_output_with_extra_and_exception(make_logger):
+    out = io.StringIO()
+    pipeline = LogPipeline(stream=out)
+    log = make_logger(pipeline)
+    log.info("found %d results", 3, extra={"user_id": "u1"})
+    try:
+        raise ValueError("nope")
+    except ValueError:
+        log.exception("search failed")
+    pipeline.stop()
+
+    info, error = _lines(out)
+    assert info["msg"] == "found 3 results"
+    assert info["level"] == "INFO"
+    assert info["logger"] == "pipeline.test"
+    assert info["user_id"] == "u1"
+    assert error["level"] == "ERROR"
+    assert "ValueError: nope" in error["exc"]
+
+
+def test_message_formatting_happens_on_listener_thread(make_logger):
+    formatted_on = []
+
+    class Arg:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return "arg"
+
+    out = io.StringIO()
+    pipeline = LogPipeline(stream=out)
+    log = make_logger(pipeline)
+    log.info("value=%s", Arg())
+    pipeline.stop()
+
+    assert _lines(out)[0]["msg"] == "value=arg"
+    assert formatted_on and formatted_on[0] is not threading.current_thread()
+
+
+def test_sampling_applies_to_info_and_children_only(make_logger, monkeypatch):
+    monkeypatch.setattr("api.services.log_pipeline.random.random", lambda: 0.5)
+    out = io.StringIO()
+    pipeline = LogPipeline(stream=out, sampling=parse_sampling("pipeline.test=0.1, other=bad"))
+    log = make_logger(pipeline)
+    child = logging.getLogger("pipeline.test.child")
+    for _ in range(10):
+        log.info("chatty")
+        child.info("chatty child")
+    log.warning("kept")
+    pipeline.stop()
+
+    assert [line["msg"] for line in _lines(out)] == ["kept"]
+    assert pipeline.snapshot()["sampled_out"] == {"pipeline.test": 10, "pipeline.test.child": 10}
+
+
+def test_full_queue_drops_instead_of_blocking(make_logger):
+    out = io.StringIO()
+    pipeline = LogPipeline(stream=out, queue_size=2)
+    log = make_logger(pipeline)
+    pipeline.stop()  # no consumer: the queue fills up
+    for i in range(5):
+        log.info("line %d", i)
+    assert pipeline.snapshot()["dropped"] == 3
+
+
+def test_parse_sampling():
+    assert parse_sampling("a.b=0.1, c=2,d=x,=0.3,") == {"a.b": 0.1, "c": 1.0}
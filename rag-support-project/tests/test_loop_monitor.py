@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import api.main as main
+import api.services.loop_monitor as lm
+
+
+def _blocking_helper(seconds):
+    time.sleep(seconds)
+
+
+async def test_monitor_records_lag_from_blocking_call():
+    monitor = lm.LoopLagMonitor(interval_ms=10, log_seconds=0)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        _blocking_helper(0.2)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    snap = monitor.snapshot()
+    assert snap["samples"] >= 3
+    assert snap["max_lag_ms"] >= 150
+    assert snap["p50_ms"] < snap["window_max_ms"]
+    assert snap["blocking_events"] == 0
+    assert not snap["running"]
+
+
+async def test_blocking_detector_logs_offending_stack(caplog):
+    monitor = lm.LoopLagMonitor(interval_ms=10, blocking_threshold_ms=50, log_seconds=0)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        with caplog.at_level(logging.WARNING, logger=lm.__name__):
+            _blocking_helper(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    snap = monitor.snapshot()
+    assert snap["blocking_events"] == 1
+    assert snap["last_blocking"]["location"].endswith("in _blocking_helper")
+    assert "Event loop blocked" in caplog.text
+    assert "_blocking_helper" in caplog.text
+    assert "test_blocking_detector_logs_offending_stack" in caplog.text
+
+
+def test_loop_lag_endpoint_reports_percentiles(monkeypatch, test_client):
+    async def _fake_user():
+        return SimpleNamespace(id="u1", email="u1@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    monitor = lm.LoopLagMonitor()
+    for lag in (0.001, 0.002, 0.050):
+        monitor.record(lag)
+    monkeypatch.setattr(lm, "_monitor", monitor)
+    try:
+        resp = test_client.get("/api/metrics/loop-lag")
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["samples"] == 3
+    assert body["p50_ms"] == 2.0
+    assert body["p99_ms"] == 50.0
+    assert body["running"] is False
+
+
+def test_monitor_is_opt_in(monkeypatch):
+    monkeypatch.delenv("LOOP_MONITOR", raising=False)
+    monkeypatch.delenv("LOOP_BLOCKING_DETECTOR", raising=False)
+    assert lm.start_loop_monitor() is False
+    monkeypatch.setenv("LOOP_BLOCKING_DETECTOR", "true")
+    assert lm.loop_monitor_enabled()
@@ -0,0 +1,125 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import api.main as main
+import api.services.embeddings as emb_mod
+import api.services.prefetch as pf
+
+QUERY = "How long does standard delivery take to arrive?"
+
+
+def test_cache_matches_same_or_similar_text():
+    cache = pf.PrefetchCache(similarity=0.9)
+    cache.put("u", pf.PrefetchEntry("how long does standard delivery take to arrive", [0.1], ["r"], 0.2))
+    # Other users never see it
+    assert cache.take("other", QUERY) is None
+
+    hit = cache.take("u", QUERY)
+    assert hit is not None and hit.results == ["r"]
+    # Consumed on use
+    assert cache.take("u", QUERY) is None
+
+    cache.put("u", pf.PrefetchEntry("how long does standard delivery", [0.1], ["r"], 0.2))
+    assert cache.take("u", QUERY) is None
+
+    stats = cache.snapshot()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+    assert stats["hit_rate"] == pytest.approx(0.25)
+    assert stats["avg_latency_saved_ms"] == pytest.approx(200.0)
+
+
+def test_cache_expires_entries(monkeypatch):
+    cache = pf.PrefetchCache(ttl_seconds=10)
+    cache.put("u", pf.PrefetchEntry(QUERY, [0.1], ["r"], 0.2))
+    now = pf.time.monotonic()
+    monkeypatch.setattr(pf.time, "monotonic", lambda: now + 11)
+    assert cache.take("u", QUERY) is None
+
+
+def test_rate_limiter_refills(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(pf.time, "monotonic", lambda: clock[0])
+    limiter = pf.RateLimiter(rate=1.0, burst=2)
+    assert limiter.allow("u") and limiter.allow("u")
+    assert not limiter.allow("u")
+    assert limiter.allow("v")
+    clock[0] += 1.0
+    assert limiter.allow("u")
+
+
+def test_per_user_state_is_bounded():
+    cache = pf.PrefetchCache(max_users=2)
+    limiter = pf.RateLimiter(rate=0.0, burst=1, max_keys=2)
+    for user in ("a", "b", "c"):
+        cache.put(user, pf.PrefetchEntry(QUERY, [0.1], ["r"], 0.2))
+        assert limiter.allow(user)
+    assert len(cache) == 2 and len(limiter) == 2
+    assert cache.take("a", QUERY) is None
+    assert cache.take("c", QUERY) is not None
+    assert cache.snapshot()["evicted_users"] == 1
+
+    # Recently active users are kept
+    assert not limiter.allow("b")
+    assert limiter.allow("d")
+    assert not limiter.allow("b")
+
+
+def test_embedding_cache_reuses_vectors(mock_embedding_model, monkeypatch):
+    calls = []
+    original = mock_embedding_model.encode
+    monkeypatch.setattr(mock_embedding_model, "encode", lambda x: calls.append(x) or original(x), raising=False)
+
+    v1 = asyncio.run(emb_mod.get_embedding("cache me"))
+    v2 = asyncio.run(emb_mod.get_embedding("cache me"))
+    assert v1 == v2 and calls == ["cache me"]
+
+    # A different model invalidates everything cached by the old one
+    monkeypatch.setattr(emb_mod, "_model", SimpleNamespace(encode=lambda x: [0.5] * 384))
+    assert asyncio.run(emb_mod.get_embedding("cache me"))[0] == 0.5
+
+
+def test_prefetch_then_chat_skips_retrieval(monkeypatch, test_client):
+    monkeypatch.setenv("FAQ_FAST_PATH", "false")
+    monkeypatch.setattr(pf, "_cache", pf.PrefetchCache())
+    monkeypatch.setattr(pf, "_limiter", pf.RateLimiter(rate=0.0, burst=2))
+
+    async def _fake_user():
+        return SimpleNamespace(id="prefetch_user", email="p@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+
+    calls = []
+
+    async def fake_embed(q):
+        calls.append(("embed", q))
+        return [0.0] * 384
+
+    async def fake_search(q, top_k=5, threshold=0.7):
+        calls.append(("search", top_k))
+        return [SimpleNamespace(score=0.9, payload={"text": "Three to five days.", "source": "s"})]
+
+    async def fake_llm(prompt):
+        assert "Three to five days." in prompt
+        return "About four days."
+
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors", fake_search)
+    monkeypatch.setattr(main, "get_llm_response", fake_llm)
+
+    resp = test_client.post("/api/chat/prefetch", json={"query": "how long does standard delivery take to arrive"})
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "warmed"
+    assert len(calls) == 2
+
+    resp = test_client.post("/api/chat?format=json&session_id=prefetch", json={"query": QUERY})
+    assert resp.status_code == 200
+    assert resp.json()["prefetch_hit"] is True
+    assert len(calls) == 2
+
+    assert test_client.post("/api/chat/prefetch", json={"query": "short"}).json()["status"] == "skipped"
+    assert test_client.post("/api/chat/prefetch", json={"query": QUERY}).status_code == 429
+
+    stats = test_client.get("/api/chat/prefetch/stats").json()
+    assert stats["hits"] == 1 and stats["rate_limited"] == 1
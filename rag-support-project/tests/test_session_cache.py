@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import api.main as main
+import api.services.session_cache as sc
+
+
+def test_lookup_reuses_close_vectors_only():
+    cache = sc.SessionRetrievalCache(threshold=0.9)
+    cache.store("s1", [1.0, 0.0, 0.0], ["chunk"])
+    assert cache.lookup("s1", [0.98, 0.1, 0.0]) == ["chunk"]
+    assert cache.lookup("s1", [0.0, 1.0, 0.0]) is None
+    assert cache.lookup("s2", [1.0, 0.0, 0.0]) is None
+    # Zero vectors and empty results are never cached or matched
+    assert cache.lookup("s1", [0.0, 0.0, 0.0]) is None
+    cache.store("s3", [1.0, 0.0, 0.0], [])
+    assert len(cache) == 1
+    assert cache.snapshot()["searches_skipped"] == 1
+
+
+def test_idle_sessions_expire(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(sc.time, "monotonic", lambda: clock[0])
+    cache = sc.SessionRetrievalCache(ttl_seconds=10, max_sessions=2)
+    cache.store("old", [1.0, 0.0], ["a"])
+    clock[0] += 5
+    cache.store("new", [1.0, 0.0], ["b"])
+    clock[0] += 6
+    assert cache.lookup("old", [1.0, 0.0]) is None
+    assert cache.lookup("new", [1.0, 0.0]) == ["b"]
+    cache.store("x", [1.0, 0.0], ["c"])
+    cache.store("y", [1.0, 0.0], ["d"])
+    assert len(cache) == 2
+    assert cache.snapshot()["evicted"] == 2
+
+
+def test_chat_follow_up_skips_search(monkeypatch, test_client):
+    monkeypatch.setenv("FAQ_FAST_PATH", "false")
+    monkeypatch.setattr(sc, "_cache", sc.SessionRetrievalCache(threshold=0.95))
+
+    async def _fake_user():
+        return SimpleNamespace(id="session_user", email="s@example.com")
+
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+
+    vectors = {
+        "How do I return a damaged item?": [1.0, 0.0, 0.0],
+        "How do I return a damaged item for a refund?": [0.99, 0.05, 0.0],
+        "What payment methods do you accept?": [0.0, 1.0, 0.0],
+    }
+    searches = []
+
+    async def fake_embed(q):
+        return vectors[q]
+
+    async def fake_search(q, top_k=5, threshold=0.7):
+        searches.append(q)
+        return [SimpleNamespace(score=0.9, payload={"text": "doc", "source": "s"})]
+
+    async def fake_llm(prompt):
+        return "ok"
+
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors", fake_search)
+    monkeypatch.setattr(main, "get_llm_response", fake_llm)
+
+    reused = []
+    for query in vectors:
+        resp = test_client.post("/api/chat?format=json&session_id=follow-up", json={"query": query})
+        assert resp.status_code == 200
+        reused.append(resp.json()["retrieval_reused"])
+
+    assert reused == [False, True, False]
+    assert len(searches) == 2
+    assert resp.json()["engagement_metrics"]["searches_skipped"] == 1
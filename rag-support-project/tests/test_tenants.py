@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import api.main as main
+import api.middleware.auth as auth
+import api.services.faq as faq
+import api.services.local_index as li
+import api.services.tenants as tenants
+import api.services.vector_store as vs
+
+qdrant_client = pytest.importorskip("qdrant_client")
+
+ROUTES = {"acme": {"collection": "acme_docs"}, "globex": {"collection": "globex_docs"}}
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+
+    client = qdrant_client.QdrantClient(":memory:")
+    for name in ("support_docs", "acme_docs", "globex_docs"):
+        client.create_collection(name, vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+        client.upsert(name, points=[PointStruct(id=1, vector=[1.0, 0, 0, 0], payload={"text": name})])
+    monkeypatch.setenv("TENANT_ROUTES", json.dumps(ROUTES))
+    monkeypatch.delenv("QDRANT_COLLECTION", raising=False)
+    monkeypatch.setattr(vs, "_get_client", lambda: client)
+    return client
+
+
+def _search_as(tenant):
+    async def _run():
+        tenants.bind_tenant(tenant)
+        return await vs.search_vectors([1.0, 0, 0, 0], top_k=1, threshold=0.0)
+    return asyncio.run(_run())[0].payload["text"]
+
+
+def test_search_routes_to_tenant_collection(qdrant):
+    assert _search_as(None) == "support_docs"
+    assert _search_as("acme") == "acme_docs"
+    assert _search_as("globex") == "globex_docs"
+
+
+def test_tenant_replicas_are_separate_and_bounded(qdrant, monkeypatch):
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setenv("TENANT_REPLICA_CACHE_SIZE", "1")
+    monkeypatch.setattr(li, "_local_index", None)
+    monkeypatch.setattr(li, "_tenant_indexes", type(li._tenant_indexes)())
+
+    assert _search_as("acme") == "acme_docs"
+    assert _search_as("globex") == "globex_docs"
+    assert li.loaded_replicas() == [tenants.get_route("globex").key]
+    assert _search_as(None) == "support_docs"
+    assert li.get_local_index().loaded
+
+
+def test_resolve_tenant(monkeypatch):
+    monkeypatch.delenv("TENANT_ROUTES", raising=False)
+    assert tenants.resolve_tenant("acme", "globex") is None  # tenancy off
+
+    monkeypatch.setenv("TENANT_ROUTES", json.dumps(ROUTES))
+    assert tenants.resolve_tenant("acme", None) == "acme"
+    assert tenants.resolve_tenant("acme", "acme") == "acme"
+    assert tenants.resolve_tenant(None, None) is None
+    assert tenants.resolve_tenant("acme", "globex", allowed=["globex"]) == "globex"
+    assert tenants.resolve_tenant(None, "globex", trust_requested=True) == "globex"
+    for user_tenant in ("acme", None):
+        with pytest.raises(PermissionError):
+            tenants.resolve_tenant(user_tenant, "globex")
+    with pytest.raises(tenants.UnknownTenant):
+        tenants.resolve_tenant(None, "initech", trust_requested=True)
+
+
+@pytest.fixture
+def dev_auth(monkeypatch):
+    for var in ("SUPABASE_JWT_SECRET", "SUPABASE_URL", "AUTH_JWKS_URL"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(auth, "_verifier", None)
+    main.app.dependency_overrides.pop(main.get_current_user, None)
+
+
+def test_header_binds_tenant_for_the_request(qdrant, dev_auth, monkeypatch, test_client):
+    seen = []
+
+    async def fake_embed(q):
+        return [1.0, 0, 0, 0]
+
+    async def fake_search(q, top_k=5, threshold=0.7):
+        seen.append(tenants.current_tenant())
+        return []
+
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors", fake_search)
+    monkeypatch.setattr(main, "lookup_faq", lambda q: None)
+    body = {"query": "how do refunds work"}
+
+    assert test_client.post("/api/chat/prefetch", json=body, headers={"X-Tenant-ID": "acme"}).status_code == 200
+    assert test_client.post("/api/chat/prefetch", json=body).status_code == 200
+    assert seen == ["acme", None]
+
+    # Prefetched results are only reused within the tenant
+    cache = main.get_prefetch_cache()
+    assert cache.take("acme/dev_user", body["query"]) is not None
+
+    resp = test_client.post("/api/chat/prefetch", json=body, headers={"X-Tenant-ID": "initech"})
+    assert resp.status_code == 400
+
+
+def test_warmup_endpoint(qdrant, dev_auth, monkeypatch, test_client):
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setattr(li, "_tenant_indexes", type(li._tenant_indexes)())
+
+    assert test_client.post("/api/tenants/acme/warmup").status_code == 403
+    monkeypatch.setenv("ADMIN_USER_IDS", "dev_user")
+    info = test_client.post("/api/tenants/acme/warmup").json()
+    assert info["collection"] == "acme_docs"
+    assert info["replica_loaded"] is True
+    assert li.get_local_index(tenants.get_route("acme").key).loaded
+    assert test_client.post("/api/tenants/initech/warmup").status_code == 404
+
+
+def test_faq_fast_path_is_default_tenant_only(qdrant, dev_auth, monkeypatch, test_client, tmp_path):
+    (tmp_path / "faq.txt").write_text("Q: How do refunds work?\nA: Default refund policy.\n")
+    monkeypatch.setattr(faq, "_faq_index", faq.build_faq_index(data_dir=tmp_path))
+    monkeypatch.setenv("FAQ_FAST_PATH", "true")
+    searched = []
+
+    async def fake_embed(q):
+        return [1.0, 0, 0, 0]
+
+    async def fake_search(q, top_k=5, threshold=0.7):
+        searched.append(tenants.current_tenant())
+        return []
+
+    monkeypatch.setattr(main, "get_embedding", fake_embed)
+    monkeypatch.setattr(main, "search_vectors", fake_search)
+    body = {"query": "How do refunds work?"}
+
+    resp = test_client.post("/api/chat?format=json&session_id=faq-default", json=body)
+    assert resp.json()["response"] == "Default refund policy."
+    resp = test_client.post(
+        "/api/chat?format=json&session_id=faq-acme", json=body, headers={"X-Tenant-ID": "acme"}
+    )
+    assert resp.json()["response"] != "Default refund policy."
+    assert searched == ["acme"]
+
+
+@pytest.fixture
+def jwt_auth(monkeypatch):
+    jwt = pytest.importorskip("jwt")
+    secret = "test-secret-with-at-least-32-bytes!!"
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", secret)
+    for var in ("SUPABASE_URL", "AUTH_JWKS_URL", "ADMIN_USER_IDS"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(auth, "_verifier", None)
+    main.app.dependency_overrides.pop(main.get_current_user, None)
+
+    def _headers(header=None, **app_metadata):
+        claims = {"sub": "user-1", "email": "u1@example.com", "aud": "authenticated",
+                  "exp": int(time.time()) + 300, "app_metadata": app_metadata}
+        headers = {"Authorization": "Bearer " + jwt.encode(claims, secret, algorithm="HS256")}
+        if header:
+            headers["X-Tenant-ID"] = header
+        return headers
+    return _headers
+
+
+def test_verified_token_cannot_pick_tenant_by_header(qdrant, jwt_auth, monkeypatch, test_client):
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setattr(li, "_tenant_indexes", type(li._tenant_indexes)())
+    stats = "/api/chat/prefetch/stats"
+
+    # No tenant claim: the header cannot select one, and is no membership proof
+    assert test_client.get(stats, headers=jwt_auth("acme")).status_code == 403
+    assert test_client.post("/api/tenants/acme/warmup", headers=jwt_auth("acme")).status_code == 403
+
+    # Another tenant than the claimed one
+    assert test_client.get(stats, headers=jwt_auth("globex", tenant="acme")).status_code == 403
+    assert test_client.post("/api/tenants/acme/warmup", headers=jwt_auth(tenant="acme")).status_code == 200
+
+    # Tenants the claims allow
+    assert test_client.get(stats, headers=jwt_auth("globex", tenant="acme", tenants=["globex"])).status_code == 200
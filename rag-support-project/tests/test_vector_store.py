@@ -57,3 +57,90 @@ def test_connection_retry(monkeypatch):
     res = asyncio.run(vs.search_vectors([0.0] * 384, top_k=1, threshold=0.0))
     assert len(res) == 1
     assert calls["n"] >= 3
+
+
+def test_search_goes_through_configured_alias(monkeypatch):
+    seen = {}
+
+    class FakeClient:
+        def query_points(self, collection_name, **kwargs):
+            seen["collection"] = collection_name
+            return _FakeResults([_FakePoint(0.9, "hi")])
+
+    monkeypatch.setattr(vs, "_get_client", lambda: FakeClient())
+    asyncio.run(vs.search_vectors([0.0] * 384))
+    assert seen["collection"] == "support_docs"
+
+    monkeypatch.setenv("QDRANT_COLLECTION", "tenant_docs")
+    asyncio.run(vs.search_vectors([0.0] * 384))
+    assert seen["collection"] == "tenant_docs"
+
+
+def test_oversampling_enables_rescoring(monkeypatch):
+    pytest.importorskip("qdrant_client")
+    seen = {}
+
+    class FakeClient:
+        def query_points(self, collection_name, **kwargs):
+            seen.update(kwargs)
+            return _FakeResults([_FakePoint(0.9, "hi")])
+
+    monkeypatch.setattr(vs, "_get_client", lambda: FakeClient())
+    asyncio.run(vs.search_vectors([0.0] * 384))
+    assert "search_params" not in seen
+
+    monkeypatch.setenv("QDRANT_OVERSAMPLING", "2.5")
+    asyncio.run(vs.search_vectors([0.0] * 384))
+    params = seen["search_params"].quantization
+    assert params.rescore is True and params.oversampling == 2.5
+
+
+def _pts(*scores):
+    return [_FakePoint(s, f"t{i}") for i, s in enumerate(scores)]
+
+
+def test_adaptive_select_dominant_hit():
+    kept = vs.adaptive_select(_pts(0.92, 0.71, 0.70, 0.69), min_k=1, max_k=5)
+    assert [p.score for p in kept] == [0.92]
+
+
+def test_adaptive_select_keeps_close_scores_within_bounds():
+    scores = (0.81, 0.80, 0.80, 0.79, 0.79, 0.78)
+    kept = vs.adaptive_select(_pts(*scores), min_k=2, max_k=4, mass=0.99)
+    assert len(kept) == 4
+    # min_k is honoured even when the second hit is far behind
+    assert len(vs.adaptive_select(_pts(0.9, 0.2), min_k=2, max_k=4)) == 2
+
+
+def test_adaptive_mode_from_env(monkeypatch):
+    seen = {}
+
+    class FakeClient:
+        def query_points(self, collection_name, query, limit, with_payload):
+            seen["limit"] = limit
+            return _FakeResults(_pts(0.95, 0.75, 0.74, 0.73, 0.72, 0.71, 0.70))
+
+    monkeypatch.setattr(vs, "_get_client", lambda: FakeClient())
+    monkeypatch.setenv("RETRIEVAL_MODE", "adaptive")
+    monkeypatch.setenv("ADAPTIVE_MAX_K", "8")
+    res = asyncio.run(vs.search_vectors([0.0] * 384, top_k=5, threshold=0.7))
+    assert seen["limit"] == 8
+    assert len(res) == 1
+
+
+def test_search_vectors_batch_single_round_trip(monkeypatch):
+    calls = []
+
+    class FakeClient:
+        def query_batch_points(self, collection_name, requests):
+            calls.append(len(requests))
+            return [
+                _FakeResults([_FakePoint(0.9, f"hi{i}"), _FakePoint(0.4, "lo")])
+                for i in range(len(requests))
+            ]
+
+    monkeypatch.setattr(vs, "_get_client", lambda: FakeClient())
+    res = asyncio.run(vs.search_vectors_batch([[0.0] * 4, [1.0] * 4, [0.5] * 4], top_k=2, threshold=0.8))
+    assert calls == [3]
+    assert [[p.payload["text"] for p in r] for r in res] == [["hi0"], ["hi1"], ["hi2"]]
+    assert asyncio.run(vs.search_vectors_batch([])) == []
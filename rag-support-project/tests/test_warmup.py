@@ -0,0 +1,191 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import api.main as main
+import api.services.warmup as warmup
+from api.services import embeddings, vector_store
+from api.services.tenants import bind_tenant
+
+
+def _write_log(tmp_path, records):
+    path = tmp_path / "queries.jsonl"
+    path.write_text("\n".join(r if isinstance(r, str) else json.dumps(r) for r in records) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def fake_retrieval(monkeypatch):
+    calls = {"embed": [], "search": []}
+
+    async def fake_embed(texts):
+        calls["embed"].append(list(texts))
+        return [[float(len(t)), 0.0] for t in texts]
+
+    async def fake_search_batch(vectors, top_k=5, threshold=0.7):
+        calls["search"].append(len(vectors))
+        return [[SimpleNamespace(score=0.9, payload={"text": f"doc {v[0]:.0f}"})] for v in vectors]
+
+    monkeypatch.setattr(embeddings, "get_embedding", fake_embed)
+    monkeypatch.setattr(embeddings, "cache_embeddings", lambda texts, vectors: None)
+    monkeypatch.setattr(vector_store, "search_vectors_batch", fake_search_batch)
+    return calls
+
+
+def test_load_query_log_merges_and_ranks(tmp_path):
+    path = _write_log(tmp_path, [
+        {"query": "Reset password", "count": 3},
+        {"query": "reset  PASSWORD?", "count": 4},
+        {"query": "cancel plan"},
+        {"query": "cancel plan", "tenant": "acme", "count": 2},
+        "not json",
+        {"count": 9},
+        {"query": "   "},
+    ])
+    assert warmup.load_query_log(path) == [
+        (None, "Reset password", 7),
+        ("acme", "cancel plan", 2),
+        (None, "cancel plan", 1),
+    ]
+
+
+def test_warmer_batches_top_queries_and_skips(tmp_path, fake_retrieval):
+    path = _write_log(tmp_path, [{"query": f"question {i}", "count": 100 - i} for i in range(10)])
+    cache = warmup.WarmRetrievalCache()
+    warmer = warmup.CacheWarmer(path, top_n=5, batch_size=2)
+
+    snapshot = asyncio.run(warmer.run(lambda q: q == "question 1", cache))
+
+    assert snapshot["state"] == "done" and snapshot["ready"]
+    assert snapshot["selected"] == 5 and snapshot["warmed"] == 5 and snapshot["skipped"] == 1
+    assert fake_retrieval["search"] == [2, 2, 1]
+    assert cache.get("Question 0") is not None
+    assert cache.get("question 1") is None
+    assert cache.get("question 9") is None
+
+
+def test_warmed_results_are_tenant_scoped(tmp_path, fake_retrieval):
+    path = _write_log(tmp_path, [{"query": "refunds", "tenant": "acme"}])
+    cache = warmup.WarmRetrievalCache()
+    asyncio.run(warmup.CacheWarmer(path).run(lambda q: False, cache))
+
+    async def lookup(tenant):
+        bind_tenant(tenant)
+        return cache.get("refunds")
+
+    assert asyncio.run(lookup("acme")) is not None
+    assert asyncio.run(lookup(None)) is None
+
+
+def test_budget_keeps_partial_progress(tmp_path, monkeypatch, fake_retrieval):
+    path = _write_log(tmp_path, [{"query": f"q{i}", "count": 10 - i} for i in range(4)])
+    original = vector_store.search_vectors_batch
+
+    async def slow_after_first(vectors, **kwargs):
+        if fake_retrieval["search"]:
+            await asyncio.sleep(10)
+        return await original(vectors, **kwargs)
+
+    monkeypatch.setattr(vector_store, "search_vectors_batch", slow_after_first)
+    cache = warmup.WarmRetrievalCache()
+    warmer = warmup.CacheWarmer(path, budget_seconds=0.2, batch_size=2)
+
+    snapshot = asyncio.run(warmer.run(lambda q: False, cache))
+
+    assert snapshot["state"] == "timeout" and snapshot["ready"]
+    assert snapshot["warmed"] == 2
+    assert cache.get("q0") is not None and cache.get("q3") is None
+
+
+def test_retrieval_cache_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(warmup.time, "monotonic", lambda: now[0])
+    cache = warmup.WarmRetrievalCache(ttl_seconds=60)
+    cache.put("hello there", ["doc"])
+    assert cache.get("Hello there!") == ["doc"]
+    now[0] += 61
+    assert cache.get("hello there") is None
+    assert cache.snapshot() == {"hits": 1, "misses": 1, "entries": 0, "hit_rate": 0.5}
+
+
+def test_health_is_503_while_warming(monkeypatch, test_client):
+    warmer = warmup.CacheWarmer("unused.jsonl")
+    monkeypatch.setattr(warmup, "_warmer", warmer)
+
+    warmer.state = "running"
+    resp = test_client.get("/api/health")
+    assert resp.status_code == 503
+    assert resp.json()["status"] == "warming"
+
+    warmer.state = "timeout"
+    resp = test_client.get("/api/health")
+    assert resp.status_code == 200
+    assert resp.json()["checks"]["cache_warmup"]["state"] == "timeout"
+
+
+def test_chat_serves_warmed_query_without_embedding(monkeypatch, test_client):
+    cache = warmup.WarmRetrievalCache()
+    cache.put("how do I export invoices", [SimpleNamespace(score=0.9, payload={"text": "Use Billing > Export."})])
+    monkeypatch.setattr(warmup, "_cache", cache)
+
+    async def _fake_user():
+        return SimpleNamespace(id="u1", email="u1@example.com")
+
+    async def _boom(*args, **kwargs):
+        raise AssertionError("embedding/search should be skipped")
+
+    async def fake_stream(prompt, **kwargs):
+        yield "answer"
+
+    async def fake_llm(prompt):
+        return "answer"
+
+    monkeypatch.setattr(main, "get_embedding", _boom)
+    monkeypatch.setattr(main, "search_vectors", _boom)
+    monkeypatch.setattr(main, "stream_llm_response", fake_stream)
+    monkeypatch.setattr(main, "get_llm_response", fake_llm)
+    monkeypatch.setattr(main, "lookup_faq", lambda q: None)
+    main.app.dependency_overrides[main.get_current_user] = _fake_user
+    try:
+        for session in ("warm-1", "warm-2"):
+            resp = test_client.post(f"/api/chat?session_id={session}", json={"query": "hi"})
+            resp = test_client.post(f"/api/chat?session_id={session}", json={"query": "How do I export invoices?"})
+            assert resp.status_code == 200
+            assert "answer" in resp.text
+        resp = test_client.post("/api/chat?format=json&session_id=warm-2", json={"query": "How do I export invoices?"})
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_user, None)
+    assert cache.snapshot()["hits"] == 3
+
+    body = resp.json()
+    assert body["warm_cache_hit"] is True and body["retrieval_reused"] is False
+    assert body["engagement_metrics"]["warm_cache_hits"] == 2
+    assert body["engagement_metrics"]["searches_skipped"] == 0
+
+
+def test_skip_check_sees_the_query_tenant(tmp_path, fake_retrieval):
+    from api.services.tenants import current_tenant
+
+    path = _write_log(tmp_path, [{"query": "refunds", "tenant": "acme", "count": 2}, {"query": "refunds"}])
+    seen = []
+    asyncio.run(warmup.CacheWarmer(path).run(lambda q: seen.append(current_tenant()), warmup.WarmRetrievalCache()))
+    assert seen == ["acme", None]
+
+
+def test_cache_embeddings_keeps_provider_vector_type(monkeypatch):
+    np = pytest.importorskip("numpy")
+
+    class FloatModel:
+        def encode(self, x):
+            if isinstance(x, list):
+                return np.ones((len(x), 4), dtype=np.float32)
+            return np.ones(4, dtype=np.float32)
+
+    model = FloatModel()
+    monkeypatch.setattr(embeddings, "_model", model)
+    embeddings.cache_embeddings(["warm one"], model.encode(["warm one"]))
+    warmed = asyncio.run(embeddings.get_embedding("warm one"))
+    fresh = asyncio.run(embeddings.get_embedding("fresh one"))
+    assert type(warmed) is type(fresh) and warmed.dtype == fresh.dtype == np.float32